@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Dict, Any, Optional
 import os
@@ -6,6 +7,7 @@ import json
 
 # 使用新的简化分析器
 from app.bazi_lib.bazi.simple_bazi_analyzer import SimpleBaziAnalyzer
+from app.metrics import IN_PROGRESS, record_llm_error, record_llm_usage, track_stage
 
 router = APIRouter()
 
@@ -20,45 +22,56 @@ class BaziRequest(BaseModel):
 @router.post("/bazi_interpret")
 async def bazi_interpret(request: BaziRequest):
     """使用简化分析器的八字解读API"""
+    with IN_PROGRESS.track_inprogress(), track_stage("total"):
+        # 排盘和LLM调用都是阻塞的，放到线程池里执行，避免卡住事件循环
+        return await run_in_threadpool(_interpret, request)
+
+def _interpret(request: BaziRequest):
+    """解读流程，各阶段分别计入耗时指标"""
     try:
-        # 1. 使用简化分析器进行八字分析
-        analyzer = SimpleBaziAnalyzer(
-            request.year, request.month, request.day, request.hour,
-            request.gender, request.use_gregorian
-        )
-        
-        # 2. 获取分析结果
-        bazi_result = analyzer.get_compatible_result()  # 使用兼容格式
-        if not bazi_result.get('success'):
-            return {
-                "success": False,
-                "error": bazi_result.get('error', '八字分析失败'),
-                "bazi_result": {},
-                "base_analysis": "",
-                "knowledge_context": "",
-                "query_used": "",
-                "llm_interpretation": "八字分析失败，无法进行解读"
-            }
-        
-        # 3. 生成分析摘要
-        analysis_summary = analyzer.get_analysis_summary()
-        
-        # 4. 创建LLM查询
-        llm_query = analyzer.get_llm_query()
+        with track_stage("chart"):
+            # 1. 使用简化分析器进行八字分析
+            analyzer = SimpleBaziAnalyzer(
+                request.year, request.month, request.day, request.hour,
+                request.gender, request.use_gregorian
+            )
+            
+            # 2. 获取分析结果
+            bazi_result = analyzer.get_compatible_result()  # 使用兼容格式
+            if not bazi_result.get('success'):
+                return {
+                    "success": False,
+                    "error": bazi_result.get('error', '八字分析失败'),
+                    "bazi_result": {},
+                    "base_analysis": "",
+                    "knowledge_context": "",
+                    "query_used": "",
+                    "llm_interpretation": "八字分析失败，无法进行解读"
+                }
+            
+            # 3. 生成分析摘要
+            analysis_summary = analyzer.get_analysis_summary()
+            
+            # 4. 创建LLM查询
+            llm_query = analyzer.get_llm_query()
         
         # 5. 知识库检索
         knowledge_context = ""
         try:
-            from app.vectorstore import similarity_search
-            docs = similarity_search(llm_query, k=3)
-            knowledge_context = "\n".join([doc.page_content for doc in docs])
+            with track_stage("retrieval"):
+                from app.vectorstore import similarity_search
+                docs = similarity_search(llm_query, k=3)
+                knowledge_context = "\n".join([doc.page_content for doc in docs])
         except Exception as e:
             knowledge_context = f"知识库检索失败: {str(e)}"
         
         # 6. LLM解读
         llm_interpretation = ""
+        provider = "unknown"
         try:
+            from app.config import settings
             from app.llm_factory import create_llm
+            provider = settings.LLM_PROVIDER
             
             prompt = f"""请根据以下八字信息和相关知识，为用户提供专业的命理解读：
 
@@ -78,11 +91,14 @@ async def bazi_interpret(request: BaziRequest):
 
 请用专业但易懂的语言，结合传统命理学说进行分析。"""
 
-            llm = create_llm()
-            answer = llm.invoke(prompt)
+            with track_stage("llm"):
+                llm = create_llm()
+                answer = llm.invoke(prompt)
+            record_llm_usage(provider, answer)
             llm_interpretation = answer.content if hasattr(answer, 'content') else str(answer)
         
         except Exception as llm_error:
+            record_llm_error(provider)
             llm_interpretation = f"LLM解读失败：{str(llm_error)}"
         
         # 7. 返回结果
@@ -0,0 +1,44 @@
+"""
+八字排盘与分析引擎
+
+常用入口在首次访问时才导入对应模块（PEP 562），导入本包本身不会载入数据表、lunar_python 或 numpy：
+
+    from app.bazi_lib.bazi import SimpleBaziAnalyzer
+"""
+
+import importlib
+
+# 对外名称 -> (所在模块, 模块内名称)
+_LAZY_ATTRS = {
+    'BaziAnalyzer': ('.bazi_analyzer', 'BaziAnalyzer'),
+    'SimpleBaziAnalyzer': ('.simple_bazi_analyzer', 'SimpleBaziAnalyzer'),
+    'CoreBaseModule': ('.modules.core_base', 'CoreBaseModule'),
+    'to_pillars_batch': ('.modules.core_base', 'to_pillars_batch'),
+    'lunar_to_pillars_batch': ('.modules.core_base', 'lunar_to_pillars_batch'),
+    'solar_to_lunar_batch': ('.modules.core_base', 'solar_to_lunar_batch'),
+    'find_birth_datetimes': ('.pillar_index', 'find_birth_datetimes'),
+    'select_days': ('.zeri', 'select_days'),
+    'scan_transits': ('.transit', 'scan_transits'),
+    'ChartStore': ('.chart_store', 'ChartStore'),
+    'SimilarityIndex': ('.chart_similarity', 'SimilarityIndex'),
+    'chart_vector': ('.chart_similarity', 'chart_vector'),
+    'export_charts': ('.chart_export', 'export_charts'),
+    'match_rules': ('.geju', 'match_rules'),
+    'summarys': ('.textstore', 'summarys'),
+    'months': ('.textstore', 'months'),
+}
+
+__all__ = list(_LAZY_ATTRS)
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attr = _LAZY_ATTRS[name]
+    value = getattr(importlib.import_module(module_name, __name__), attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
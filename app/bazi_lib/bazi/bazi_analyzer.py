@@ -5,6 +5,7 @@
 
 import collections
 import datetime
+import pickle
 from typing import Dict, Any, List, Optional, Tuple
 
 try:
@@ -16,8 +17,8 @@ except ImportError:
 try:
     from .datas import *
     from .bazi_core import *
-    from .sizi import summarys
-    from .yue import months
+    from .textstore import summarys
+    from .textstore import months
     from .common import *
     from .modules.core_base import CoreBaseModule
     from .modules.basic_info import BasicInfoModule
@@ -31,19 +32,11 @@ try:
     from .modules.personality_analysis import PersonalityAnalysisModule
 except ImportError:
     try:
-        # 尝试绝对导入 - 修复版本
-        import sys
-        import os
-        
-        # 临时添加bazi目录到sys.path，确保内部模块能找到彼此
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        if current_dir not in sys.path:
-            sys.path.insert(0, current_dir)
-        
+        # 尝试绝对导入
         from app.bazi_lib.bazi.datas import *  # type: ignore
         from app.bazi_lib.bazi.bazi_core import *  # type: ignore
-        from app.bazi_lib.bazi.sizi import summarys  # type: ignore
-        from app.bazi_lib.bazi.yue import months  # type: ignore
+        from app.bazi_lib.bazi.textstore import summarys  # type: ignore
+        from app.bazi_lib.bazi.textstore import months  # type: ignore
         from app.bazi_lib.bazi.common import *  # type: ignore
         from app.bazi_lib.bazi.modules.core_base import CoreBaseModule  # type: ignore
         from app.bazi_lib.bazi.modules.basic_info import BasicInfoModule  # type: ignore
@@ -56,37 +49,45 @@ except ImportError:
         from app.bazi_lib.bazi.modules.liuqin_analysis import LiuqinAnalysisModule  # type: ignore
         from app.bazi_lib.bazi.modules.personality_analysis import PersonalityAnalysisModule  # type: ignore
     except ImportError:
-        try:
-            # 尝试绝对导入
-            from app.bazi_lib.bazi.datas import *  # type: ignore
-            from app.bazi_lib.bazi.bazi_core import *  # type: ignore
-            from app.bazi_lib.bazi.sizi import summarys  # type: ignore
-            from app.bazi_lib.bazi.yue import months  # type: ignore
-            from app.bazi_lib.bazi.common import *  # type: ignore
-            from app.bazi_lib.bazi.modules.core_base import CoreBaseModule  # type: ignore
-            from app.bazi_lib.bazi.modules.basic_info import BasicInfoModule  # type: ignore
-            from app.bazi_lib.bazi.modules.bazi_main import BaziMainModule  # type: ignore
-            from app.bazi_lib.bazi.modules.detail_info import DetailInfoModule  # type: ignore
-            from app.bazi_lib.bazi.modules.shens_analysis import ShensAnalysisModule  # type: ignore
-            from app.bazi_lib.bazi.modules.zhi_relations import ZhiRelationsModule  # type: ignore
-            from app.bazi_lib.bazi.modules.dayun_analysis import DayunAnalysisModule  # type: ignore
-            from app.bazi_lib.bazi.modules.liunian_analysis import LiunianAnalysisModule  # type: ignore
-            from app.bazi_lib.bazi.modules.liuqin_analysis import LiuqinAnalysisModule  # type: ignore
-            from app.bazi_lib.bazi.modules.personality_analysis import PersonalityAnalysisModule  # type: ignore
-        except ImportError:
-            # 设置默认值以避免错误
-            ten_deities = {}
-            zhi5 = {}
-            gan5 = {}
-            Gan = ['甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '壬', '癸']
-            Zhi = ['子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥']
-            tiaohous = {}
-            jinbuhuan = {}
-            months = {}
-            summarys = {}
-            CoreBaseModule = None
-            BasicInfoModule = None
-            BaziMainModule = None
+        # 设置默认值以避免错误
+        ten_deities = {}
+        zhi5 = {}
+        gan5 = {}
+        Gan = ['甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '壬', '癸']
+        Zhi = ['子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥']
+        tiaohous = {}
+        jinbuhuan = {}
+        months = {}
+        summarys = {}
+        CoreBaseModule = None
+        BasicInfoModule = None
+        BaziMainModule = None
+
+try:
+    from .bazi_log import get_logger, record_fallback
+except ImportError:
+    from bazi_log import get_logger, record_fallback
+
+logger = get_logger(__name__)
+
+try:
+    from .profiling import NULL_PROFILER, Profiler, current_profiler
+except ImportError:
+    from profiling import NULL_PROFILER, Profiler, current_profiler
+
+try:
+    from .bazi_cache import LRUCache, chart_key
+except ImportError:
+    from bazi_cache import LRUCache, chart_key
+
+# 命盘缓存：以下模块的结果只取决于四柱与性别（与出生日期、节气、起运岁数无关），
+# 按 chart_key 缓存模块对象与结果，四柱相同的请求直接复用；基本信息、大运、流年每次重新计算。
+# 结果以 pickle 字节缓存，每次命中反序列化出本请求自己的副本，调用方修改结果不会影响缓存；
+# 模块对象由各请求共享，只读。每条约占 60～90 KiB，容量可用环境变量 BAZI_CACHE_CHART 调整
+CHART_INVARIANT_RESULTS = ('bazi_main', 'detail_info', 'shens_analysis', 'zhi_relations',
+                           'liuqin_analysis', 'personality_analysis')
+_CHART_CACHE_SIZE = 256
+_chart_cache = LRUCache('chart', _CHART_CACHE_SIZE)
 
 # Named tuples
 Gans = collections.namedtuple("Gans", "year month day time")
@@ -98,7 +99,8 @@ class BaziAnalyzer:
     
     def __init__(self, year: int, month: int, day: int, hour: int, 
                  gender: str = '男', use_gregorian: bool = False, 
-                 is_leap: bool = False, use_bazi_input: bool = False):
+                 is_leap: bool = False, use_bazi_input: bool = False,
+                 profile: bool = False):
         """
         初始化八字分析器
         
@@ -111,6 +113,7 @@ class BaziAnalyzer:
             use_gregorian: 是否使用公历
             is_leap: 是否闰月
             use_bazi_input: 是否直接输入八字
+            profile: 是否记录各模块的耗时和内存分配（结果中附带计时树 profile）
         """
         self.year = year
         self.month = month
@@ -136,6 +139,9 @@ class BaziAnalyzer:
         
         # 分析结果
         self.analysis_results = {}
+        self.chart_key = None
+        self._chart_entry = {}  # 结果键 -> (模块, 结果)，命中命盘缓存时结果为缓存条目的副本
+        self._chart_cached = False
         
         # 兼容性属性
         self.gans = None
@@ -151,19 +157,63 @@ class BaziAnalyzer:
         self.dayuns = []
         self.all_ges = []
         
+        # 剖析器：profile=True 时独立计时；处于 profiling() 上下文时挂到上下文的计时树下
+        if profile:
+            self.profiler = Profiler('BaziAnalyzer')
+        else:
+            self.profiler = current_profiler() or NULL_PROFILER
+        self.profile = profile
+        
         # 执行分析
-        self._analyze()
+        if profile:
+            self._analyze()
+            self.profiler.finish()
+        else:
+            with self.profiler.span('BaziAnalyzer'):
+                self._analyze()
+
+    def _run_module(self, module_class, *args):
+        """构造模块并取结果，分别计时"""
+        with self.profiler.span(module_class.__name__):
+            with self.profiler.span('__init__'):
+                module = module_class(*args)
+            with self.profiler.span('get_result'):
+                result = module.get_result()
+        return module, result
+
+    def _run_chart_module(self, name, module_class, *args):
+        """运行只取决于四柱与性别的模块，命盘缓存中已有时直接取缓存的模块与结果"""
+        entry = self._chart_entry.get(name)
+        if entry is None:
+            entry = self._chart_entry[name] = self._run_module(module_class, *args)
+        return entry
+
+    def _lookup_chart_cache(self, gans_dict, zhis_dict):
+        """按四柱与性别查命盘缓存"""
+        order = ('year', 'month', 'day', 'time')
+        self.chart_key = chart_key([gans_dict.get(item, '') for item in order],
+                                   [zhis_dict.get(item, '') for item in order], self.gender)
+        cached = _chart_cache.get(self.chart_key)
+        self._chart_cached = cached is not None
+        self._chart_entry = {name: (module, pickle.loads(blob)) for name, (module, blob) in (cached or {}).items()}
+
+    def _store_chart_cache(self):
+        """各命盘模块都算完后写入命盘缓存"""
+        if self.chart_key and not self._chart_cached \
+                and all(name in self._chart_entry for name in CHART_INVARIANT_RESULTS):
+            _chart_cache.put(self.chart_key, {name: (module, pickle.dumps(result, pickle.HIGHEST_PROTOCOL))
+                                              for name, (module, result) in self._chart_entry.items()})
 
     def _analyze(self):
         """执行完整分析"""
         try:
             # 1. 创建核心基础模块
             if CoreBaseModule:
-                self.core_module = CoreBaseModule(
+                self.core_module, core_data = self._run_module(
+                    CoreBaseModule,
                     self.year, self.month, self.day, self.hour, 
                     self.gender, self.use_gregorian, self.is_leap, self.use_bazi_input
                 )
-                core_data = self.core_module.get_result()
                 
                 # 提取核心数据用于兼容性
                 bazi_info = core_data.get('bazi_info', {})
@@ -174,17 +224,17 @@ class BaziAnalyzer:
                     self.gans = Gans(**gans_dict)
                     self.zhis = Zhis(**zhis_dict)
                     self.me = bazi_info.get('me', '')
+                    self._lookup_chart_cache(gans_dict, zhis_dict)
                 
                 # 2. 创建基本信息模块
                 if BasicInfoModule:
-                    self.basic_info_module = BasicInfoModule(core_data)
-                    basic_info_result = self.basic_info_module.get_result()
+                    self.basic_info_module, basic_info_result = self._run_module(BasicInfoModule, core_data)
                     self.analysis_results['basic_info'] = basic_info_result
                     
                     # 3. 创建八字主体模块
                     if BaziMainModule:
-                        self.bazi_main_module = BaziMainModule(core_data, basic_info_result)
-                        bazi_main_result = self.bazi_main_module.get_result()
+                        self.bazi_main_module, bazi_main_result = self._run_chart_module(
+                            'bazi_main', BaziMainModule, core_data, basic_info_result)
                         self.analysis_results['bazi_main'] = bazi_main_result
                         
                         # 提取数据用于兼容性
@@ -211,15 +261,20 @@ class BaziAnalyzer:
             
             # 3. 创建其他分析模块
             self._create_additional_modules()
+            self._store_chart_cache()
             
             # 4. 执行传统分析（兼容性）
-            self._analyze_patterns()
-            self._analyze_classic_texts()
-            self._analyze_special()
-            self._analyze_statistics()
+            with self.profiler.span('compat_analysis'):
+                self._analyze_patterns()
+                self._analyze_classic_texts()
+                self._analyze_special()
+                self._analyze_statistics()
             
         except Exception as e:
-            print(f"分析过程出错: {e}")
+            if self.use_bazi_input and isinstance(e, ValueError):
+                # 输入的八字无对应出生时刻：备用分析会把四柱字符串当年月日计算，直接报错
+                raise
+            record_fallback(logger, 'analyze', "分析过程出错", e)
             self._fallback_analysis()
 
     def _fallback_basic_info(self):
@@ -289,10 +344,10 @@ class BaziAnalyzer:
             self.zhi_shens = ten_gods.get('zhi_shens', [])
             self.shens = ten_gods.get('all_shens', [])
             
-            print("备用分析成功：使用直接模块调用")
+            logger.debug("备用分析成功：使用直接模块调用")
             
         except Exception as e:
-            print(f"备用分析也失败: {e}")
+            record_fallback(logger, 'fallback_analysis', "备用分析也失败", e)
             # 最终备用方案：简化计算
             self._simple_fallback_analysis()
     
@@ -356,8 +411,7 @@ class BaziAnalyzer:
                 
                 # 4. 创建详细信息模块
                 if DetailInfoModule:
-                    self.detail_info_module = DetailInfoModule(core_data, basic_info_data, bazi_main_data)
-                    detail_info_data = self.detail_info_module.get_result()
+                    self.detail_info_module, detail_info_data = self._run_chart_module('detail_info', DetailInfoModule, core_data, basic_info_data, bazi_main_data)
                     self.analysis_results['detail_info'] = detail_info_data
                 else:
                     detail_info_data = {"summary": "详细信息模块未加载"}
@@ -365,8 +419,7 @@ class BaziAnalyzer:
                 
                 # 5. 创建神煞分析模块
                 if ShensAnalysisModule:
-                    self.shens_analysis_module = ShensAnalysisModule(core_data, basic_info_data, bazi_main_data, detail_info_data)
-                    shens_analysis_data = self.shens_analysis_module.get_result()
+                    self.shens_analysis_module, shens_analysis_data = self._run_chart_module('shens_analysis', ShensAnalysisModule, core_data, basic_info_data, bazi_main_data, detail_info_data)
                     self.analysis_results['shens_analysis'] = shens_analysis_data
                 else:
                     shens_analysis_data = {"summary": "神煞分析模块未加载"}
@@ -374,8 +427,7 @@ class BaziAnalyzer:
                 
                 # 6. 创建地支关系模块
                 if ZhiRelationsModule:
-                    self.zhi_relations_module = ZhiRelationsModule(core_data, basic_info_data, bazi_main_data, detail_info_data, shens_analysis_data)
-                    zhi_relations_data = self.zhi_relations_module.get_result()
+                    self.zhi_relations_module, zhi_relations_data = self._run_chart_module('zhi_relations', ZhiRelationsModule, core_data, basic_info_data, bazi_main_data, detail_info_data, shens_analysis_data)
                     self.analysis_results['zhi_relations'] = zhi_relations_data
                 else:
                     zhi_relations_data = {"summary": "地支关系模块未加载"}
@@ -383,8 +435,7 @@ class BaziAnalyzer:
                 
                 # 7. 创建大运分析模块
                 if DayunAnalysisModule:
-                    self.dayun_analysis_module = DayunAnalysisModule(core_data, basic_info_data, bazi_main_data, detail_info_data, shens_analysis_data, zhi_relations_data)
-                    dayun_analysis_data = self.dayun_analysis_module.get_result()
+                    self.dayun_analysis_module, dayun_analysis_data = self._run_module(DayunAnalysisModule, core_data, basic_info_data, bazi_main_data, detail_info_data, shens_analysis_data, zhi_relations_data)
                     self.analysis_results['dayun_analysis'] = dayun_analysis_data
                 else:
                     dayun_analysis_data = {"summary": "大运分析模块未加载"}
@@ -392,16 +443,14 @@ class BaziAnalyzer:
                 
                 # 8. 创建流年分析模块
                 if LiunianAnalysisModule:
-                    self.liunian_analysis_module = LiunianAnalysisModule(core_data, basic_info_data, bazi_main_data, detail_info_data, shens_analysis_data, zhi_relations_data, dayun_analysis_data)
-                    liunian_analysis_data = self.liunian_analysis_module.get_result()
+                    self.liunian_analysis_module, liunian_analysis_data = self._run_module(LiunianAnalysisModule, core_data, basic_info_data, bazi_main_data, detail_info_data, shens_analysis_data, zhi_relations_data, dayun_analysis_data)
                     self.analysis_results['liunian_analysis'] = liunian_analysis_data
                 else:
                     self.analysis_results['liunian_analysis'] = {"summary": "流年分析模块未加载"}
                 
                 # 9. 创建六亲分析模块
                 if LiuqinAnalysisModule:
-                    self.liuqin_analysis_module = LiuqinAnalysisModule(core_data, basic_info_data, bazi_main_data, detail_info_data, shens_analysis_data, zhi_relations_data, dayun_analysis_data, liunian_analysis_data)
-                    liuqin_analysis_data = self.liuqin_analysis_module.get_result()
+                    self.liuqin_analysis_module, liuqin_analysis_data = self._run_chart_module('liuqin_analysis', LiuqinAnalysisModule, core_data, basic_info_data, bazi_main_data, detail_info_data, shens_analysis_data, zhi_relations_data, dayun_analysis_data, liunian_analysis_data)
                     self.analysis_results['liuqin_analysis'] = liuqin_analysis_data
                 else:
                     liuqin_analysis_data = {"summary": "六亲分析模块未加载"}
@@ -409,14 +458,13 @@ class BaziAnalyzer:
                 
                 # 10. 创建性格分析模块
                 if PersonalityAnalysisModule:
-                    self.personality_analysis_module = PersonalityAnalysisModule(core_data, basic_info_data, bazi_main_data, detail_info_data, shens_analysis_data, zhi_relations_data, dayun_analysis_data, liunian_analysis_data, liuqin_analysis_data)
-                    personality_analysis_data = self.personality_analysis_module.get_result()
+                    self.personality_analysis_module, personality_analysis_data = self._run_chart_module('personality_analysis', PersonalityAnalysisModule, core_data, basic_info_data, bazi_main_data, detail_info_data, shens_analysis_data, zhi_relations_data, dayun_analysis_data, liunian_analysis_data, liuqin_analysis_data)
                     self.analysis_results['personality_analysis'] = personality_analysis_data
                 else:
                     self.analysis_results['personality_analysis'] = {"summary": "性格分析模块未加载"}
                     
         except Exception as e:
-            print(f"创建附加模块时出错: {e}")
+            record_fallback(logger, 'additional_modules', "创建附加模块时出错", e)
 
     def _fallback_bazi_main(self):
         """备用八字主体分析"""
@@ -581,13 +629,33 @@ class BaziAnalyzer:
 
     def get_result(self) -> Dict[str, Any]:
         """获取完整的分析结果"""
-        return {
+        result = {
             "input_info": {
                 "year": self.year, "month": self.month, "day": self.day, "hour": self.hour,
                 "gender": self.gender, "use_gregorian": self.use_gregorian
             },
             "analysis_results": self.analysis_results
         }
+        if self.profile:
+            result["profile"] = self.profiler.tree()
+        return result
+
+    def split_result(self) -> Dict[str, Any]:
+        """
+        把分析结果拆成命盘不变部分与时间相关部分：
+
+            chart_key: 四柱与性别的规范键
+            chart: CHART_INVARIANT_RESULTS 中各模块的结果，四柱与性别相同的请求完全一致
+            time: 输入信息与其余结果（日期、节气、起运岁数、大运流年等）
+        """
+        chart = {name: self.analysis_results[name] for name in CHART_INVARIANT_RESULTS
+                 if name in self.analysis_results}
+        time_part = {name: value for name, value in self.analysis_results.items() if name not in chart}
+        return {
+            "chart_key": self.chart_key,
+            "chart": chart,
+            "time": {"input_info": self.get_result()["input_info"], "analysis_results": time_part}
+        }
 
     def get_formatted_output(self) -> str:
         """获取格式化的文本输出（兼容原版格式）"""
@@ -0,0 +1,137 @@
+"""
+缓存模块 - 八字引擎进程内共享的有界 LRU 缓存
+
+不同用户的命盘大量重复（同一命局、同一步大运），分析结果按最小的规范化输入缓存后可以跨请求复用。
+每个缓存有固定容量，满了淘汰最久未用的条目；查询结果通过 record_cache_lookup 上报给监控（见 app/metrics.py），
+命中率等统计也可以直接读取：
+
+    from app.bazi_lib.bazi.bazi_cache import LRUCache, cache_stats
+    steps = LRUCache('dayun_step', 4096)
+    value = steps.get(key)
+    if value is None:
+        value = steps.put(key, compute())
+    cache_stats()       # {'dayun_step': {'size': 12, 'capacity': 4096, 'hits': 0, 'misses': 12, 'hit_rate': 0.0, ...}}
+
+缓存中的值由所有调用方共享，调用方需要修改时应先复制。命盘级缓存的键见 chart_key。
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable, Optional
+
+try:
+    from .bazi_log import record_cache_lookup
+except ImportError:
+    from bazi_log import record_cache_lookup
+
+# 缓存名 -> LRUCache，供 cache_stats 汇总
+_caches: Dict[str, "LRUCache"] = {}
+
+
+def cache_capacity(name: str, default: int) -> int:
+    """缓存容量，可用环境变量 BAZI_CACHE_<名称大写> 覆盖，如 BAZI_CACHE_DAYUN_STEP=20000"""
+    value = os.environ.get(f"BAZI_CACHE_{name.upper()}")
+    try:
+        return max(int(value), 0) if value else default
+    except ValueError:
+        return default
+
+
+class LRUCache:
+    """线程安全的有界 LRU 缓存，容量为 0 时不缓存"""
+
+    def __init__(self, name: str, capacity: int):
+        self.name = name
+        self.capacity = cache_capacity(name, capacity)
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        _caches[name] = self
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """查询缓存，命中时把条目移到最新，未命中返回 None"""
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+        record_cache_lookup(self.name, value is not None)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> Any:
+        """写入缓存并返回 value，超出容量时淘汰最久未用的条目"""
+        if self.capacity <= 0:
+            return value
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        """清空缓存与统计"""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self) -> Dict[str, Any]:
+        """容量、条目数、命中/未命中/淘汰次数与命中率"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """全部缓存的统计信息"""
+    return {name: cache.info() for name, cache in _caches.items()}
+
+
+def clear_caches():
+    """清空全部缓存与统计"""
+    for cache in _caches.values():
+        cache.clear()
+
+
+@contextmanager
+def caches_disabled():
+    """
+    暂时停用全部已创建的缓存：清空后容量置 0，退出时恢复原容量（缓存内容不恢复）
+
+    基准测试用它测不走缓存的冷耗时，见 bench_engine.py。
+    """
+    capacities = {name: cache.capacity for name, cache in _caches.items()}
+    clear_caches()
+    for cache in _caches.values():
+        cache.capacity = 0
+    try:
+        yield
+    finally:
+        for name, capacity in capacities.items():
+            _caches[name].capacity = capacity
+
+
+def chart_key(gans, zhis, gender: str) -> str:
+    """
+    命盘的规范键：四柱干支加性别，如 '甲子丙寅戊辰庚申男'
+
+    出生时间不同但四柱相同的命盘共用一个键，只取决于四柱与性别的分析结果按此键缓存。
+    """
+    return ''.join(gan + zhi for gan, zhi in zip(gans, zhis)) + ('女' if gender == '女' else '男')
@@ -18,16 +18,16 @@ except ImportError:
 try:
     from .bazi_core import get_gen, gan_zhi_he, get_gong, get_shens, jin_jiao, is_ku, zhi_ku, is_yang, not_yang, gan_ke
     from .datas import *
-    from .sizi import summarys
+    from .textstore import summarys
     from .common import *
-    from .yue import months
+    from .textstore import months
 except ImportError:
     try:
         from bazi_core import get_gen, gan_zhi_he, get_gong, get_shens, jin_jiao, is_ku, zhi_ku, is_yang, not_yang, gan_ke
         from datas import *
-        from sizi import summarys
+        from textstore import summarys
         from common import *
-        from yue import months
+        from textstore import months
     except ImportError as e:
         print(f"Warning: Could not import required modules: {e}")
         # 设置默认值以避免错误
@@ -2,10 +2,16 @@ import collections
 import datetime
 from lunar_python import Lunar, Solar
 from colorama import init
-from datas import *
-from sizi import summarys
-from common import *
-from yue import months
+try:
+    from .datas import *
+    from .textstore import summarys
+    from .common import *
+    from .textstore import months
+except ImportError:
+    from datas import *
+    from textstore import summarys
+    from common import *
+    from textstore import months
 
 def get_gen(gan, zhis):
     zhus = []
@@ -57,21 +63,13 @@ def get_gong(zhis):
     return result
 
 def get_shens(gans, zhis, gan_, zhi_):
-    all_shens = []
-    for item in year_shens:
-        if zhi_ in year_shens[item][zhis.year]:    
-            all_shens.append(item)
-    for item in month_shens:
-        if gan_ in month_shens[item][zhis.month] or zhi_ in month_shens[item][zhis.month]:     
-            all_shens.append(item)
-    for item in day_shens:
-        if zhi_ in day_shens[item][zhis.day]:     
-            all_shens.append(item)
-    for item in g_shens:
-        if zhi_ in g_shens[item][gans.day]:    # Changed me to gans.day
-            all_shens.append(item) 
-    if all_shens:  
-        return "  神:" + ' '.join(all_shens)
+    mask = (year_shens_index.get((zhis.year, zhi_), 0)
+            | month_shens_index.get((zhis.month, gan_), 0)
+            | month_shens_index.get((zhis.month, zhi_), 0)
+            | day_shens_index.get((zhis.day, zhi_), 0)
+            | g_shens_index.get((gans.day, zhi_), 0))    # Changed me to gans.day
+    if mask:  
+        return "  神:" + ' '.join(shens_mask_names(mask))
     else:
         return ""
 
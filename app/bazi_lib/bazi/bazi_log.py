@@ -0,0 +1,142 @@
+"""
+日志模块 - 八字引擎的分级日志与降级事件计数
+
+各模块用 get_logger(__name__) 取得 "bazi.<模块名>" 日志器。引擎本身只挂 NullHandler，
+宿主程序不配置日志时不产生任何输出；级别未开启的调用只做一次级别判断，不格式化消息。
+分析过程中吞掉异常、改用默认结果的地方调用 record_fallback，按事件计数；缓存查询调用
+record_cache_lookup。两者都会通知 add_event_listener 注册的监听函数，供监控系统导出：
+
+    from app.bazi_lib.bazi.bazi_log import configure_logging, fallback_counts
+    configure_logging('DEBUG')          # 以JSON行输出到stderr；也可设置环境变量 BAZI_LOG_LEVEL
+    fallback_counts()                   # {'liunian_analysis.calculate_liunian_details': 3, ...}
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+ROOT_LOGGER_NAME = 'bazi'
+
+_root = logging.getLogger(ROOT_LOGGER_NAME)
+
+# 本模块可能以 bazi_log 和 app.bazi_lib.bazi.bazi_log 两个名字各导入一次，
+# 计数器和监听函数挂在进程内唯一的根日志器上，保证两处计入同一份数据
+if not hasattr(_root, 'bazi_fallbacks'):
+    _root.addHandler(logging.NullHandler())
+    _root.bazi_fallbacks = ({}, threading.Lock())
+    _root.bazi_listeners = []
+_fallbacks, _fallbacks_lock = _root.bazi_fallbacks
+_listeners = _root.bazi_listeners
+
+
+def get_logger(name: str) -> logging.Logger:
+    """模块日志器：无论模块以哪种方式导入，都归到 bazi.<模块名> 下"""
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name.rsplit('.', 1)[-1]}")
+
+
+def record_fallback(logger: logging.Logger, event: str, message: str,
+                    error: Optional[BaseException] = None, level: int = logging.WARNING):
+    """
+    记录一次降级事件：计数加一，并按级别写日志
+
+    Args:
+        logger: 发生降级的模块日志器
+        event: 事件名（英文标识），计数键为 "<模块名>.<事件名>"
+        message: 日志消息
+        error: 触发降级的异常
+        level: 日志级别
+    """
+    key = f"{logger.name[len(ROOT_LOGGER_NAME) + 1:]}.{event}"
+    with _fallbacks_lock:
+        _fallbacks[key] = _fallbacks.get(key, 0) + 1
+    for listener in _listeners:
+        listener('fallback', key)
+
+    if logger.isEnabledFor(level):
+        if error is None:
+            logger.log(level, message, extra={'event': key})
+        else:
+            logger.log(level, "%s: %s", message, error, extra={'event': key},
+                       exc_info=logger.isEnabledFor(logging.DEBUG))
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    """记录一次缓存查询，只通知监听函数（没有监听时几乎无开销）"""
+    for listener in _listeners:
+        listener('cache_hit' if hit else 'cache_miss', cache)
+
+
+def add_event_listener(listener):
+    """
+    注册事件监听函数 listener(kind, name)：
+    kind 为 'fallback'（name 为 "<模块名>.<事件名>"）、'cache_hit' 或 'cache_miss'（name 为缓存名）
+    """
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_event_listener(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def fallback_counts() -> Dict[str, int]:
+    """各降级事件的累计次数"""
+    with _fallbacks_lock:
+        return dict(_fallbacks)
+
+
+def reset_fallback_counts():
+    with _fallbacks_lock:
+        _fallbacks.clear()
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出为一行JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        event = getattr(record, 'event', None)
+        if event:
+            entry['event'] = event
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def configure_logging(level='INFO', stream=None, json_format: bool = True) -> logging.Handler:
+    """
+    为八字引擎挂上输出，重复调用时替换上一次挂的输出
+
+    Args:
+        level: 日志级别（名称或数值）
+        stream: 输出流，默认stderr
+        json_format: 是否输出JSON行，否则为普通文本
+
+    Returns:
+        新挂上的 Handler
+    """
+    for handler in list(_root.handlers):
+        if getattr(handler, 'bazi_configured', False):
+            _root.removeHandler(handler)
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.bazi_configured = True
+    handler.setFormatter(JsonFormatter() if json_format else
+                         logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    _root.addHandler(handler)
+    _root.setLevel(level.upper() if isinstance(level, str) else level)
+    return handler
+
+
+if os.environ.get('BAZI_LOG_LEVEL') and not any(getattr(h, 'bazi_configured', False) for h in _root.handlers):
+    configure_logging(os.environ['BAZI_LOG_LEVEL'])
@@ -0,0 +1,418 @@
+"""
+命盘特征导出模块 - 把一批出生记录的命盘特征导出为扁平、定类型的 Parquet / Arrow 表，供数据分析使用
+
+SimpleBaziAnalyzer.get_result() 是逐个命盘的嵌套字典，这里不运行分析器，而是按块读入出生记录，
+用 to_pillars_batch、chart_features、geju.RULES 等整数表一次算出整块的特征（与各分析模块的结果一致），
+多进程并行计算、按输入顺序逐块写出；同时在途的块数有上限，千万条记录也不会整体留在内存中：
+
+    from app.bazi_lib.bazi.chart_export import export_charts
+    export_charts('births.csv', 'charts.parquet', workers=8)     # {'rows': ..., 'skipped': ..., 'seconds': ...}
+
+    python chart_export.py births.csv charts.parquet -j 8
+
+输入为带表头的 CSV，每行一条记录：year、month、day、hour 必填，customer_id（缺省为行号）、
+gender（男/女，缺省为男）、use_gregorian（缺省为1即公历）、is_leap（农历闰月，缺省为0）可选；
+无法解析或超出节气表范围的行跳过并计数。
+
+输出列见 EXPORT_COLUMNS：干支为 Gan/Zhi 中的序号，五行分数、十神计数、身强弱、神煞位掩码（第i位为
+shens_names[i]）、起运虚岁与大运方向，以及 geju.RULES 中每条规则一个布尔列。目标文件的后缀决定格式：
+.parquet 与 .arrow/.feather 需要 pyarrow（已列入 requirements.txt），.csv 不需要。
+"""
+
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+try:
+    from .datas import shens_names
+    from .jieqi import jieqi_table
+    from .geju import RULES
+    from .chart_store import ELEMENTS, SHENS, PILLAR_FEATURES, chart_features
+    from .modules.core_base import _pillar_day_tables, _pillars_from_seconds, lunar_to_solar_batch
+except ImportError:
+    from datas import shens_names
+    from jieqi import jieqi_table
+    from geju import RULES
+    from chart_store import ELEMENTS, SHENS, PILLAR_FEATURES, chart_features
+    from modules.core_base import _pillar_day_tables, _pillars_from_seconds, lunar_to_solar_batch
+
+# 五行、十神的列名
+ELEMENT_COLUMNS = dict(zip(ELEMENTS, ('jin', 'mu', 'shui', 'huo', 'tu')))
+SHEN_COLUMNS = dict(zip(SHENS, ('bijian', 'jiecai', 'shishen', 'shangguan', 'piancai',
+                                'zhengcai', 'qisha', 'zhengguan', 'pianyin', 'zhengyin')))
+
+# 输出列名 -> numpy 类型，顺序即表中列序
+EXPORT_COLUMNS: Dict[str, str] = {
+    'customer_id': 'int64',
+    'female': 'bool',
+    'birth': 'datetime64[s]',
+    **{name: 'int8' for name in PILLAR_FEATURES},
+    **{f'wuxing_{ELEMENT_COLUMNS[element]}': 'int16' for element in ELEMENTS},
+    'strong_score': 'int16',
+    'weak': 'bool',
+    **{f'shen_{SHEN_COLUMNS[shen]}': 'int8' for shen in SHENS},
+    'shensha': 'int64',
+    'start_age': 'int8',
+    'dayun_forward': 'bool',
+    **{f'geju_{name}': 'bool' for name in RULES.names},
+}
+
+INPUT_FIELDS = ('customer_id', 'year', 'month', 'day', 'hour', 'gender', 'use_gregorian', 'is_leap')
+FEMALE_VALUES = ('女', 'F', 'f')
+
+# 写入 Parquet / Arrow 文件元数据，用于还原位掩码与规则名
+EXPORT_METADATA = {
+    'shensha_bits': json.dumps(list(shens_names), ensure_ascii=False),
+    'geju_rules': json.dumps(RULES.names, ensure_ascii=False),
+}
+
+# 节（偶数位）在节气表中的秒数，首次推算起运时载入
+_jie_seconds = None
+
+
+def _jie_table() -> np.ndarray:
+    global _jie_seconds
+    if _jie_seconds is None:
+        _jie_seconds = np.frombuffer(jieqi_table(), dtype=np.int64)
+    return _jie_seconds
+
+
+def _time_zhi_index(seconds: np.ndarray) -> np.ndarray:
+    """与 jieqi._time_zhi_index 一致：23点记为11，其余按两小时一个时辰"""
+    hour = seconds % 86400 // 3600
+    return np.where(hour == 23, 11, (hour + 1) // 2)
+
+
+def _is_leap_year(years: np.ndarray) -> np.ndarray:
+    return (years % 4 == 0) & ((years % 100 != 0) | (years % 400 == 0))
+
+
+def start_ages(seconds: np.ndarray, forward: np.ndarray, female: np.ndarray) -> np.ndarray:
+    """
+    批量推算起运虚岁（与 jieqi.get_start_age 及 DayunAnalysisModule 一致）
+
+    Args:
+        seconds: 出生时刻（北京时间，自1970年起的秒数，取整点）
+        forward: 大运是否顺行
+        female: 是否女命，超出节气表范围时按 DayunAnalysisModule 取默认值（男8女7）
+
+    Returns:
+        int8 数组
+    """
+    table = _jie_table()
+    seconds = np.asarray(seconds, dtype=np.int64)
+    pos = np.searchsorted(table, seconds, side='right')
+    # 顺推取下一个节，逆推取上一个节（节在偶数位）
+    next_pos = pos + pos % 2
+    prev_pos = pos - 1 - (pos - 1) % 2
+    valid = (pos > 0) & (pos < len(table)) & np.where(forward, next_pos < len(table), prev_pos >= 0)
+    jie = table[np.clip(np.where(forward, next_pos, prev_pos), 0, len(table) - 1)]
+    start, end = np.where(forward, seconds, jie), np.where(forward, jie, seconds)
+
+    # 三天折一年，一天折四个月，一个时辰折十天
+    hour_diff = _time_zhi_index(end) - _time_zhi_index(start)
+    day_diff = end // 86400 - start // 86400
+    day_diff = np.where(hour_diff < 0, day_diff - 1, day_diff)
+    hour_diff = np.where(hour_diff < 0, hour_diff + 12, hour_diff)
+    month_diff = hour_diff * 10 // 30
+    years, months = np.divmod(day_diff * 4 + month_diff, 12)
+    days = hour_diff * 10 - month_diff * 30
+
+    # 出生日加年、月、日（同 jieqi._add_years_months_days），取结果所在公历年
+    birth = (seconds // 86400).astype('datetime64[D]')
+    birth_month = birth.astype('datetime64[M]')
+    birth_year = birth_month.astype('datetime64[Y]').astype(np.int64) + 1970
+    month = birth_month.astype(np.int64) % 12 + 1
+    mday = (birth - birth_month.astype('datetime64[D]')).astype(np.int64) + 1
+    mday = np.where((month == 2) & (mday > 28) & ~_is_leap_year(birth_year + years), 28, mday)
+    target = birth_month + (years * 12 + months).astype('timedelta64[M]')
+    target_start = target.astype('datetime64[D]')
+    length = ((target + 1).astype('datetime64[D]') - target_start).astype(np.int64)
+    result = target_start + (np.minimum(mday, length) - 1 + days).astype('timedelta64[D]')
+    ages = result.astype('datetime64[Y]').astype(np.int64) + 1970 - birth_year + 1
+
+    return np.where(valid, ages, np.where(female, 7, 8)).astype(np.int8)
+
+
+def chart_feature_columns(customer_ids, births, female) -> Dict[str, np.ndarray]:
+    """
+    由出生时刻批量算出导出表的各列
+
+    Args:
+        customer_ids: 客户编号
+        births: 公历出生时刻（北京时间，numpy datetime64，须在节气表范围内）
+        female: 是否女命
+
+    Returns:
+        EXPORT_COLUMNS 的各列（numpy 数组）
+    """
+    seconds = np.asarray(births, dtype='datetime64[s]').astype(np.int64).ravel()
+    female = np.asarray(female, dtype=bool).ravel()
+    pillars = _pillars_from_seconds(seconds)
+    features = chart_features(pillars)
+    # 男命阳年顺行，阴年逆行；女命相反
+    forward = (pillars[:, 0] % 2 == 0) != female
+    flags = RULES.match_batch(pillars)
+
+    columns = {
+        'customer_id': np.asarray(customer_ids, dtype=np.int64).ravel(),
+        'female': female,
+        'birth': seconds.astype('datetime64[s]'),
+        'strong_score': features['strong_score'],
+        'weak': features['weak'],
+        'shensha': features['shensha'],
+        'start_age': start_ages(seconds, forward, female),
+        'dayun_forward': forward,
+    }
+    for pos, name in enumerate(PILLAR_FEATURES):
+        columns[name] = features['pillars'][:, pos]
+    for pos, element in enumerate(ELEMENTS):
+        columns[f'wuxing_{ELEMENT_COLUMNS[element]}'] = features['element_scores'][:, pos]
+    for pos, shen in enumerate(SHENS):
+        columns[f'shen_{SHEN_COLUMNS[shen]}'] = features['shen_counts'][:, pos]
+    for pos, name in enumerate(RULES.names):
+        columns[f'geju_{name}'] = flags[:, pos]
+    return {name: np.ascontiguousarray(columns[name], dtype=dtype) for name, dtype in EXPORT_COLUMNS.items()}
+
+
+# ---------------------------------------------------------------------------
+# 输入解析（在工作进程中执行）
+# ---------------------------------------------------------------------------
+
+def _parse_fields(header: List[str], first_row: int, rows: List[List[str]]) -> np.ndarray:
+    """
+    CSV 行 -> (N, 8) 整数矩阵：客户编号、年、月、日、时、是否女命、是否公历、是否闰月
+
+    整块按列一次换算，有无法解析的行时退回逐行解析并丢弃这些行。
+    """
+    positions = {name: header.index(name) for name in INPUT_FIELDS if name in header}
+    try:
+        if any(len(row) != len(header) for row in rows):
+            raise ValueError("列数不符")
+        columns = list(zip(*rows)) or [()] * len(header)
+        # int() 逐个换算比 numpy 的字符串转整数快得多
+        fields = [np.fromiter(map(int, columns[positions['customer_id']]), np.int64, len(rows))
+                  if 'customer_id' in positions else np.arange(first_row, first_row + len(rows), dtype=np.int64)]
+        fields.extend(np.fromiter(map(int, columns[positions[name]]), np.int64, len(rows))
+                      for name in ('year', 'month', 'day', 'hour'))
+        fields.append(np.isin(np.array(columns[positions['gender']]), FEMALE_VALUES) if 'gender' in positions
+                      else np.zeros(len(rows), dtype=bool))
+        for name, default in (('use_gregorian', '1'), ('is_leap', '0')):
+            text = columns[positions[name]] if name in positions else ()
+            fields.append(np.fromiter((int(value or default) != 0 for value in text), bool, len(text))
+                          if text else np.full(len(rows), default == '1'))
+        return np.stack(fields, axis=1).astype(np.int64).reshape(-1, 8)
+    except ValueError:
+        pass
+
+    records = []
+    for row_number, row in enumerate(rows, first_row):
+        try:
+            values = [int(row[positions['customer_id']]) if 'customer_id' in positions else row_number]
+            values.extend(int(row[positions[name]]) for name in ('year', 'month', 'day', 'hour'))
+            values.append(row[positions['gender']] in FEMALE_VALUES if 'gender' in positions else False)
+            for name, default in (('use_gregorian', 1), ('is_leap', 0)):
+                text = row[positions[name]] if name in positions else ''
+                values.append(bool(int(text)) if text else bool(default))
+        except (IndexError, ValueError):
+            continue
+        records.append(values)
+    return np.array(records, dtype=np.int64).reshape(-1, 8)
+
+
+def _parse_rows(header: List[str], first_row: int, lines: List[str]) -> Tuple[Dict[str, np.ndarray], int]:
+    """
+    把一块 CSV 行解析为出生时刻等数组，返回 (数组字典, 跳过的行数)
+
+    行号从 first_row 起算，用作缺省的客户编号；无法解析、日期不存在、超出节气表范围的行跳过。
+    """
+    fields = _parse_fields(header, first_row, list(csv.reader(io.StringIO(''.join(lines)))))
+    skipped = len(lines) - len(fields)
+    ids, years, months, days, hours = fields[:, :5].T
+    female, gregorian, leap = fields[:, 5:].T.astype(bool)
+
+    dates = np.zeros(len(fields), dtype=np.int64)
+    valid = (hours >= 0) & (hours < 24) & (months >= 1) & (months <= 12) & (days >= 1)
+    # 公历：先得到当月1日，再核对日子不超过当月天数
+    solar = valid & gregorian
+    month_start = ((years[solar] - 1970) * 12 + months[solar] - 1).astype('datetime64[M]')
+    length = ((month_start + 1).astype('datetime64[D]') - month_start.astype('datetime64[D]')).astype(np.int64)
+    dates[solar] = month_start.astype('datetime64[D]').astype(np.int64) + days[solar] - 1
+    valid[solar] &= days[solar] <= length
+    # 农历：整批换算，有不存在的日期时逐行换算找出
+    lunar = np.nonzero(valid & ~gregorian)[0]
+    try:
+        dates[lunar] = lunar_to_solar_batch(years[lunar], months[lunar], days[lunar], leap[lunar]).astype(np.int64)
+    except ValueError:
+        for row in lunar:
+            try:
+                dates[row] = lunar_to_solar_batch(years[row], months[row], days[row], leap[row])[0].astype(np.int64)
+            except ValueError:
+                valid[row] = False
+
+    seconds = dates * 86400 + hours * 3600
+    tables = _pillar_day_tables()
+    valid &= (seconds >= tables['first_second']) & (seconds < tables['last_second'])
+    skipped += int((~valid).sum())
+    return {'customer_id': ids[valid], 'births': seconds[valid].astype('datetime64[s]'),
+            'female': female[valid]}, skipped
+
+
+def _export_chunk(header: List[str], first_row: int, lines: List[str]) -> Tuple[Dict[str, np.ndarray], int]:
+    """工作进程：解析一块输入并算出导出列"""
+    records, skipped = _parse_rows(header, first_row, lines)
+    return chart_feature_columns(records['customer_id'], records['births'], records['female']), skipped
+
+
+def _read_chunks(source: str, chunk_size: int) -> Iterator[Tuple[List[str], int, List[str]]]:
+    """逐块读入原始行，返回 (表头, 该块首行的行号, 行)"""
+    with open(source, encoding='utf-8-sig', newline='') as f:
+        header = [name.strip() for name in next(csv.reader([f.readline()]), [])]
+        missing = [name for name in ('year', 'month', 'day', 'hour') if name not in header]
+        if missing:
+            raise ValueError(f"输入文件缺少列: {', '.join(missing)}")
+        row_number = 0
+        while True:
+            lines = [line for _, line in zip(range(chunk_size), f) if line.strip()]
+            if not lines:
+                return
+            yield header, row_number, lines
+            row_number += len(lines)
+
+
+# ---------------------------------------------------------------------------
+# 输出
+# ---------------------------------------------------------------------------
+
+class _ArrowWriter:
+    """Parquet 或 Arrow IPC 文件，每块写一个 row group / record batch"""
+
+    def __init__(self, path: str, parquet: bool):
+        if pyarrow is None:
+            raise RuntimeError("导出Parquet/Arrow需要pyarrow")
+        fields = [pyarrow.field(name, pyarrow.from_numpy_dtype(np.dtype(dtype)))
+                  for name, dtype in EXPORT_COLUMNS.items()]
+        self.schema = pyarrow.schema(fields, metadata=EXPORT_METADATA)
+        if parquet:
+            self._writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+        else:
+            self._writer = pyarrow.ipc.new_file(path, self.schema)
+
+    def write(self, columns: Dict[str, np.ndarray]):
+        self._writer.write_table(pyarrow.Table.from_pydict(columns, schema=self.schema))
+
+    def close(self):
+        self._writer.close()
+
+
+class _CsvWriter:
+    """CSV 文件（不需要 pyarrow），布尔列写作0/1"""
+
+    def __init__(self, path: str):
+        self._file = open(path, 'w', encoding='utf-8', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(EXPORT_COLUMNS)
+
+    def write(self, columns: Dict[str, np.ndarray]):
+        values = [column.astype('datetime64[s]').astype(str) if column.dtype.kind == 'M'
+                  else column.astype(np.int64) for column in columns.values()]
+        self._writer.writerows(zip(*(value.tolist() for value in values)))
+
+    def close(self):
+        self._file.close()
+
+
+def _open_writer(path: str, output_format: Optional[str]):
+    output_format = output_format or os.path.splitext(path)[1].lstrip('.').lower()
+    if output_format == 'parquet':
+        return _ArrowWriter(path, parquet=True)
+    if output_format in ('arrow', 'feather'):
+        return _ArrowWriter(path, parquet=False)
+    if output_format == 'csv':
+        return _CsvWriter(path)
+    raise ValueError(f"不支持的导出格式: {output_format}")
+
+
+def export_charts(source: str, target: str, chunk_size: int = 100_000, workers: Optional[int] = None,
+                  output_format: Optional[str] = None) -> Dict[str, Any]:
+    """
+    把出生记录文件导出为命盘特征表
+
+    Args:
+        source: 输入 CSV（格式见模块说明）
+        target: 输出文件
+        chunk_size: 每块的行数，也是 Parquet 每个 row group 的行数
+        workers: 进程数，默认CPU数；为0或1时在当前进程中计算
+        output_format: parquet、arrow 或 csv，默认按 target 的后缀
+
+    Returns:
+        {'rows': 写出行数, 'skipped': 跳过行数, 'seconds': 耗时}
+    """
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    started = time.perf_counter()
+    rows = skipped = 0
+    writer = _open_writer(target, output_format)
+
+    def write(result):
+        nonlocal rows, skipped
+        columns, bad = result
+        if len(columns['customer_id']):
+            writer.write(columns)
+        rows += len(columns['customer_id'])
+        skipped += bad
+
+    try:
+        if workers <= 1:
+            for chunk in _read_chunks(source, chunk_size):
+                write(_export_chunk(*chunk))
+        else:
+            with multiprocessing.Pool(workers) as pool:
+                # 在途块数以进程数的两倍为限，按提交顺序写出
+                pending = deque()
+                for chunk in _read_chunks(source, chunk_size):
+                    pending.append(pool.apply_async(_export_chunk, chunk))
+                    if len(pending) >= 2 * workers:
+                        write(pending.popleft().get())
+                while pending:
+                    write(pending.popleft().get())
+    finally:
+        writer.close()
+
+    return {'rows': rows, 'skipped': skipped, 'seconds': time.perf_counter() - started}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出命盘特征表")
+    parser.add_argument('source', help="出生记录 CSV")
+    parser.add_argument('target', help="输出文件（.parquet、.arrow 或 .csv）")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(), help="进程数")
+    parser.add_argument('--chunk-size', type=int, default=100_000, help="每块行数")
+    parser.add_argument('--format', dest='output_format', choices=('parquet', 'arrow', 'csv'),
+                        help="输出格式，默认按后缀")
+    options = parser.parse_args()
+
+    summary = export_charts(options.source, options.target, options.chunk_size, options.workers,
+                            options.output_format)
+    print(f"已导出 {options.target}：{summary['rows']}行，跳过{summary['skipped']}行，"
+          f"耗时{summary['seconds']:.1f}秒")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+"""
+相似命盘模块 - 命盘特征向量与参考命盘库的最近邻检索（"和你命盘相似的人"）
+
+特征向量由 BaziMainModule 的结果组成：五行分数、十干分数（均按总分归一）、十神计数、
+四支两两之间的冲合刑害破与三合半局数、强弱。chart_vector 从单个分析结果取值，
+chart_vectors 直接由四柱批量计算，两者一致。
+
+参考库 SimilarityIndex 是 numpy 矩阵上的暴力检索（按欧氏距离取前k个），可逐条追加，
+给出路径时向量与编号存放在内存映射文件中，追加即落盘、打开无需载入：
+
+    from app.bazi_lib.bazi.chart_similarity import SimilarityIndex, chart_vector
+    index = SimilarityIndex('/data/reference_charts.knn')
+    index.add(chart_id, chart_vector(result['analysis_results']['bazi_main']))
+    index.search(chart_vector(my_bazi_main), k=10)     # [(chart_id, 距离), ...]
+"""
+
+import mmap
+import os
+import threading
+from itertools import combinations
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from .ganzhi import Gan, Zhi, zhi_atts
+    from .chart_store import ELEMENTS, chart_features
+except ImportError:
+    from ganzhi import Gan, Zhi, zhi_atts
+    from chart_store import ELEMENTS, chart_features
+
+# 地支关系：四支两两之间（6对）的冲、六合、刑、害、破
+RELATIONS = ('冲', '六', '刑', '害', '破')
+RELATION_TABLE = np.zeros((len(RELATIONS), 12, 12), dtype=bool)
+for _kind, _name in enumerate(RELATIONS):
+    for _zhi in Zhi:
+        for _other in zhi_atts[_zhi][_name]:
+            RELATION_TABLE[_kind, Zhi.index(_zhi), Zhi.index(_other)] = True
+RELATION_TABLE |= RELATION_TABLE.transpose(0, 2, 1)
+PAIRS = list(combinations(range(4), 2))
+
+# 三合局：四支中占其二即记一局（与 BaziMainModule 的拱信息相同），(12, 4) 的成员矩阵
+SANHE_GROUPS = np.array([[zhi in group for group in ('申子辰', '亥卯未', '寅午戌', '巳酉丑')] for zhi in Zhi],
+                        dtype=np.int64)
+
+# 向量各段：五行分数占比5、十干分数占比10、十神计数10、地支关系5、三合半局1、强弱2（身弱、帮身分数占比）
+VECTOR_DIM = 5 + 10 + 10 + len(RELATIONS) + 1 + 2
+
+INDEX_MAGIC = b'BZKNN001'
+HEADER_SIZE = 32  # 魔数、维数、条数、容量各8字节
+
+
+def _relation_features(zhis: np.ndarray) -> np.ndarray:
+    """(N, 4) 地支序号 -> (N, 6) 的地支关系对数（占6对的比例）与三合半局数"""
+    zhis = np.asarray(zhis, dtype=np.int64).reshape(-1, 4)
+    counts = np.zeros((len(zhis), len(RELATIONS) + 1), dtype=np.float32)
+    for first, second in PAIRS:
+        counts[:, :len(RELATIONS)] += RELATION_TABLE[:, zhis[:, first], zhis[:, second]].T
+    counts[:, :len(RELATIONS)] /= len(PAIRS)
+    present = np.zeros((len(zhis), 12), dtype=np.int64)
+    present[np.arange(len(zhis))[:, None], zhis] = 1
+    counts[:, -1] = ((present @ SANHE_GROUPS) >= 2).sum(axis=1) / SANHE_GROUPS.shape[1]
+    return counts
+
+
+def _assemble(element_scores, gan_scores, shen_counts, zhis, weak, strong_score) -> np.ndarray:
+    element_scores = np.asarray(element_scores, dtype=np.float32).reshape(-1, 5)
+    total = np.maximum(element_scores.sum(axis=1, keepdims=True), 1)
+    return np.concatenate([
+        element_scores / total,
+        np.asarray(gan_scores, dtype=np.float32).reshape(-1, 10) / total,
+        np.asarray(shen_counts, dtype=np.float32).reshape(-1, 10) / 7,
+        _relation_features(zhis),
+        np.asarray(weak, dtype=np.float32).reshape(-1, 1),
+        np.asarray(strong_score, dtype=np.float32).reshape(-1, 1) / total,
+    ], axis=1)
+
+
+def chart_vector(bazi_main_result: Dict[str, Any]) -> np.ndarray:
+    """BaziMainModule.get_result() 的结果 -> 特征向量（float32，长度 VECTOR_DIM）"""
+    wuxing = bazi_main_result['wuxing_analysis']
+    strength = bazi_main_result['strength_analysis']
+    zhis = [Zhi.index(zhi) for zhi in bazi_main_result['basic_bazi']['zhis']]
+    return _assemble([wuxing['scores'][element] for element in ELEMENTS],
+                     [wuxing['gan_scores'].get(gan, 0) for gan in Gan],
+                     bazi_main_result['ten_gods']['histogram']['total'],
+                     zhis, strength['is_weak'], strength['strong_score'])[0]
+
+
+def chart_vectors(pillars) -> np.ndarray:
+    """(N, 8) 干支序号 -> (N, VECTOR_DIM) 特征向量"""
+    features = chart_features(pillars)
+    return _assemble(features['element_scores'], features['gan_scores'], features['shen_counts'],
+                     features['pillars'][:, 1::2], features['weak'], features['strong_score'])
+
+
+class SimilarityIndex:
+    """参考命盘的最近邻索引：float32 向量矩阵上的暴力检索，支持追加与内存映射持久化"""
+
+    def __init__(self, path: Optional[str] = None, dim: int = VECTOR_DIM, capacity: int = 1024):
+        """
+        Args:
+            path: 索引文件（文件头 + 向量矩阵 + 编号），不存在时新建；为 None 时只在内存中
+            dim: 向量维数
+            capacity: 初始容量（条），不足时翻倍
+        """
+        self.path = path
+        self.dim = dim
+        self._count = 0
+        self._lock = threading.Lock()
+        self._mapped = None
+        if path and os.path.exists(path):
+            self._open()
+        else:
+            self._allocate(capacity)
+
+    def __len__(self) -> int:
+        return self._count
+
+    # ---------- 存储 ----------
+
+    def _layout(self, capacity: int) -> int:
+        return HEADER_SIZE + capacity * self.dim * 4 + capacity * 8
+
+    def _map(self, capacity: int):
+        """把向量矩阵、编号映射到文件（或内存）中的对应位置"""
+        self.capacity = capacity
+        if self.path:
+            with open(self.path, 'r+b') as f:
+                self._mapped = mmap.mmap(f.fileno(), self._layout(capacity))
+            buffer = self._mapped
+        else:
+            buffer = bytearray(self._layout(capacity))
+        self._header = np.frombuffer(buffer, dtype='<i8', count=4)
+        self._vectors = np.frombuffer(buffer, dtype='<f4', count=capacity * self.dim,
+                                      offset=HEADER_SIZE).reshape(capacity, self.dim)
+        self._ids = np.frombuffer(buffer, dtype='<i8', count=capacity, offset=HEADER_SIZE + capacity * self.dim * 4)
+        self._norms = np.einsum('ij,ij->i', self._vectors[:self._count], self._vectors[:self._count])
+
+    def _allocate(self, capacity: int):
+        """
+        按新容量建文件（或内存），已有数据原样搬过去
+
+        文件先在临时文件中完整写好（文件头、向量、编号）再替换原文件，中途中断时原文件不受影响
+        """
+        count = self._count
+        vectors = self._vectors[:count].copy() if count else None
+        ids = self._ids[:count].copy() if count else None
+        header = np.array([int.from_bytes(INDEX_MAGIC, 'little'), self.dim, count, capacity], dtype='<i8')
+        if self.path:
+            temp = self.path + '.tmp'
+            with open(temp, 'wb') as f:
+                f.truncate(self._layout(capacity))
+                f.write(header.tobytes())
+                if count:
+                    f.write(vectors.tobytes())
+                    f.seek(HEADER_SIZE + capacity * self.dim * 4)
+                    f.write(ids.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            self._close()
+            os.replace(temp, self.path)
+            self._map(capacity)
+        else:
+            self._map(capacity)
+            self._header[:] = header
+            if count:
+                self._vectors[:count], self._ids[:count] = vectors, ids
+                self._norms = np.einsum('ij,ij->i', vectors, vectors)
+
+    def _open(self):
+        """打开已有的索引文件"""
+        with open(self.path, 'rb') as f:
+            header = np.frombuffer(f.read(HEADER_SIZE), dtype='<i8')
+        if len(header) != 4 or int(header[0]) != int.from_bytes(INDEX_MAGIC, 'little'):
+            raise ValueError(f"{self.path} 不是命盘相似索引文件")
+        self.dim, self._count = int(header[1]), int(header[2])
+        if os.path.getsize(self.path) < self._layout(int(header[3])):
+            raise ValueError(f"索引文件 {self.path} 不完整")
+        self._map(int(header[3]))
+
+    def _close(self):
+        if self._mapped is not None:
+            # 先释放 numpy 视图，mmap 才能关闭
+            self._header = self._vectors = self._ids = None
+            self._mapped.close()
+            self._mapped = None
+
+    def close(self):
+        """写回并关闭内存映射文件"""
+        with self._lock:
+            if self._mapped is not None:
+                self._mapped.flush()
+            self._close()
+
+    # ---------- 写入与检索 ----------
+
+    def add(self, chart_ids, vectors) -> int:
+        """追加一条或多条（编号, 向量），返回总条数"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        chart_ids = np.asarray(chart_ids, dtype=np.int64).reshape(-1)
+        if len(chart_ids) != len(vectors):
+            raise ValueError("编号与向量数量不一致")
+        with self._lock:
+            needed = self._count + len(vectors)
+            if needed > self.capacity:
+                self._allocate(max(needed, self.capacity * 2))
+            self._vectors[self._count:needed] = vectors
+            self._ids[self._count:needed] = chart_ids
+            self._norms = np.concatenate([self._norms, np.einsum('ij,ij->i', vectors, vectors)])
+            # 数据写完再更新条数，中断时最多丢掉本次追加
+            self._count = needed
+            self._header[2] = needed
+            return needed
+
+    def search(self, vector: Sequence[float], k: int = 10,
+               exclude: Optional[Sequence[int]] = None) -> List[Tuple[int, float]]:
+        """
+        距离最近的k条
+
+        Args:
+            vector: 查询向量
+            k: 返回条数
+            exclude: 不返回的编号（如查询者本人）
+
+        Returns:
+            (编号, 欧氏距离) 列表，由近到远
+        """
+        query = np.asarray(vector, dtype=np.float32).reshape(self.dim)
+        # 追加时可能扩容换掉底层文件，检索全程持锁
+        with self._lock:
+            return self._search(query, k, exclude)
+
+    def _search(self, query: np.ndarray, k: int, exclude: Optional[Sequence[int]]) -> List[Tuple[int, float]]:
+        count = self._count
+        if not count:
+            return []
+        # |x - q|² = |x|² - 2x·q + |q|²，末项对排序无影响；返回的距离对选中的几条直接计算，避免相减的舍入误差
+        distances = self._norms[:count] - 2 * (self._vectors[:count] @ query)
+        excluded = set() if exclude is None else {int(chart_id) for chart_id in exclude}
+        # 多取被排除的条数，过滤后仍够k条
+        take = min(k + len(excluded), count)
+        nearest = np.argpartition(distances, take - 1)[:take] if take < count else np.arange(count)
+        nearest = nearest[np.argsort(distances[nearest], kind='stable')]
+        results = []
+        for row in nearest:
+            chart_id = int(self._ids[row])
+            if chart_id not in excluded:
+                results.append((chart_id, float(np.linalg.norm(self._vectors[row] - query))))
+                if len(results) == k:
+                    break
+        return results
+
+    def ids(self) -> np.ndarray:
+        """全部编号（按追加顺序）"""
+        with self._lock:
+            return self._ids[:self._count].copy()
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    try:
+        from .modules.core_base import to_pillars_batch
+    except ImportError:
+        from modules.core_base import to_pillars_batch
+
+    rng = np.random.default_rng(0)
+    count = 20_000
+    births = (np.datetime64('1950-01-01T00:00', 's')
+              + rng.integers(0, 70 * 365 * 86400, count).astype('timedelta64[s]'))
+    vectors = chart_vectors(to_pillars_batch(births))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'reference.knn')
+        index = SimilarityIndex(path)
+        for start in range(0, count, 5000):
+            index.add(np.arange(start, start + 5000), vectors[start:start + 5000])
+        index.close()
+
+        index = SimilarityIndex(path)
+        started = time.perf_counter()
+        for row in range(100):
+            result = index.search(vectors[row], k=10, exclude=[row])
+        elapsed = (time.perf_counter() - started) * 10
+        print(f"{len(index)}条参考命盘，每次检索前10条耗时{elapsed:.3f}ms")
+        print(births[99], '最相似：', [(str(births[chart_id]), round(distance, 3)) for chart_id, distance in result[:3]])
+        index.close()
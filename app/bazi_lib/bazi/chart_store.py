@@ -0,0 +1,356 @@
+"""
+命盘库模块 - 客户命盘特征的列式存储与位图索引，用于人群筛选
+
+每个客户一行：四柱与由四柱推出的特征（强弱、五行分数、十神计数、神煞位掩码）按列存放，
+特征由整数表一次向量运算得出，与 BaziMainModule、ShensAnalysisModule 的结果一致，不必逐个运行分析器。
+可筛选的特征按取值各建一个位图（每行一位，uint64 字存放），多个条件即位图按位与，百万行的筛选在毫秒级：
+
+    from app.bazi_lib.bazi.chart_store import ChartStore
+    store = ChartStore('/data/charts')                  # 目录不存在时新建，省略路径则只在内存中
+    store.add_births(customer_ids, birth_datetimes)     # 追加客户，写入即落盘
+    store.select(day_gan='甲', weak=True, month_zhi='申', fan_taisui=2026)   # 客户编号数组
+
+同一条件给多个取值时取并集，如 month_zhi='申酉' 或 shensha=['天乙', '文昌']；可筛选的特征见 FEATURES。
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+try:
+    from .ganzhi import Gan, Zhi, gan5, zhi5, zhi_atts, ten_deities_ids, ten_deities_names, zhi_main_shens
+    from .ganzhi import ten_deities_batch, ten_deities_inverse
+    from .datas import shens_names
+    from .zeri import YEAR_SHENS, MONTH_SHENS_GAN, MONTH_SHENS_ZHI, DAY_SHENS, G_SHENS
+    from .modules.core_base import to_pillars_batch
+except ImportError:
+    from ganzhi import Gan, Zhi, gan5, zhi5, zhi_atts, ten_deities_ids, ten_deities_names, zhi_main_shens
+    from ganzhi import ten_deities_batch, ten_deities_inverse
+    from datas import shens_names
+    from zeri import YEAR_SHENS, MONTH_SHENS_GAN, MONTH_SHENS_ZHI, DAY_SHENS, G_SHENS
+    from modules.core_base import to_pillars_batch
+
+# 五行分数的列序（与 BaziMainModule 的 scores 字典同序）
+ELEMENTS = ('金', '木', '水', '火', '土')
+SHENS = ten_deities_names[:10]
+PILLAR_FEATURES = ('year_gan', 'year_zhi', 'month_gan', 'month_zhi', 'day_gan', 'day_zhi', 'time_gan', 'time_zhi')
+
+# 列名 -> (dtype, 每行的项数)
+COLUMNS = {
+    'customer_id': ('<i8', 1),
+    'pillars': ('i1', 8),
+    'gan_scores': ('<i2', 10),
+    'element_scores': ('<i2', 5),
+    'shen_counts': ('i1', 10),
+    'strong_score': ('<i2', 1),
+    'weak': ('?', 1),
+    'shensha': ('<i8', 1),
+}
+
+# 可筛选的特征 -> 取值表；犯太岁条件（fan_taisui）由年支位图拼出
+FEATURES = {
+    **{name: tuple(Gan if name.endswith('gan') else Zhi) for name in PILLAR_FEATURES},
+    'weak': (False, True),
+    'dominant_element': ELEMENTS,
+    'missing_element': ELEMENTS,
+    'shen': SHENS,
+    'shensha': tuple(shens_names),
+}
+
+# 犯太岁的种类：值（同支）、冲、刑、害、破
+TAISUI_KINDS = ('值', '冲', '刑', '害', '破')
+
+GAN_ELEMENT = np.array([ELEMENTS.index(gan5[gan]) for gan in Gan])
+ZHI5_WEIGHTS = np.array([[zhi5[zhi].get(gan, 0) for gan in Gan] for zhi in Zhi], dtype=np.int16)
+ZHI_MAIN_SHEN = np.frombuffer(b''.join(zhi_main_shens), dtype=np.int8).reshape(10, 12).astype(np.int64)
+HELPER_GANS = np.frombuffer(b''.join(ten_deities_inverse), dtype=np.int8).reshape(10, -1)[
+    :, [ten_deities_ids[name] for name in ('比', '劫', '枭', '印')]].astype(np.int64)
+STRONG_STATUS = [ten_deities_ids[name] for name in ('长', '帝', '建')]
+
+META_FILE = 'meta.json'
+STORE_VERSION = 1
+
+
+def chart_features(pillars: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    由四柱批量推出各特征列
+
+    Args:
+        pillars: (N, 8) 干支序号，与 to_pillars_batch 的输出一致
+
+    Returns:
+        COLUMNS 中除 customer_id 外的各列
+    """
+    pillars = np.asarray(pillars, dtype=np.int64).reshape(-1, 8)
+    count = len(pillars)
+    gans, zhis = pillars[:, 0::2], pillars[:, 1::2]
+    me = gans[:, 2]
+
+    # 五行分数：天干各5分，地支（月支计两次）按藏干分数
+    gan_scores = np.zeros((count, 10), dtype=np.int16)
+    for column in range(4):
+        gan_scores[np.arange(count), gans[:, column]] += 5
+        gan_scores += ZHI5_WEIGHTS[zhis[:, column]]
+    gan_scores += ZHI5_WEIGHTS[zhis[:, 1]]
+    element_scores = np.zeros((count, 5), dtype=np.int16)
+    for gan in range(10):
+        element_scores[:, GAN_ELEMENT[gan]] += gan_scores[:, gan]
+
+    # 十神计数：年月时干与四支主气
+    shen_ids = np.concatenate([ten_deities_batch(me[:, None], gans[:, [0, 1, 3]]),
+                               ZHI_MAIN_SHEN[me[:, None], zhis]], axis=1)
+    shen_counts = (shen_ids[:, :, None] == np.arange(10)).sum(axis=1).astype(np.int8)
+
+    # 强弱：日主在某支得长生、帝旺、建禄，或比肩多于两个为身强；帮身分数为比劫枭印之干的分数和
+    status = ten_deities_batch(me[:, None], zhis + 10)
+    weak = ~np.isin(status, STRONG_STATUS).any(axis=1) & (shen_counts[:, ten_deities_ids['比']] <= 2)
+    strong_score = np.take_along_axis(gan_scores, HELPER_GANS[me], axis=1).sum(axis=1).astype(np.int16)
+
+    year_zhi, month_zhi, day_zhi = zhis[:, 0], zhis[:, 1], zhis[:, 2]
+    shensha = (np.bitwise_or.reduce(YEAR_SHENS[year_zhi[:, None], zhis[:, 1:]], axis=1)
+               | np.bitwise_or.reduce(MONTH_SHENS_GAN[month_zhi[:, None], gans], axis=1)
+               | np.bitwise_or.reduce(MONTH_SHENS_ZHI[month_zhi[:, None], zhis], axis=1)
+               | np.bitwise_or.reduce(DAY_SHENS[day_zhi[:, None], zhis[:, [0, 1, 3]]], axis=1)
+               | np.bitwise_or.reduce(G_SHENS[me[:, None], zhis], axis=1))
+
+    return {
+        'pillars': pillars.astype(np.int8),
+        'gan_scores': gan_scores,
+        'element_scores': element_scores,
+        'shen_counts': shen_counts,
+        'strong_score': strong_score,
+        'weak': weak,
+        'shensha': shensha.astype(np.int64),
+    }
+
+
+def _feature_matrix(name: str, columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """某特征在各行的取值，(行数, 取值数) 的布尔矩阵"""
+    values = np.arange(len(FEATURES[name]))
+    if name in PILLAR_FEATURES:
+        return columns['pillars'][:, PILLAR_FEATURES.index(name), None] == values
+    if name == 'weak':
+        return columns['weak'][:, None] == values.astype(bool)
+    if name == 'dominant_element':
+        return columns['element_scores'].argmax(axis=1)[:, None] == values
+    if name == 'missing_element':
+        return columns['element_scores'] == 0
+    if name == 'shen':
+        return columns['shen_counts'] > 0
+    return (columns['shensha'][:, None] >> values) & 1 == 1
+
+
+def _pack(matrix: np.ndarray) -> np.ndarray:
+    """(行数, k) 布尔矩阵 -> (k, 字数) 的 uint64 位图，行数须为64的倍数"""
+    return np.packbits(matrix, axis=0, bitorder='little').T.copy().view('<u8')
+
+
+class ChartStore:
+    """客户命盘的列式存储，按特征取值建位图索引，只追加不修改"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: 存储目录，每列一个二进制文件加 meta.json；为 None 时只在内存中
+        """
+        self.path = path
+        self.rows = 0
+        self._lock = threading.Lock()
+        self._columns = {name: np.zeros((0, width), dtype=dtype) for name, (dtype, width) in COLUMNS.items()}
+        # 特征 -> (取值数, 字数) 的位图，字数按容量预留
+        self._bitmaps = {name: np.zeros((len(values), 0), dtype='<u8') for name, values in FEATURES.items()}
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self._load()
+
+    def __len__(self) -> int:
+        return self.rows
+
+    # ---------- 写入 ----------
+
+    def add(self, customer_ids: Sequence[int], pillars) -> int:
+        """追加客户（四柱为 (N, 8) 干支序号），返回追加后的总行数"""
+        customer_ids = np.asarray(customer_ids, dtype=np.int64).ravel()
+        columns = chart_features(pillars)
+        if len(customer_ids) != len(columns['pillars']):
+            raise ValueError("客户编号与命盘数量不一致")
+        columns['customer_id'] = customer_ids
+        with self._lock:
+            start = self.rows
+            self._append(columns)
+            if self.path:
+                self._write(columns)
+            self._index(start)
+            return self.rows
+
+    def add_births(self, customer_ids: Sequence[int], datetimes) -> int:
+        """按公历出生时刻（北京时间）追加客户"""
+        return self.add(customer_ids, to_pillars_batch(np.asarray(datetimes, dtype='datetime64[s]')))
+
+    def _append(self, columns: Dict[str, np.ndarray]):
+        """把新行接到各列末尾，容量不足时翻倍"""
+        count = len(columns['customer_id'])
+        needed = self.rows + count
+        for name, (dtype, width) in COLUMNS.items():
+            current = self._columns[name]
+            if len(current) < needed:
+                grown = np.zeros((max(needed, 2 * len(current), 1024), width), dtype=dtype)
+                grown[:self.rows] = current[:self.rows]
+                self._columns[name] = current = grown
+            current[self.rows:needed] = np.asarray(columns[name]).reshape(count, width)
+        self.rows = needed
+
+    def _index(self, start: int):
+        """为 start 起的新行更新位图：从 start 所在的字开始重新打包"""
+        first_word = start // 64
+        word_count = (self.rows + 63) // 64
+        span = word_count * 64 - first_word * 64
+        columns = {name: self.column(name)[first_word * 64:] for name in COLUMNS}
+        for name in FEATURES:
+            matrix = np.zeros((span, len(FEATURES[name])), dtype=bool)
+            matrix[:self.rows - first_word * 64] = _feature_matrix(name, columns)
+            bitmaps = self._bitmaps[name]
+            if bitmaps.shape[1] < word_count:
+                grown = np.zeros((bitmaps.shape[0], max(word_count, 2 * bitmaps.shape[1], 16)), dtype='<u8')
+                grown[:, :bitmaps.shape[1]] = bitmaps
+                self._bitmaps[name] = bitmaps = grown
+            bitmaps[:, first_word:word_count] = _pack(matrix)
+
+    # ---------- 持久化 ----------
+
+    def _write(self, columns: Dict[str, np.ndarray]):
+        """追加写各列文件，最后更新 meta.json 的行数（先写数据后改行数，中断时多出的半截数据在载入时忽略）"""
+        for name, (dtype, width) in COLUMNS.items():
+            with open(os.path.join(self.path, name + '.bin'), 'ab') as f:
+                f.write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+        meta = {'version': STORE_VERSION, 'rows': self.rows,
+                'columns': {name: list(spec) for name, spec in COLUMNS.items()}}
+        temp = os.path.join(self.path, META_FILE + '.tmp')
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(temp, os.path.join(self.path, META_FILE))
+
+    def _load(self):
+        """载入已有的列文件并重建位图"""
+        meta_path = os.path.join(self.path, META_FILE)
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != STORE_VERSION or meta.get('columns') != {n: list(s) for n, s in COLUMNS.items()}:
+            raise ValueError(f"命盘库 {self.path} 的格式与当前版本不符")
+        rows = meta['rows']
+        columns = {}
+        for name, (dtype, width) in COLUMNS.items():
+            data = np.fromfile(os.path.join(self.path, name + '.bin'), dtype=dtype, count=rows * width)
+            if len(data) != rows * width:
+                raise ValueError(f"命盘库 {self.path} 的 {name} 列不完整")
+            columns[name] = data.reshape(rows, width)
+        # 截掉上次中断时多写的数据，之后的追加才能与行数对齐
+        for name, (dtype, width) in COLUMNS.items():
+            file_path = os.path.join(self.path, name + '.bin')
+            if os.path.getsize(file_path) != rows * width * np.dtype(dtype).itemsize:
+                os.truncate(file_path, rows * width * np.dtype(dtype).itemsize)
+        if rows:
+            self._append(columns)
+            self._index(0)
+
+    # ---------- 查询 ----------
+
+    def column(self, name: str) -> np.ndarray:
+        """某列的只读视图，单项列为一维"""
+        data = self._columns[name][:self.rows]
+        data = data[:, 0] if COLUMNS[name][1] == 1 else data
+        view = data.view()
+        view.flags.writeable = False
+        return view
+
+    def bitmap(self, feature: str, values: Any) -> np.ndarray:
+        """某特征取任一给定值的行位图（uint64 字数组）"""
+        if feature not in FEATURES:
+            raise KeyError(f"未知特征：{feature}")
+        choices = FEATURES[feature]
+        if isinstance(values, str) and not (feature == 'shensha' and values in choices):
+            values = list(values)
+        elif not isinstance(values, (list, tuple, set, frozenset)):
+            values = [values]
+        result = np.zeros((self.rows + 63) // 64, dtype='<u8')
+        for value in values:
+            if value not in choices:
+                raise ValueError(f"特征 {feature} 没有取值 {value!r}")
+            result |= self._bitmaps[feature][choices.index(value), :len(result)]
+        return result
+
+    def taisui_bitmap(self, year: int, kinds: Iterable[str] = TAISUI_KINDS) -> np.ndarray:
+        """某公历年犯太岁（年支与流年支同支、相冲、相刑、相害、相破）的行位图"""
+        taisui = Zhi[(year - 4) % 12]
+        atts = zhi_atts[taisui]
+        zhis = set()
+        for kind in kinds:
+            if kind == '值':
+                zhis.add(taisui)
+            elif kind == '刑':
+                zhis.update(atts['刑'] + atts['被刑'])
+            else:
+                zhis.update(atts[kind])
+        return self.bitmap('year_zhi', [zhi for zhi in Zhi if zhi in zhis])
+
+    def match(self, **conditions) -> np.ndarray:
+        """各条件位图按位与，fan_taisui=年份 为犯太岁条件"""
+        result = np.full((self.rows + 63) // 64, np.uint64(0xFFFFFFFFFFFFFFFF), dtype='<u8')
+        if self.rows % 64 and len(result):
+            result[-1] = np.uint64((1 << (self.rows % 64)) - 1)
+        for feature, values in conditions.items():
+            if feature == 'fan_taisui':
+                result &= self.taisui_bitmap(values)
+            else:
+                result &= self.bitmap(feature, values)
+        return result
+
+    def rows_of(self, bitmap: np.ndarray) -> np.ndarray:
+        """位图 -> 行号数组"""
+        bits = np.unpackbits(bitmap.view(np.uint8), bitorder='little')[:self.rows]
+        return np.flatnonzero(bits)
+
+    def select(self, **conditions) -> np.ndarray:
+        """满足全部条件的客户编号"""
+        return self.column('customer_id')[self.rows_of(self.match(**conditions))]
+
+    def count(self, **conditions) -> int:
+        """满足全部条件的客户数"""
+        return int(np.unpackbits(self.match(**conditions).view(np.uint8)).sum())
+
+    def info(self) -> Dict[str, Any]:
+        """行数与列、位图占用的字节数"""
+        return {
+            'rows': self.rows,
+            'column_bytes': sum(self._columns[name][:self.rows].nbytes for name in COLUMNS),
+            'bitmap_bytes': sum(len(values) * ((self.rows + 63) // 64) * 8 for values in FEATURES.values()),
+        }
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    rng = np.random.default_rng(0)
+    count = 1_000_000
+    births = (np.datetime64('1950-01-01T00:00', 's')
+              + rng.integers(0, 70 * 365 * 86400, count).astype('timedelta64[s]'))
+    with tempfile.TemporaryDirectory() as path:
+        started = time.perf_counter()
+        store = ChartStore(path)
+        for chunk in range(0, count, 250_000):
+            store.add_births(np.arange(chunk, chunk + 250_000), births[chunk:chunk + 250_000])
+        print(f"写入{len(store)}个命盘（耗时{time.perf_counter() - started:.2f}s）", store.info())
+
+        started = time.perf_counter()
+        store = ChartStore(path)
+        print(f"重新载入（耗时{time.perf_counter() - started:.2f}s）")
+
+        started = time.perf_counter()
+        customers = store.select(day_gan='甲', weak=True, month_zhi='申', fan_taisui=2026)
+        print(f"甲日主、身弱、申月生、2026年犯太岁：{len(customers)}人（耗时{(time.perf_counter() - started) * 1000:.2f}ms）")
@@ -10,9 +10,14 @@ import datetime
 
 from bidict import bidict
 
-from datas import *
-from ganzhi import *
-from sizi import summarys
+try:
+    from .datas import *
+    from .ganzhi import *
+    from .textstore import summarys
+except ImportError:
+    from datas import *
+    from ganzhi import *
+    from textstore import summarys
 
 def check_gan(gan, gans):
     result = ''
@@ -6,7 +6,10 @@
 import collections
 from bidict import bidict
 
-from ganzhi import *
+try:
+    from .ganzhi import *
+except ImportError:
+    from ganzhi import *
 
 xingxius = {
     0: ('角', ""),
@@ -441,6 +444,34 @@ shens_infos = {
     '红艳': "爱得执著，不顾及地位差异。",  
 }
 
+# 神煞倒排索引：导入时构建一次，(参照干支, 目标干支) -> 神煞位掩码
+# 位序与 year_shens、month_shens、day_shens、g_shens 的遍历顺序一致
+shens_names = list(year_shens) + list(month_shens) + list(day_shens) + list(g_shens)
+shens_bits = {name: 1 << seq for seq, name in enumerate(shens_names)}
+
+def build_shens_index(shens_table):
+    index = {}
+    for name, items in shens_table.items():
+        for ref, targets in items.items():
+            for target in targets:
+                index[(ref, target)] = index.get((ref, target), 0) | shens_bits[name]
+    return index
+
+year_shens_index = build_shens_index(year_shens)
+month_shens_index = build_shens_index(month_shens)
+day_shens_index = build_shens_index(day_shens)
+g_shens_index = build_shens_index(g_shens)
+
+_shens_mask_cache = {}
+
+def shens_mask_names(mask):
+    """把神煞位掩码还原为神煞名列表（按位序）"""
+    names = _shens_mask_cache.get(mask)
+    if names is None:
+        names = tuple(name for name in shens_names if mask & shens_bits[name])
+        _shens_mask_cache[mask] = names
+    return names
+
 tiaohous = {
     '甲寅': '1丙2_癸', '甲卯': '1庚2戊丙3己丁', '甲辰': '1庚2壬丁', '甲巳': '1癸2庚丁', '甲午': '1癸2庚丁','甲未': '1癸2庚丁', 
     '甲申': '1庚2壬丁', '甲酉': '1庚2丙丁', '甲戌': '1庚2壬甲3癸丁', '甲亥': '1庚2戊丁3_丙', '甲子': '1丁2丙庚', '甲丑': '1丁2丙庚',
@@ -132,6 +132,114 @@ ten_deities = {
 
 }
 
+# 十神矩阵：日主 × 干支 -> 十神/十二长生编号（int8）
+# 干支序号：天干 0-9，地支 10-21；编号对应 ten_deities_names
+ten_deities_names = ('比', '劫', '食', '伤', '才', '财', '杀', '官', '枭', '印',
+                     '长', '沐', '冠', '建', '帝', '衰', '病', '死', '墓', '绝', '胎', '养')
+ten_deities_ids = {name: seq for seq, name in enumerate(ten_deities_names)}
+ganzhi_index = {item: seq for seq, item in enumerate(Gan + Zhi)}
+
+ten_deities_matrix = tuple(bytes(ten_deities_ids[ten_deities[me][item]] for item in Gan + Zhi) 
+                           for me in Gan)
+
+# 反查：日主 × 十神编号 -> 干支序号，对应 ten_deities[me].inverse
+ten_deities_inverse = tuple(bytes(ganzhi_index[ten_deities[me].inverse[name]] for name in ten_deities_names) 
+                            for me in Gan)
+
+# 地支藏干十神：日主 × 地支 -> 主气十神编号 / 各十神藏干个数 / 各十神藏干分数（按 zhi5 加权）
+shen_num = 10  # ten_deities_names 前 10 项为十神
+zhi_main_shens = tuple(bytes(ten_deities_ids[ten_deities[me][max(zhi5[zhi], key=zhi5[zhi].get)]] for zhi in Zhi)
+                       for me in Gan)
+zhi_hidden_shens = tuple(tuple(bytes(sum(ten_deities_ids[ten_deities[me][gan]] == seq for gan in zhi5[zhi])
+                                     for seq in range(shen_num)) for zhi in Zhi) for me in Gan)
+zhi_hidden_weights = tuple(tuple(tuple(sum(weight for gan, weight in zhi5[zhi].items() 
+                                           if ten_deities_ids[ten_deities[me][gan]] == seq) for seq in range(shen_num))
+                                 for zhi in Zhi) for me in Gan)
+
+
+def shen_histogram(me, gans, zhis):
+    """
+    命盘十神计数，每种计数都是按十神编号（ten_deities_ids）索引、长度为 10 的列表：
+
+        gan: 天干十神（不含日干）    zhi: 地支主气十神
+        total: gan + zhi，等于 (gan_shens + zhi_shens).count(...)
+        hidden: 地支全部藏干的十神个数    weighted: 地支藏干按 zhi5 分数加权
+        positions: 每柱 [天干十神, 地支主气十神] 编号，日干及无法识别的干支为 -1
+
+    只含 list/int，可以直接放进各模块共享的结果字典；计数用 hist['total'][ten_deities_ids['官']]。
+    """
+    hist = {kind: [0] * shen_num for kind in ('gan', 'zhi', 'total', 'hidden', 'weighted')}
+    hist['positions'] = []
+    me_seq = ganzhi_index.get(me, -1)
+    if not 0 <= me_seq < len(Gan):
+        hist['positions'] = [[-1, -1] for _ in zip(gans, zhis)]
+        return hist
+
+    me_row = ten_deities_matrix[me_seq]
+    for i, (gan, zhi) in enumerate(zip(gans, zhis)):
+        gan_seq = ganzhi_index.get(gan, -1)
+        gan_shen = me_row[gan_seq] if i != 2 and 0 <= gan_seq < len(Gan) else -1
+        zhi_seq = ganzhi_index.get(zhi, -1) - len(Gan)
+        zhi_shen = zhi_main_shens[me_seq][zhi_seq] if 0 <= zhi_seq < len(Zhi) else -1
+        hist['positions'].append([gan_shen, zhi_shen])
+        if gan_shen >= 0:
+            hist['gan'][gan_shen] += 1
+            hist['total'][gan_shen] += 1
+        if zhi_shen >= 0:
+            hist['zhi'][zhi_shen] += 1
+            hist['total'][zhi_shen] += 1
+            for seq in range(shen_num):
+                hist['hidden'][seq] += zhi_hidden_shens[me_seq][zhi_seq][seq]
+                hist['weighted'][seq] += zhi_hidden_weights[me_seq][zhi_seq][seq]
+    return hist
+
+
+def shen_total(hist, *names, kind='total'):
+    """shen_histogram 结果中若干十神的计数之和，如 shen_total(hist, '比', '劫')"""
+    counts = hist[kind]
+    return sum(counts[ten_deities_ids[name]] for name in names)
+
+
+# numpy 视图只在批量计算时才需要，首次访问 ten_deities_array / ten_deities_inverse_array 时再导入 numpy（PEP 562）
+_deities_arrays = {}
+
+def _deities_array(name):
+    if name not in _deities_arrays:
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        source = ten_deities_matrix if name == 'ten_deities_array' else ten_deities_inverse
+        _deities_arrays[name] = None if np is None else np.frombuffer(b''.join(source), dtype=np.int8).reshape(len(Gan), -1)
+    return _deities_arrays[name]
+
+def __getattr__(name):
+    if name in ('ten_deities_array', 'ten_deities_inverse_array'):
+        return _deities_array(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def ten_deity(me, item):
+    """日主对某天干的十神，或对某地支的十二长生"""
+    return ten_deities_names[ten_deities_matrix[ganzhi_index[me]][ganzhi_index[item]]]
+
+def ten_deity_of(me, name):
+    """十神/十二长生反查对应的天干或地支"""
+    return (Gan + Zhi)[ten_deities_inverse[ganzhi_index[me]][ten_deities_ids[name]]]
+
+def ten_deities_batch(mes, items):
+    """批量计算十神编号
+    
+    mes 为日主天干序号，items 为干支序号，按 numpy 规则广播：
+    N 个命盘的 8 个位置用 mes[:, None] 与 items[N, 8]，N 个流年用标量日主与 items[N]。
+    无 numpy 时按一维序列逐项计算。
+    """
+    array = _deities_array('ten_deities_array')
+    if array is None:
+        return [ten_deities_matrix[me][item] for me, item in zip(mes, items)]
+    import numpy as np
+    return array[np.asarray(mes), np.asarray(items)]
+
 ju = {
     '本':'刃', '被克':'杀',  '克':'才', '生':'伤', '生我':'枭',
 }
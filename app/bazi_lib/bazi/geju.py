@@ -0,0 +1,368 @@
+"""
+格局规则引擎 - 把 bazi.py 中逐条手写的格局、断语判断改为规则表
+
+每个命盘先算出一组特征（四柱序号、十神、地支计数、相邻合冲刑、五行分数等，均为 numpy 数组），
+规则由触发条件与判断函数组成：
+
+    Rule('魁罡格', (...断语...), any_of=[('day', '庚辰'), ('day', '庚戌'), ...])
+    Rule('日时天克地刑', '...', test=lambda f: f.xing[:, 3] & GAN_KE[f.me, f.gan[:, 3]])
+
+触发条件是离散的特征项（日柱、时柱、日主、有某地支、月令十神等），编译时按特征项建立倒排索引，
+单个命盘只判断触发条件成立的规则；判断函数对整批命盘做数组运算，同一套规则也可以批量统计格局频率：
+
+    from app.bazi_lib.bazi.geju import match_rules, RULES
+    for rule in match_rules(gans, zhis):
+        print(rule.text)
+    RULES.frequencies(pillars)                  # pillars 为 to_pillars_batch 的 (N, 8) 输出
+
+规则表只收录特殊格局、特殊组合、从格、建禄格与甲日断语；各十神的断语（bazi.py 与
+PersonalityAnalysisModule 中按比、劫、食、伤……分节的部分）仍是手写判断，不在规则表内。
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+try:
+    from .ganzhi import Gan, Zhi, gan5, zhi5, zhi_atts, gan_hes, ten_deities, ten_deities_ids, ten_deities_batch
+except ImportError:
+    from ganzhi import Gan, Zhi, gan5, zhi5, zhi_atts, gan_hes, ten_deities, ten_deities_ids, ten_deities_batch
+
+ELEMENTS = ('金', '木', '水', '火', '土')
+
+# 十神编号（ten_deities_names 中的序号）
+BI, JIE, SHI, SHANG, CAI_P, CAI, SHA, GUAN, XIAO, YIN = range(10)
+
+
+def _gan_table(func) -> np.ndarray:
+    return np.array([[func(a, b) for b in Gan] for a in Gan])
+
+
+# 地支主气（藏干中分数最高者）与藏干五行分数
+MAIN_QI = np.array([Gan.index(max(zhi5[zhi], key=zhi5[zhi].get)) for zhi in Zhi])
+ZHI_SCORES = np.array([[sum(weight for gan, weight in zhi5[zhi].items() if gan5[gan] == element)
+                        for element in ELEMENTS] for zhi in Zhi])
+GAN_ELEMENT = np.array([ELEMENTS.index(gan5[gan]) for gan in Gan])
+# 藏干，不足三个的以 -1 补齐
+HIDDEN = np.array([[Gan.index(gan) for gan in zhi5[zhi]] + [-1] * (3 - len(zhi5[zhi])) for zhi in Zhi])
+
+GAN_KE = _gan_table(lambda a, b: ten_deities[a]['克'] == ten_deities[b]['本'] or ten_deities[b]['克'] == ten_deities[a]['本'])
+GAN_HE = _gan_table(lambda a, b: (a, b) in gan_hes or (b, a) in gan_hes)
+ZHI_LIUHE = np.array([[zhi_atts[a]['六'] == b for b in Zhi] for a in Zhi])
+ZHI_CHONG = np.array([[zhi_atts[a]['冲'] == b for b in Zhi] for a in Zhi])
+ZHI_XING = np.array([[zhi_atts[a]['刑'] == b or zhi_atts[b]['刑'] == a for b in Zhi] for a in Zhi])
+
+# 日主 -> 库（地支序号）、某十神对应的天干、该天干的禄
+ME_KU = np.array([Zhi.index(ten_deities[me]['库'][0]) for me in Gan])
+CAI_GAN = np.array([Gan.index(ten_deities[me].inverse['财']) for me in Gan])
+YIN_LU = np.array([Zhi.index(ten_deities[ten_deities[me].inverse['印']].inverse['建']) for me in Gan])
+
+
+def _jiazi(gan, zhi):
+    return (6 * gan - 5 * zhi) % 60
+
+
+def _adjacent(table: np.ndarray, items: np.ndarray) -> np.ndarray:
+    """相邻两柱满足 table 的关系时两柱都记为 True（与 bazi.py 的 zhi_6he 等列表一致）"""
+    pairs = table[items[:, :-1], items[:, 1:]]
+    flags = np.zeros(items.shape, dtype=bool)
+    flags[:, :-1] |= pairs
+    flags[:, 1:] |= pairs
+    return flags
+
+
+class ChartFeatures:
+    """
+    一批命盘的特征，属性均为首维为 N 的数组
+
+    gan/zhi/jiazi: 四柱干、支、六十甲子序号 (N, 4)
+    me: 日主 (N,)；yang: 日主是否阳干
+    gan_shen: 天干十神 (N, 4)，日柱为 -1；zhi_shen: 地支主气十神 (N, 4)
+    shen_count: 天干（不含日干）与地支全部藏干的十神计数 (N, 10)
+    zhi_count: 各地支个数 (N, 12)
+    liuhe/chong/xing/gan_he: 相邻两柱的六合、六冲、刑、干合 (N, 4)
+    scores: 五行分数 (N, 5)，列顺序为 ELEMENTS
+    """
+
+    def __init__(self, charts):
+        charts = np.atleast_2d(np.asarray(charts, dtype=np.int64))
+        n = len(charts)
+        self.size = n
+        self.gan = charts[:, 0::2]
+        self.zhi = charts[:, 1::2]
+        self.jiazi = _jiazi(self.gan, self.zhi)
+        self.me = self.gan[:, 2]
+        self.yang = self.me % 2 == 0
+
+        me = self.me[:, None]
+        self.gan_shen = np.asarray(ten_deities_batch(me, self.gan), dtype=np.int64)
+        self.gan_shen[:, 2] = -1
+        self.zhi_shen = np.asarray(ten_deities_batch(me, MAIN_QI[self.zhi]), dtype=np.int64)
+
+        hidden = HIDDEN[self.zhi].reshape(n, -1)
+        hidden_shen = np.where(hidden >= 0, ten_deities_batch(me, np.maximum(hidden, 0)), -1)
+        self.shen_count = np.zeros((n, 10), dtype=np.int64)
+        for column in np.concatenate([self.gan_shen, hidden_shen], axis=1).T:
+            valid = column >= 0
+            np.add.at(self.shen_count, (np.flatnonzero(valid), column[valid]), 1)
+
+        self.zhi_count = np.zeros((n, 12), dtype=np.int64)
+        for column in self.zhi.T:
+            self.zhi_count[np.arange(n), column] += 1
+
+        self.liuhe = _adjacent(ZHI_LIUHE, self.zhi)
+        self.chong = _adjacent(ZHI_CHONG, self.zhi)
+        self.xing = _adjacent(ZHI_XING, self.zhi)
+        self.gan_he = _adjacent(GAN_HE, self.gan)
+
+        # 天干各5分，地支按藏干计分，月支计两次
+        self.scores = np.zeros((n, len(ELEMENTS)), dtype=np.int64)
+        for column in self.gan.T:
+            self.scores[np.arange(n), GAN_ELEMENT[column]] += 5
+        self.scores += ZHI_SCORES[self.zhi].sum(axis=1) + ZHI_SCORES[self.zhi[:, 1]]
+
+    def has_gan_shen(self, shen: int) -> np.ndarray:
+        return (self.gan_shen == shen).any(axis=1)
+
+
+# 触发条件：特征项 -> (名称取值的换算, 批量判断, 单个命盘的取值)
+def _pillar(index):
+    return (lambda name: _jiazi(Gan.index(name[0]), Zhi.index(name[1])),
+            lambda f, value: f.jiazi[:, index] == value)
+
+
+TRIGGERS = {
+    'year': _pillar(0),
+    'month': _pillar(1),
+    'day': _pillar(2),
+    'time': _pillar(3),
+    'me': (Gan.index, lambda f, value: f.me == value),
+    'zhi': (Zhi.index, lambda f, value: f.zhi_count[:, value] > 0),
+    'month_zhi': (Zhi.index, lambda f, value: f.zhi[:, 1] == value),
+    'time_zhi': (Zhi.index, lambda f, value: f.zhi[:, 3] == value),
+    'month_shen': (ten_deities_ids.get, lambda f, value: f.zhi_shen[:, 1] == value),
+    'gan_shen': (ten_deities_ids.get, lambda f, value: f.has_gan_shen(value)),
+}
+
+
+def _chart_tokens(f: ChartFeatures, row: int = 0) -> set:
+    """单个命盘的全部特征项（已换算为序号）"""
+    tokens = {('year', f.jiazi[row, 0]), ('month', f.jiazi[row, 1]), ('day', f.jiazi[row, 2]),
+              ('time', f.jiazi[row, 3]), ('me', f.me[row]), ('month_zhi', f.zhi[row, 1]),
+              ('time_zhi', f.zhi[row, 3]), ('month_shen', f.zhi_shen[row, 1])}
+    tokens.update(('zhi', zhi) for zhi in f.zhi[row])
+    tokens.update(('gan_shen', shen) for shen in f.gan_shen[row] if shen >= 0)
+    return {(kind, int(value)) for kind, value in tokens}
+
+
+class Rule:
+    """
+    一条格局/断语规则
+
+    Args:
+        name: 规则名
+        text: 断语，多行时为元组
+        any_of: 任一成立即触发的特征项，如 [('day', '庚辰'), ('day', '庚戌')]
+        all_of: 必须全部成立的特征项，如 [('zhi', '辰'), ('zhi', '巳')]
+        test: 其余条件，参数为 ChartFeatures，返回 (N,) 布尔数组；
+              也可以返回命中次数（逐柱判断的断语按命中的柱数重复输出，与 bazi.py 一致）
+        ge: 命中时记入格局列表的简称（如建禄格记 '建'）
+    """
+
+    def __init__(self, name: str, text: Union[str, Sequence[str]], any_of: Iterable[Tuple[str, str]] = (),
+                 all_of: Iterable[Tuple[str, str]] = (), test: Optional[Callable] = None, ge: Optional[str] = None):
+        self.name = name
+        self.lines = (text,) if isinstance(text, str) else tuple(text)
+        self.any_of = tuple((kind, TRIGGERS[kind][0](value)) for kind, value in any_of)
+        self.all_of = tuple((kind, TRIGGERS[kind][0](value)) for kind, value in all_of)
+        self.test = test
+        self.ge = ge
+
+    @property
+    def text(self) -> str:
+        return '\n'.join(self.lines)
+
+    def _trigger_mask(self, f: ChartFeatures) -> np.ndarray:
+        mask = np.ones(f.size, dtype=bool)
+        for kind, value in self.all_of:
+            mask &= TRIGGERS[kind][1](f, value)
+        if self.any_of:
+            any_mask = np.zeros(f.size, dtype=bool)
+            for kind, value in self.any_of:
+                any_mask |= TRIGGERS[kind][1](f, value)
+            mask &= any_mask
+        return mask
+
+    def evaluate(self, f: ChartFeatures) -> np.ndarray:
+        """整批命盘命中本规则的次数 (N,)"""
+        counts = self._trigger_mask(f).astype(np.int64)
+        if self.test is not None and counts.any():
+            counts *= np.asarray(self.test(f), dtype=np.int64)
+        return counts
+
+    def __repr__(self):
+        return f"Rule({self.name!r})"
+
+
+class RuleSet:
+    """编译后的规则表：按特征项建倒排索引，单个命盘只判断触发条件成立的规则"""
+
+    def __init__(self, rules: Sequence[Rule]):
+        self.rules = list(rules)
+        self.names = [rule.name for rule in self.rules]
+        self._always = []
+        self._index: Dict[Tuple[str, int], List[int]] = {}
+        for seq, rule in enumerate(self.rules):
+            # any_of 的每一项都可能触发；否则取 all_of 的第一项；都没有则每次都要判断
+            keys = rule.any_of or rule.all_of[:1]
+            if not keys:
+                self._always.append(seq)
+            for key in keys:
+                self._index.setdefault(key, []).append(seq)
+
+    def candidates(self, tokens: set) -> List[int]:
+        """特征项可能触发的规则序号（按规则表顺序）"""
+        seqs = set(self._always)
+        for token in tokens:
+            seqs.update(self._index.get(token, ()))
+        return sorted(seqs)
+
+    def match(self, chart) -> List[Rule]:
+        """单个命盘命中的规则，按规则表顺序，命中多次的规则重复出现"""
+        f = chart if isinstance(chart, ChartFeatures) else ChartFeatures(chart)
+        tokens = _chart_tokens(f)
+        matched = []
+        for seq in self.candidates(tokens):
+            rule = self.rules[seq]
+            if not all(key in tokens for key in rule.all_of):
+                continue
+            if rule.any_of and not any(key in tokens for key in rule.any_of):
+                continue
+            count = 1 if rule.test is None else int(np.asarray(rule.test(f))[0])
+            matched.extend([rule] * count)
+        return matched
+
+    def match_batch(self, charts) -> np.ndarray:
+        """整批命盘对全部规则的命中矩阵 (N, 规则数)"""
+        f = charts if isinstance(charts, ChartFeatures) else ChartFeatures(charts)
+        if not self.rules:
+            return np.zeros((f.size, 0), dtype=bool)
+        return np.stack([rule.evaluate(f) > 0 for rule in self.rules], axis=1)
+
+    def frequencies(self, charts) -> Dict[str, int]:
+        """各规则在整批命盘中命中的命盘数"""
+        counts = self.match_batch(charts).sum(axis=0)
+        return {name: int(count) for name, count in zip(self.names, counts)}
+
+
+# ---------------------------------------------------------------------------
+# 规则表：顺序即 bazi.py 中的输出顺序
+# ---------------------------------------------------------------------------
+
+def _any_of(kind: str, values: Iterable[str]):
+    return [(kind, value) for value in values]
+
+
+def _jianlu_me(me: str, text: str) -> Rule:
+    return Rule('建禄格' + me, text, all_of=[('month_shen', '比'), ('me', me)])
+
+
+def _caizuo_jieku(f):
+    # 逐柱判断，几柱命中就输出几次
+    ku = ME_KU[f.me][:, None]
+    return ((f.zhi == ku) & ((f.gan_shen == CAI_P) | (f.gan_shen == CAI))).sum(axis=1)
+
+
+def _yin_tianke_dixing(f):
+    # 相邻两柱逐对判断，几对命中就输出几次
+    pairs = f.xing[:, :-1] & f.xing[:, 1:] & GAN_KE[f.gan[:, :-1], f.gan[:, 1:]]
+    return ~f.yang * pairs.sum(axis=1)
+
+
+def _fucai_zuo_yinlu(f):
+    # bazi.py 原判断还要求 cai not in zhi_shens2，但比较的是天干与十神名，恒为真
+    return ((f.gan == CAI_GAN[f.me][:, None]) & (f.zhi == YIN_LU[f.me][:, None])).any(axis=1)
+
+
+RULES = RuleSet([
+    Rule('地网', "地网：地支辰巳。天罗：戌亥。天罗地网全凶。", all_of=[('zhi', '辰'), ('zhi', '巳')]),
+    Rule('天罗', "天罗：戌亥。地网：地支辰巳。天罗地网全凶。", all_of=[('zhi', '戌'), ('zhi', '亥')]),
+    Rule('魁罡格', ("魁罡格：基础96，日主庚辰,庚戌,壬辰, 戊戌，重叠方有力。日主强，无刑冲佳。",
+                 "魁罡四柱曰多同，贵气朝来在此中，日主独逢冲克重，财官显露祸无穷。魁罡重叠是贵人，天元健旺喜临身，财官一见生灾祸，刑煞俱全定苦辛。"),
+         any_of=_any_of('day', ('庚辰', '庚戌', '壬辰', '戊戌'))),
+    Rule('金神格', "金神格：基础97，时柱乙丑、己巳、癸酉。只有甲和己日，甲日为主，甲子、甲辰最突出。月支通金火2局为佳命。不通可以选其他格",
+         any_of=_any_of('time', ('乙丑', '己巳', '癸酉'))),
+    Rule('六阴朝阳', "六阴朝阳格：基础98，辛日时辰为子。", all_of=[('me', '辛'), ('time_zhi', '子')]),
+    Rule('六乙鼠贵', "六阴朝阳格：基础99，乙日时辰为子。忌讳午冲，丑合，不适合有2个子。月支最好通木局，水也可以，不适合金火。申酉大运有凶，午也不行。夏季为伤官。入其他格以格局论。",
+         all_of=[('me', '乙'), ('time_zhi', '子')]),
+    Rule('从格', ("有五行大于25分，需要考虑专格或者从格。",
+                "从旺格：安居远害、退身避位、淡泊名利,基础94;从势格：日主无根。"),
+         test=lambda f: f.scores.max(axis=1) > 25),
+    Rule('日时连珠得合', "日时干邻支合：连珠得合：妻贤子佳，与事业无关。母法总则P21-11",
+         test=lambda f: f.liuhe[:, 3] & (np.abs(f.gan[:, 3] - f.gan[:, 2]) == 1)),
+    Rule('财坐劫库', "财坐劫库，大破败。母法P61-4 戊寅 丙辰 壬辰 庚子", test=_caizuo_jieku),
+    Rule('日时天比地冲', "日时天比地冲：女为家庭辛劳，男艺术宗教。 母法P61-5 己丑 丙寅 甲辰 甲戌",
+         test=lambda f: f.chong[:, 3] & (f.gan[:, 3] == f.me)),
+    Rule('日时天克地刑', "日时天克地刑：破败祖业、自立发展、后无终局。 母法P61-7 己丑 丙寅 甲午 庚午",
+         test=lambda f: f.xing[:, 3] & GAN_KE[f.me, f.gan[:, 3]]),
+    Rule('浮财坐印禄', "浮财坐印禄:破祖之后，自己也败。 母法P78-29 辛丑 丁酉 壬寅 庚子", test=_fucai_zuo_yinlu),
+    Rule('阴日主天克地刑', "阴日主天克地刑：孤独、双妻。 母法P61-7 己丑 丙寅 甲午 庚午", test=_yin_tianke_dixing),
+
+    Rule('建禄格', "建禄格：最好天干有财官。如果官杀不成格，有兄弟，且任性。有争财和理财的双重性格。如果创业独自搞比较好，如果合伙有完善的财务制度也可以。",
+         all_of=[('month_shen', '比')], ge='建'),
+    Rule('建禄年透比劫', "\t建禄年透比劫凶", all_of=[('month_shen', '比')],
+         test=lambda f: (f.gan_shen[:, 0] == BI) | (f.gan_shen[:, 0] == JIE)),
+    Rule('建禄财官双透', "\t建禄财官双透，吉", all_of=[('month_shen', '比'), ('gan_shen', '财'), ('gan_shen', '官')],
+         test=lambda f: (f.gan_shen[:, 0] != BI) & (f.gan_shen[:, 0] != JIE)),
+    Rule('建禄格甲乙', "\t甲乙建禄四柱劫财多，无祖财，克妻，一生不聚财，做事虚诈，为人大模大样，不踏实。乙财官多可为吉。甲壬申时佳；乙辛巳时佳；",
+         all_of=[('month_shen', '比')], any_of=_any_of('me', '甲乙')),
+    _jianlu_me('丙', "\t丙：己亥时辰佳；"),
+    _jianlu_me('丁', "\t丁：阴男克1妻，阳男克3妻。财官多可为吉。庚子时辰佳；"),
+    _jianlu_me('戊', "\t戊：四柱无财克妻，无祖业，后代多事端。如合申子辰，子息晚，有2子。甲寅时辰佳；"),
+    _jianlu_me('己', "\t己：即使官财出干成格，妻也晚。偏财、杀印成格为佳。乙丑时辰佳；"),
+    _jianlu_me('庚', "\t庚：上半月生难有祖财，下半月较好，财格比官杀要好。丙戌时辰佳；"),
+    _jianlu_me('辛', "\t辛：干透劫财，妻迟财少；丁酉时辰佳；"),
+    _jianlu_me('壬', "\t 壬：戊申时辰佳；"),
+    _jianlu_me('癸', "\t 癸：己亥时辰佳"),
+
+    Rule('甲日辰戌多', "甲日：辰或戌多、性能急躁不能忍。", all_of=[('me', '甲')],
+         test=lambda f: (f.zhi_count[:, Zhi.index('辰')] > 1) | (f.zhi_count[:, Zhi.index('戌')] > 1)),
+    Rule('甲子', "甲子：调候要火。", all_of=[('day', '甲子')]),
+    Rule('甲寅', "甲寅：有主见之人，需要财官旺支。", all_of=[('day', '甲寅')]),
+    Rule('甲辰', "甲辰：印库、性柔和而有实权。", all_of=[('day', '甲辰')]),
+    Rule('甲午', "甲午：一生有财、调候要水。", all_of=[('day', '甲午')]),
+    Rule('甲戌', "甲戌：自坐伤官，不易生财，为人仁善。", all_of=[('day', '甲戌')]),
+    Rule('冬金子月', "冬金子月，再有一子字，孤克。 母法P28-106 甲戌 丙子 庚子 丁丑",
+         all_of=[('month_zhi', '子')], any_of=_any_of('me', '庚辛'),
+         test=lambda f: f.zhi_count[:, Zhi.index('子')] > 1),
+])
+
+
+def chart_from_ganzhi(gans: Sequence[str], zhis: Sequence[str]) -> np.ndarray:
+    """四柱干支字符 -> 8个序号"""
+    return np.array([value for gan, zhi in zip(gans, zhis) for value in (Gan.index(gan), Zhi.index(zhi))])
+
+
+def match_rules(gans: Sequence[str], zhis: Sequence[str], rules: RuleSet = RULES,
+                names: Optional[Iterable[str]] = None) -> List[Rule]:
+    """按四柱干支匹配规则；names 给出时只保留其中的规则"""
+    matched = rules.match(chart_from_ganzhi(gans, zhis))
+    if names is not None:
+        names = set(names)
+        matched = [rule for rule in matched if rule.name in names]
+    return matched
+
+
+if __name__ == "__main__":
+    import time
+
+    print([rule.name for rule in match_rules('庚丙庚丁', '子子辰丑')])
+
+    rng = np.random.default_rng(0)
+    jiazi = rng.integers(0, 60, (100000, 4))
+    pool = np.stack([jiazi % 10, jiazi % 12], axis=2).reshape(-1, 8)
+    started = time.perf_counter()
+    frequencies = RULES.frequencies(pool)
+    print(f"{len(pool)}个命盘，耗时{(time.perf_counter() - started) * 1000:.0f}ms")
+    for name, count in frequencies.items():
+        print(f"{name:<10}{count / len(pool):8.2%}")
@@ -0,0 +1,254 @@
+"""
+合婚模块 - 两个命盘的配对评分，以及一个命盘对大批候选的批量筛选
+
+评分由四部分组成（满分100）：
+    日主（30分）：两人日干五合、相生、比和、相克、相冲
+    地支（30分）：日支（夫妻宫）与年支（生肖）之间的六合、三合、三会、冲、刑、害、破
+    五行（20分）：两人五行合起来是否比各自更均衡
+    配偶星（20分）：对方日干是否为自己的配偶星（男命财才、女命官杀）
+
+命盘用8个整数表示：年干、年支、月干、月支、日干、日支、时干、时支在 Gan/Zhi 中的序号，
+与 to_pillars_batch 的输出一致。各部分先预计算为干支查找表，批量模式只做数组查表和广播：
+
+    from app.bazi_lib.bazi.hehun import match, top_matches
+    match(chart_a, '男', chart_b, '女')                       # 单对评分及明细
+    top_matches(chart_a, '男', pool, pool_genders, k=20)      # 从候选池中取前k名
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    from .ganzhi import Gan, Zhi, gan5, zhi5, zhi_atts, zhi_hes, zhi_chongs, gan_hes, gan_chongs, ten_deities
+except ImportError:
+    from ganzhi import Gan, Zhi, gan5, zhi5, zhi_atts, zhi_hes, zhi_chongs, gan_hes, gan_chongs, ten_deities
+
+WEIGHTS = {'day_master': 30, 'branches': 30, 'elements': 20, 'spouse_star': 20}
+
+ELEMENTS = ('金', '木', '水', '火', '土')
+
+# 日干关系 -> 得分（0～1）
+DAY_MASTER_SCORES = {'五合': 1.0, '相生': 0.75, '比和': 0.5, '相克': 0.25, '相冲': 0.0}
+
+# 地支关系 -> 分值；一对地支的分值之和除以3后截断到 [-1, 1]
+BRANCH_POINTS = {'六合': 3, '三合': 2, '三会': 1, '冲': -3, '刑': -2, '害': -2, '破': -1}
+
+# 参与比较的柱位及权重：(柱序号, 权重, 名称)
+BRANCH_PILLARS = ((2, 1.0, '日支'), (0, 0.6, '年支'))
+
+# 配偶星：男命以财为妻，女命以官为夫；正星得分高于偏星
+SPOUSE_STARS = {
+    '男': {'财': 1.0, '才': 0.7},
+    '女': {'官': 1.0, '杀': 0.7},
+}
+
+
+def _day_master_relation(a: str, b: str) -> str:
+    if (a, b) in gan_hes or (b, a) in gan_hes:
+        return '五合'
+    if (a, b) in gan_chongs or (b, a) in gan_chongs:
+        return '相冲'
+    if gan5[a] == gan5[b]:
+        return '比和'
+    if ten_deities[a]['生'] == gan5[b] or ten_deities[b]['生'] == gan5[a]:
+        return '相生'
+    return '相克'
+
+
+def _branch_relations(a: str, b: str) -> List[str]:
+    atts = zhi_atts[a]
+    relations = []
+    if atts['六'] == b:
+        relations.append('六合')
+    if a != b and any(a in group and b in group for group in zhi_hes):
+        relations.append('三合')
+    if b in atts['会']:
+        relations.append('三会')
+    if (a, b) in zhi_chongs or (b, a) in zhi_chongs:
+        relations.append('冲')
+    if b in (atts['刑'], atts['被刑']):
+        relations.append('刑')
+    if atts['害'] == b:
+        relations.append('害')
+    if atts['破'] == b:
+        relations.append('破')
+    return relations
+
+
+def _branch_value(relations: List[str]) -> float:
+    return max(-1.0, min(1.0, sum(BRANCH_POINTS[name] for name in relations) / 3))
+
+
+def _element_vector(gan: str = None, zhi: str = None) -> np.ndarray:
+    vector = np.zeros(len(ELEMENTS))
+    if gan is not None:
+        vector[ELEMENTS.index(gan5[gan])] += 5
+    if zhi is not None:
+        for hidden, weight in zhi5[zhi].items():
+            vector[ELEMENTS.index(gan5[hidden])] += weight
+    return vector
+
+
+# 预计算的查找表
+DAY_MASTER_TABLE = np.array([[DAY_MASTER_SCORES[_day_master_relation(a, b)] for b in Gan] for a in Gan])
+BRANCH_TABLE = np.array([[_branch_value(_branch_relations(a, b)) for b in Zhi] for a in Zhi])
+GAN_ELEMENTS = np.stack([_element_vector(gan=gan) for gan in Gan])
+ZHI_ELEMENTS = np.stack([_element_vector(zhi=zhi) for zhi in Zhi])
+# SPOUSE_TABLE[性别, 我的日干, 对方日干]，性别 0 为男、1 为女
+SPOUSE_TABLE = np.array([[[SPOUSE_STARS[gender].get(ten_deities[me][other], 0.0) for other in Gan]
+                          for me in Gan] for gender in ('男', '女')])
+
+
+def as_charts(charts) -> np.ndarray:
+    """转为 (N, 8) 的整数数组；也接受 (天干列表, 地支列表) 形式的单个命盘"""
+    if isinstance(charts, tuple) and len(charts) == 2 and isinstance(charts[0], (list, tuple)) \
+            and charts[0] and isinstance(charts[0][0], str):
+        gans, zhis = charts
+        charts = [value for gan, zhi in zip(gans, zhis) for value in (Gan.index(gan), Zhi.index(zhi))]
+    return np.atleast_2d(np.asarray(charts, dtype=np.int64))
+
+
+def _gender_codes(genders, count: int) -> np.ndarray:
+    if isinstance(genders, str):
+        genders = [genders] * count
+    return np.array([0 if gender == '男' else 1 for gender in genders], dtype=np.int64)
+
+
+def element_distribution(charts) -> np.ndarray:
+    """五行分布（天干各5分、地支按藏干计、月支计两次，与八字分数一致），每行归一化，列顺序为 ELEMENTS"""
+    charts = as_charts(charts)
+    vectors = (GAN_ELEMENTS[charts[:, 0::2]].sum(axis=1) + ZHI_ELEMENTS[charts[:, 1::2]].sum(axis=1)
+               + ZHI_ELEMENTS[charts[:, 3]])
+    return vectors / vectors.sum(axis=1, keepdims=True)
+
+
+def _imbalance(distribution: np.ndarray) -> np.ndarray:
+    """与五行均匀分布的L1距离"""
+    return np.abs(distribution - 1 / len(ELEMENTS)).sum(axis=-1)
+
+
+def _score_matrix(a: np.ndarray, a_genders: np.ndarray, b: np.ndarray, b_genders: np.ndarray) -> Dict[str, np.ndarray]:
+    """a 的每个命盘与 b 的每个命盘两两评分，各部分均为 (N, M) 的 0～1 数组"""
+    day_master = DAY_MASTER_TABLE[a[:, 4][:, None], b[:, 4][None, :]]
+
+    branch_total = sum(weight * BRANCH_TABLE[a[:, 2 * pillar + 1][:, None], b[:, 2 * pillar + 1][None, :]]
+                       for pillar, weight, _ in BRANCH_PILLARS)
+    branches = 0.5 + 0.5 * branch_total / sum(weight for _, weight, _ in BRANCH_PILLARS)
+
+    dist_a = element_distribution(a)
+    dist_b = element_distribution(b)
+    mixed = _imbalance((dist_a[:, None, :] + dist_b[None, :, :]) / 2)
+    worst = np.maximum(_imbalance(dist_a)[:, None], _imbalance(dist_b)[None, :])
+    elements = np.clip(1 - mixed / np.maximum(worst, 1e-9), 0, 1)
+
+    spouse_star = (SPOUSE_TABLE[a_genders[:, None], a[:, 4][:, None], b[:, 4][None, :]]
+                   + SPOUSE_TABLE[b_genders[None, :], b[:, 4][None, :], a[:, 4][:, None]]) / 2
+
+    parts = {'day_master': day_master, 'branches': branches, 'elements': elements, 'spouse_star': spouse_star}
+    parts['total'] = sum(WEIGHTS[name] * value for name, value in parts.items())
+    return parts
+
+
+def score_matrix(charts_a, genders_a, charts_b, genders_b) -> np.ndarray:
+    """两组命盘两两配对的总分 (N, M)"""
+    a = as_charts(charts_a)
+    b = as_charts(charts_b)
+    return _score_matrix(a, _gender_codes(genders_a, len(a)), b, _gender_codes(genders_b, len(b)))['total']
+
+
+def match(chart_a, gender_a: str, chart_b, gender_b: str) -> Dict[str, Any]:
+    """
+    两个命盘的合婚评分
+
+    Args:
+        chart_a, chart_b: 8个干支序号，或 (天干列表, 地支列表)
+        gender_a, gender_b: '男' 或 '女'
+
+    Returns:
+        总分、各部分得分与依据
+    """
+    a = as_charts(chart_a)
+    b = as_charts(chart_b)
+    parts = _score_matrix(a, _gender_codes(gender_a, 1), b, _gender_codes(gender_b, 1))
+
+    me_a, me_b = Gan[a[0, 4]], Gan[b[0, 4]]
+    branches = []
+    for pillar, _, name in BRANCH_PILLARS:
+        zhi_a, zhi_b = Zhi[a[0, 2 * pillar + 1]], Zhi[b[0, 2 * pillar + 1]]
+        branches.append({'pillar': name, 'pair': zhi_a + zhi_b, 'relations': _branch_relations(zhi_a, zhi_b)})
+
+    return {
+        'score': round(float(parts['total'][0, 0]), 1),
+        'parts': {name: round(float(parts[name][0, 0]) * weight, 1) for name, weight in WEIGHTS.items()},
+        'day_master': {'pair': me_a + me_b, 'relation': _day_master_relation(me_a, me_b)},
+        'branches': branches,
+        'elements': {
+            'a': dict(zip(ELEMENTS, np.round(element_distribution(a)[0], 3).tolist())),
+            'b': dict(zip(ELEMENTS, np.round(element_distribution(b)[0], 3).tolist())),
+        },
+        'spouse_star': {
+            'a_sees_b': ten_deities[me_a][me_b],
+            'b_sees_a': ten_deities[me_b][me_a],
+        },
+    }
+
+
+def top_matches(chart, gender: str, pool, pool_genders, k: int = 10,
+                exclude_same_gender: bool = True) -> List[Dict[str, Any]]:
+    """
+    从候选池中找出与 chart 最合的前k个
+
+    Args:
+        chart: 本人命盘
+        gender: 本人性别
+        pool: (M, 8) 候选命盘
+        pool_genders: 候选性别（字符串序列或单个字符串）
+        k: 返回数量
+        exclude_same_gender: 是否排除同性候选
+
+    Returns:
+        [{'index': 候选序号, 'score': 总分}]，按分数从高到低
+    """
+    return top_matches_batch(as_charts(chart), [gender], pool, pool_genders, k, exclude_same_gender)[0]
+
+
+def top_matches_batch(charts, genders: Sequence[str], pool, pool_genders, k: int = 10,
+                      exclude_same_gender: bool = True, block_size: Optional[int] = 256) -> List[List[Dict[str, Any]]]:
+    """N×M 筛选：每个命盘各取候选池中的前k名，按 block_size 行分块计算以控制内存"""
+    charts = as_charts(charts)
+    pool = as_charts(pool)
+    gender_codes = _gender_codes(genders, len(charts))
+    pool_codes = _gender_codes(pool_genders, len(pool))
+    k = min(k, len(pool))
+
+    results = []
+    step = block_size or len(charts)
+    for start in range(0, len(charts), step):
+        block = slice(start, start + step)
+        scores = _score_matrix(charts[block], gender_codes[block], pool, pool_codes)['total']
+        if exclude_same_gender:
+            scores = np.where(gender_codes[block][:, None] == pool_codes[None, :], -np.inf, scores)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        for row, candidates in zip(scores, top):
+            ordered = candidates[np.argsort(-row[candidates], kind='stable')]
+            results.append([{'index': int(i), 'score': round(float(row[i]), 1)}
+                            for i in ordered if np.isfinite(row[i])])
+    return results
+
+
+if __name__ == "__main__":
+    import time
+
+    husband = (['乙', '丁', '丙', '乙'], ['丑', '丑', '辰', '未'])
+    wife = (['庚', '戊', '辛', '壬'], ['午', '子', '酉', '辰'])
+    print(match(husband, '男', wife, '女'))
+
+    rng = np.random.default_rng(0)
+    # 随机六十甲子组成的候选池
+    jiazi = rng.integers(0, 60, (10000, 4))
+    pool = np.stack([jiazi % 10, jiazi % 12], axis=2).reshape(10000, 8)
+    genders = np.where(rng.random(10000) < 0.5, '男', '女')
+    started = time.perf_counter()
+    best = top_matches(husband, '男', pool, genders, k=5)
+    print(f"从{len(pool)}个候选中筛选，耗时{(time.perf_counter() - started) * 1000:.1f}ms：{best}")
@@ -0,0 +1,213 @@
+"""
+节气表模块 - 1800～2200年二十四节气交接时刻的有序数组
+节气表由 lunar_python 预先生成到 jieqi_table.bin（小端 int64，距1970年的秒数），
+运行时以内存映射方式载入，前后节气查询走二分查找，起运时间按交节时刻直接推算
+
+重新生成节气表：python jieqi.py
+"""
+
+import array
+import bisect
+import calendar
+import datetime
+import mmap
+import os
+import sys
+from typing import Optional, Tuple
+
+try:
+    from lunar_python import Lunar
+except ImportError:
+    Lunar = None
+
+# 节气表覆盖的公历年份（含首尾）
+TABLE_START_YEAR = 1800
+TABLE_END_YEAR = 2200
+
+# 公历年内二十四节气的顺序，偶数位为节，奇数位为气
+JIEQI_NAMES = ("小寒", "大寒", "立春", "雨水", "惊蛰", "春分",
+               "清明", "谷雨", "立夏", "小满", "芒种", "夏至",
+               "小暑", "大暑", "立秋", "处暑", "白露", "秋分",
+               "寒露", "霜降", "立冬", "小雪", "大雪", "冬至")
+
+# 十二节
+JIE_NAMES = JIEQI_NAMES[::2]
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jieqi_table.bin")
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+# 节气表（按时间排序的秒数序列），首次查询时载入
+_table = None
+
+
+def _to_seconds(value: datetime.datetime) -> int:
+    return int((value - _EPOCH).total_seconds())
+
+
+def _from_seconds(seconds: int) -> datetime.datetime:
+    return _EPOCH + datetime.timedelta(seconds=seconds)
+
+
+def _year_jieqi_seconds(year: int):
+    """用 lunar_python 计算某公历年的二十四节气交节时刻"""
+    if Lunar is None:
+        raise RuntimeError("lunar_python不可用，无法计算节气表")
+
+    # 农历某年的节气表中，小寒至大雪的中文键与 DONG_ZHI 都落在同一公历年内
+    table = Lunar.fromYmd(year, 1, 1).getJieQiTable()
+    seconds = []
+    for name in JIEQI_NAMES:
+        solar = table['DONG_ZHI' if name == '冬至' else name]
+        seconds.append(_to_seconds(datetime.datetime(solar.getYear(), solar.getMonth(), solar.getDay(),
+                                                     solar.getHour(), solar.getMinute(), solar.getSecond())))
+    return seconds
+
+
+def _build_array() -> array.array:
+    values = array.array('q')
+    for year in range(TABLE_START_YEAR, TABLE_END_YEAR + 1):
+        values.extend(_year_jieqi_seconds(year))
+    return values
+
+
+def build_jieqi_table(path: str = TABLE_PATH) -> int:
+    """生成节气表文件，返回写入的节气数"""
+    values = _build_array()
+    if sys.byteorder != 'little':
+        values.byteswap()
+    with open(path, 'wb') as f:
+        values.tofile(f)
+    return len(values)
+
+
+def _load_table():
+    """内存映射方式载入节气表，文件缺失或损坏时退回到现场计算"""
+    global _table
+    if _table is not None:
+        return _table
+
+    expected = (TABLE_END_YEAR - TABLE_START_YEAR + 1) * len(JIEQI_NAMES)
+    try:
+        with open(TABLE_PATH, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(mapped) != expected * 8 or sys.byteorder != 'little':
+            raise ValueError("节气表文件与当前配置不符")
+        _table = memoryview(mapped).cast('q')
+    except (OSError, ValueError):
+        _table = _build_array()
+    return _table
+
+
+def jieqi_table():
+    """节气表本体：按时间排序的秒数序列，第i项为 TABLE_START_YEAR 起第 i // 24 年的 JIEQI_NAMES[i % 24]"""
+    return _load_table()
+
+
+def _position(moment: datetime.datetime, whole_day: bool) -> int:
+    """moment 之后第一个节气在表中的位置；按天计时，同一天内交节的节气都算作已过"""
+    table = _load_table()
+    if whole_day:
+        moment = datetime.datetime(moment.year, moment.month, moment.day, 23, 59, 59)
+    pos = bisect.bisect_right(table, _to_seconds(moment))
+    if pos == 0 or pos == len(table):
+        raise ValueError(f"超出节气表范围（{TABLE_START_YEAR}～{TABLE_END_YEAR}年）: {moment}")
+    return pos
+
+
+def _entry(pos: int) -> Tuple[str, datetime.datetime]:
+    return JIEQI_NAMES[pos % len(JIEQI_NAMES)], _from_seconds(_load_table()[pos])
+
+
+def prev_jieqi(moment: datetime.datetime, whole_day: bool = False) -> Tuple[str, datetime.datetime]:
+    """上一个节气（交节时刻不晚于 moment），返回 (名称, 交节时刻)"""
+    return _entry(_position(moment, whole_day) - 1)
+
+
+def next_jieqi(moment: datetime.datetime, whole_day: bool = False) -> Tuple[str, datetime.datetime]:
+    """下一个节气（交节时刻晚于 moment），返回 (名称, 交节时刻)"""
+    return _entry(_position(moment, whole_day))
+
+
+def prev_jie(moment: datetime.datetime) -> datetime.datetime:
+    """上一个节（交节时刻不晚于 moment）"""
+    pos = _position(moment, False) - 1
+    if pos % 2:
+        pos -= 1
+    return _entry(pos)[1]
+
+
+def next_jie(moment: datetime.datetime) -> datetime.datetime:
+    """下一个节（交节时刻晚于 moment）"""
+    pos = _position(moment, False)
+    if pos % 2:
+        pos += 1
+    return _entry(pos)[1]
+
+
+def jieqi_time(year: int, name: str) -> datetime.datetime:
+    """某公历年指定节气的交节时刻"""
+    if not TABLE_START_YEAR <= year <= TABLE_END_YEAR:
+        raise ValueError(f"超出节气表范围（{TABLE_START_YEAR}～{TABLE_END_YEAR}年）: {year}")
+    pos = (year - TABLE_START_YEAR) * len(JIEQI_NAMES) + JIEQI_NAMES.index(name)
+    return _entry(pos)[1]
+
+
+def _time_zhi_index(hour: int) -> int:
+    """与 lunar_python 一致：23点记为亥时之后的子时(11)，其余按两小时一个时辰"""
+    return 11 if hour == 23 else (hour + 1) // 2
+
+
+def _add_years_months_days(moment: datetime.datetime, years: int, months: int, days: int) -> datetime.datetime:
+    """依次加年、月、日，月末日期按 lunar_python 的规则截断"""
+    year = moment.year + years
+    day = moment.day
+    if moment.month == 2 and day > 28 and not calendar.isleap(year):
+        day = 28
+    year, month = divmod(year * 12 + moment.month - 1 + months, 12)
+    month += 1
+    day = min(day, calendar.monthrange(year, month)[1])
+    return moment.replace(year=year, month=month, day=day) + datetime.timedelta(days=days)
+
+
+def calc_yun_start(birth: datetime.datetime, forward: bool) -> Tuple[int, int, int, datetime.datetime]:
+    """
+    计算起运时间（与 lunar_python 的 Yun 默认流派一致：三天折一年，一天折四个月，一个时辰折十天）
+
+    Args:
+        birth: 公历出生时刻
+        forward: 是否顺推（阳男阴女）
+
+    Returns:
+        (起运年数, 起运月数, 起运天数, 起运的公历时刻)
+    """
+    if forward:
+        start, end = birth, next_jie(birth)
+    else:
+        start, end = prev_jie(birth), birth
+
+    hour_diff = _time_zhi_index(end.hour) - _time_zhi_index(start.hour)
+    day_diff = (end.date() - start.date()).days
+    if hour_diff < 0:
+        hour_diff += 12
+        day_diff -= 1
+    month_diff = hour_diff * 10 // 30
+    months = day_diff * 4 + month_diff
+    days = hour_diff * 10 - month_diff * 30
+    years, months = divmod(months, 12)
+
+    return years, months, days, _add_years_months_days(birth, years, months, days)
+
+
+def get_start_age(birth: datetime.datetime, forward: bool) -> Optional[int]:
+    """起运虚岁（第一步大运的起始年龄，与 DaYun.getStartAge() 一致），无法计算时返回None"""
+    try:
+        start_solar = calc_yun_start(birth, forward)[3]
+    except (RuntimeError, ValueError):
+        return None
+    return start_solar.year - birth.year + 1
+
+
+if __name__ == "__main__":
+    count = build_jieqi_table()
+    print(f"已生成节气表 {TABLE_PATH}：{TABLE_START_YEAR}～{TABLE_END_YEAR}年，共{count}个节气")
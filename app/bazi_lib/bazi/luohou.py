@@ -11,36 +11,25 @@ import time
 import datetime
 import collections
 
-from lunar_python import Lunar
 from colorama import init
 
-from ganzhi import Gan, Zhi, ymc, rmc, zhi_time, jis, zhi_atts, get_jizhu, datouxiu, xiaotouxiu
+from ganzhi import Gan, Zhi, ymc, rmc, zhi_time, jis, zhi_atts, get_jizhu
+from jieqi import jieqi_time
+from zeri import NINE_STARS, SEASON_HOUS as ji_hous, day_table, day_markers
 
-def get_hou(d, xiazhi, dongzhi):
-    cal_day = sxtwl.fromSolar(d.year, d.month, d.day)
-    lunar = Lunar.fromYmd(cal_day.getLunarYear(), cal_day.getLunarMonth(), cal_day.getLunarDay())
-    ba = lunar.getEightChar()
-    yun = ba.getYun(1)
-    
-    #　计算甲干相合    
-    gz = cal_day.getHourGZ(10)
-    yTG = cal_day.getYearGZ()
-    mTG = cal_day.getMonthGZ()
-    dTG  = cal_day.getDayGZ()
-    
-    
-    gans = Gans(year=Gan[yTG.tg], month=Gan[mTG.tg], 
-                day=Gan[dTG.tg])
-    zhis = Zhis(year=Zhi[yTG.dz], month=Zhi[mTG.dz], 
-                day=Zhi[dTG.dz])
+def get_hou(table, markers, i, xiazhi, dongzhi):
+    d = table['date'][i].item()
+    pillars = table['pillars'][i]
+    gans = Gans(year=Gan[pillars[0]], month=Gan[pillars[2]], day=Gan[pillars[4]])
+    zhis = Zhis(year=Zhi[pillars[1]], month=Zhi[pillars[3]], day=Zhi[pillars[5]])
     
     
     print("公历:", end='')
     print("{}年{}月{}日".format(d.year, d.month, d.day), end='')
     
-    Lleap = "闰" if cal_day.isLunarLeap() else ""
+    Lleap = "闰" if table['lunar_leap'][i] else ""
     print("\t农:", end='')
-    print("{}年{}{}月{}日  ".format(cal_day.getLunarYear(), Lleap,cal_day.getLunarMonth(), cal_day.getLunarDay()), end='')
+    print("{}年{}{}月{}日  ".format(table['lunar_year'][i], Lleap, table['lunar_month'][i], table['lunar_day'][i]), end='')
     print(' ',end='')
     print(''.join([''.join(item) for item in zip(gans, zhis)]), end='')
     
@@ -51,42 +40,35 @@ def get_hou(d, xiazhi, dongzhi):
     
     day_ganzhi = gans[2] + zhis[2]
     
-    if day_ganzhi == year_hous[zhis[0]]:
+    if markers['年猴'][i]:
         print(" 年猴:{}年{}日".format(zhis[0], day_ganzhi), end=' ')
     
-    if zhis[2] == yue_hous[cal_day.getLunarMonth()]:
+    if markers['月罗'][i]:
         print(" 月罗:{}日".format(zhis[2]), end=' ')
     
-    if day_ganzhi in tuple(ji_hous.values()):       
-        birthday = d  
-        for i in range(30):    
-            day_ = sxtwl.fromSolar(birthday.year, birthday.month, birthday.day)
-            if day_.hasJieQi():
-                ji = jis[(day_.getJieQi() + 3)//6]
-                break        
-            birthday += datetime.timedelta(days=-1)
-           
-        if day_ganzhi == ji_hous[ji]:
-            print(" \t季猴:{}季{}日".format(ji, ji_hous[ji]), end=' ')    
+    if markers['季猴'][i]:
+        ji = jis[table['season'][i]]
+        print(" \t季猴:{}季{}日".format(ji, ji_hous[ji]), end=' ')    
             
-    if d >= xiazhi and d < dongzhi:
-        items = shi_feixings2[Zhi[dTG.dz]]
+    midnight = datetime.datetime(d.year, d.month, d.day)
+    if midnight >= xiazhi and midnight < dongzhi:
+        items = shi_feixings2[zhis.day]
     else:
-        items = shi_feixings1[Zhi[dTG.dz]]
+        items = shi_feixings1[zhis.day]
     print()   
-    print(" "*90, lunar.getDayNineStar(), end='')
+    print(" "*90, NINE_STARS[table['star'][i]], end='')
     for item in Zhi:
         print(" {}{}".format(item, items[item]), end='') 
     print()
     zeri = ""
-    if zhis.day == zhi_atts[zhis.year]["冲"]:
+    if markers['岁破'][i]:
         zeri += "\t岁破，大事不宜"
-    elif zhis.day == zhi_atts[zhis.month]["冲"]:
+    elif markers['月破'][i]:
         zeri += "\t月破，大事不宜" 
     #print(gans.day + zhis.day)
-    if gans.day + zhis.day in datouxiu:
+    if markers['大偷休'][i]:
         zeri += "\t大偷休" 
-    elif gans.day + zhis.day in xiaotouxiu:
+    elif markers['小偷休'][i]:
             zeri += "\t小偷休"    
     print(zeri)
 
@@ -110,13 +92,7 @@ mountains = {
     "庚":"", "酉":"", "辛":"", "戌":"", "乾":"", "亥":"", "壬":"", "子":"", "癸":"", "丑":"", "艮":"", "寅":"", }
 
 
-year_hous = {'子':'癸酉', '丑':'甲戌', '寅':'丁亥', '卯':'甲子', '辰':'乙丑', 
-             '巳':'甲寅', '午':'丁卯', '未':'甲辰', '申':'己巳', '酉':'甲午', 
-             '戌':'丁未', '亥':'甲申'}
 
-ji_hous = {'春':'乙卯','夏':'丙午','秋':'庚申','冬':'辛酉'}
-yue_hous = {1:'亥', 2:'子', 3:'丑', 4:'寅', 5:'卯', 6:'辰', 
-            7:'巳', 8:'午', 9:'未', 10:'申', 11:'酉', 12:'戌'}
 shi_hous = {'子':'丑午', '丑':'巳亥', '寅':'寅午', '卯':'辰戌', '辰':'巳丑', 
             '巳':'辰戌', '午':'卯申', '未':'午辰', '申':'戌丑', '酉':'子午', 
             '戌':'卯午', '亥':'辰卯'}
@@ -240,23 +216,13 @@ print("日压祭主", day_yas)
 print('-'*120)
 
 #计算夏至日、冬至日
-lunar = Lunar.fromYmd(d.year, d.month, d.day)
-jieqis = lunar.getJieQiTable()
-#start = datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S")
-#print("去年冬至", jieqis['冬至'].toFullString())
-#print("雨水", jieqis['雨水'].toFullString())
-#print("谷雨", jieqis['谷雨'].toFullString())
-#print("夏至", jieqis['夏至'].toFullString())
-#print("处暑", jieqis['处暑'].toFullString())
-#print("霜降", jieqis['霜降'].toFullString())
-#print("今年冬至", jieqis['DONG_ZHI'].toFullString())
-xiazhi = datetime.datetime.strptime(' '.join(jieqis['夏至'].toFullString().split(' ')[:2]), "%Y-%m-%d %H:%M:%S")
-dongzhi = datetime.datetime.strptime(' '.join(jieqis['DONG_ZHI'].toFullString().split(' ')[:2]), "%Y-%m-%d %H:%M:%S")
-
-
-
-get_hou(d, xiazhi, dongzhi)      
-
-for i in range(1,options.n):
-    d_ = d + datetime.timedelta(days=i)
-    get_hou(d_,  xiazhi, dongzhi)  
\ No newline at end of file
+xiazhi = jieqi_time(d.year, '夏至')
+dongzhi = jieqi_time(d.year, '冬至')
+
+
+
+# 整段日期一次排出逐日四柱与忌日标记
+table = day_table(d.date(), d.date() + datetime.timedelta(days=max(options.n, 1) - 1))
+markers = day_markers(table)
+for i in range(len(table['date'])):
+    get_hou(table, markers, i, xiazhi, dongzhi)  
\ No newline at end of file
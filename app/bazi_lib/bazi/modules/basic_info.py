@@ -25,6 +25,17 @@ except ImportError:
         Gan = ['甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '壬', '癸']
         Zhi = ['子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥']
 
+try:
+    from ..jieqi import calc_yun_start, prev_jieqi, next_jieqi
+except ImportError:
+    try:
+        from jieqi import calc_yun_start, prev_jieqi, next_jieqi
+    except ImportError:
+        # 节气表不可用时，节气与上运时间按简化方法估算
+        calc_yun_start = None
+        prev_jieqi = None
+        next_jieqi = None
+
 
 class BasicInfoModule:
     """基本信息输出模块"""
@@ -123,8 +134,28 @@ class BasicInfoModule:
             tai_yuan_zhi_idx = (self.month + 1) % 12
             self.tai_yuan = Gan[tai_yuan_gan_idx] + Zhi[tai_yuan_zhi_idx]
 
+    def _birth_datetime(self) -> Optional[datetime.datetime]:
+        """公历出生时刻（含分秒），无法确定时返回None"""
+        try:
+            return datetime.datetime(self.solar_info['year'], self.solar_info['month'], self.solar_info['day'],
+                                     self.solar_info.get('hour', self.hour), self.solar_info.get('minute', 0),
+                                     self.solar_info.get('second', 0))
+        except (KeyError, TypeError, ValueError):
+            return None
+
     def _calculate_shang_yun_time(self):
         """计算上运时间"""
+        birth = self._birth_datetime()
+        year_gan = self.gans.get('year', '')
+        if calc_yun_start and birth and year_gan in Gan:
+            try:
+                # 阳男阴女顺推至下一节，阴男阳女逆推至上一节
+                forward = (Gan.index(year_gan) % 2 == 0) != self.is_female
+                self.shang_yun_time = calc_yun_start(birth, forward)[3].strftime("%Y-%m-%d")
+                return
+            except (RuntimeError, ValueError):
+                pass
+        
         try:
             # 简化计算上运时间
             # 一般男命阳年顺行，女命阴年顺行，起运年龄约8岁左右
@@ -155,8 +186,13 @@ class BasicInfoModule:
     def _calculate_jieqi_info(self):
         """计算节气信息"""
         try:
-            # 简化的节气计算
-            self._simple_jieqi_calculation()
+            birth = self._birth_datetime()
+            if prev_jieqi and next_jieqi and birth:
+                # 节气表二分查找（按天计，与lunar_python的getPrevJieQi(True)一致）
+                self._table_jieqi_calculation(birth)
+            else:
+                # 简化的节气计算
+                self._simple_jieqi_calculation()
                 
             # 构建节气信息
             self._build_jieqi_info()
@@ -165,6 +201,20 @@ class BasicInfoModule:
             self._simple_jieqi_calculation()
             self._build_jieqi_info()
 
+    def _table_jieqi_calculation(self, birth: datetime.datetime):
+        """从节气表查出生前后的节气"""
+        current_name, current_time = prev_jieqi(birth, whole_day=True)
+        next_name, next_time = next_jieqi(birth, whole_day=True)
+        
+        self.current_jieqi = {
+            'name': current_name,
+            'time': current_time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+        self.next_jieqi = {
+            'name': next_name,
+            'time': next_time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+
     def _simple_jieqi_calculation(self):
         """简化的节气计算"""
         # 24节气名称
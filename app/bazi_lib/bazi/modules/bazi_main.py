@@ -51,6 +51,12 @@ except ImportError:
         }
 
 
+try:
+    from .deities import ganzhi_index, ten_deities_matrix, ten_deities_names, shen_histogram  # type: ignore
+except ImportError:
+    from deities import ganzhi_index, ten_deities_matrix, ten_deities_names, shen_histogram  # type: ignore
+
+
 class BaziMainModule:
     """八字主体分析模块"""
     
@@ -103,6 +109,7 @@ class BaziMainModule:
         self.zhi_shens = []  # 地支主气十神
         self.zhi_shens_all = []  # 地支所有藏干十神
         self.shens = []  # 所有十神
+        self.shen_hist = None  # 十神计数表，见 ganzhi.shen_histogram
         
         # 五行信息
         self.scores = {"金": 0, "木": 0, "水": 0, "火": 0, "土": 0}  # 五行分数
@@ -138,16 +145,18 @@ class BaziMainModule:
 
     def _calculate_ten_gods(self):
         """计算十神"""
-        if not self.me or not ten_deities or self.me not in ten_deities:
+        if not self.me or self.me not in ganzhi_index:
             return
         
+        me_row = ten_deities_matrix[ganzhi_index[self.me]]
+        
         # 计算天干十神
         self.gan_shens = []
         for i, gan in enumerate(self.gans):
             if i == 2:  # 日主位置
                 self.gan_shens.append('--')
-            elif gan in ten_deities[self.me]:
-                self.gan_shens.append(ten_deities[self.me][gan])
+            elif gan in ganzhi_index:
+                self.gan_shens.append(ten_deities_names[me_row[ganzhi_index[gan]]])
             else:
                 self.gan_shens.append('--')
         
@@ -157,8 +166,8 @@ class BaziMainModule:
             if zhi in zhi5 and zhi5[zhi]:
                 # 找到地支中分数最高的藏干作为主气
                 main_gan = max(zhi5[zhi].keys(), key=lambda x: zhi5[zhi][x])
-                if main_gan in ten_deities[self.me]:
-                    self.zhi_shens.append(ten_deities[self.me][main_gan])
+                if main_gan in ganzhi_index:
+                    self.zhi_shens.append(ten_deities_names[me_row[ganzhi_index[main_gan]]])
                 else:
                     self.zhi_shens.append('--')
             else:
@@ -170,13 +179,16 @@ class BaziMainModule:
             zhi_all_shens = []
             if zhi in zhi5:
                 for gan in zhi5[zhi]:
-                    if gan in ten_deities[self.me]:
-                        shen = ten_deities[self.me][gan]
+                    if gan in ganzhi_index:
+                        shen = ten_deities_names[me_row[ganzhi_index[gan]]]
                         zhi_all_shens.append(shen)
             self.zhi_shens_all.append(zhi_all_shens)
         
         # 合并所有十神
         self.shens = self.gan_shens + self.zhi_shens
+        
+        # 十神计数表：各模块共享，计数直接按十神编号取值
+        self.shen_hist = shen_histogram(self.me, self.gans, self.zhis)
 
     def _calculate_wuxing_scores(self):
         """计算五行分数 - 使用专门的BaziScoreCalculator"""
@@ -187,14 +199,7 @@ class BaziMainModule:
                 from bazi_score import BaziScoreCalculator
             except ImportError:
                 try:
-                    # 添加路径后再次尝试绝对导入
-                    import sys
-                    import os
-                    current_dir = os.path.dirname(os.path.abspath(__file__))
-                    parent_dir = os.path.dirname(current_dir)
-                    if parent_dir not in sys.path:
-                        sys.path.insert(0, parent_dir)
-                    
+                    # 尝试绝对导入
                     from app.bazi_lib.bazi.modules.bazi_score import BaziScoreCalculator
                 except ImportError:
                     # 如果所有导入都失败，使用备用方法
@@ -203,7 +208,7 @@ class BaziMainModule:
         
         try:
             # 使用专门的分数计算器
-            calculator = BaziScoreCalculator(self.gans, self.zhis, self.me, self.shens)
+            calculator = BaziScoreCalculator(self.gans, self.zhis, self.me, self.shens, self.shen_hist)
             result = calculator.get_complete_analysis()
             
             # 更新分数数据
@@ -420,6 +425,7 @@ class BaziMainModule:
                 "zhi_shens": self.zhi_shens,
                 "zhi_shens_all": self.zhi_shens_all,
                 "all_shens": self.shens,
+                "histogram": self.shen_hist,
                 "helper_count": self.helper_count,
                 "drainer_count": self.drainer_count
             },
@@ -4,7 +4,7 @@
 按照原版bazi.py的精确逻辑实现
 """
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
 try:
     from ..datas import *  # type: ignore
@@ -21,14 +21,7 @@ except ImportError:
         from ganzhi import gan5, zhi5
     except ImportError:
         try:
-            # 添加路径后再次尝试导入
-            import sys
-            import os
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            parent_dir = os.path.dirname(current_dir)
-            if parent_dir not in sys.path:
-                sys.path.insert(0, parent_dir)
-            
+            # 尝试绝对导入
             from app.bazi_lib.bazi.datas import *  # type: ignore
             from app.bazi_lib.bazi.bazi_core import *  # type: ignore
             from app.bazi_lib.bazi.common import *  # type: ignore
@@ -43,10 +36,17 @@ except ImportError:
             Zhi = ['子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥']
 
 
+try:
+    from .deities import ganzhi_index, ten_deities_matrix, ten_deities_names, ten_deities_ids, ten_deities_inverse  # type: ignore
+except ImportError:
+    from deities import ganzhi_index, ten_deities_matrix, ten_deities_names, ten_deities_ids, ten_deities_inverse  # type: ignore
+
+
 class BaziScoreCalculator:
     """八字分数计算器 - 按照原版bazi.py的精确逻辑"""
     
-    def __init__(self, gans: List[str], zhis: List[str], me: str, shens: List[str]):
+    def __init__(self, gans: List[str], zhis: List[str], me: str, shens: List[str],
+                 shen_hist: Optional[Dict[str, Any]] = None):
         """
         初始化分数计算器
         
@@ -55,11 +55,13 @@ class BaziScoreCalculator:
             zhis: 四柱地支
             me: 日主
             shens: 十神列表
+            shen_hist: ganzhi.shen_histogram 的十神计数表，由 BaziMainModule 传入时不再逐个数十神
         """
         self.gans = gans
         self.zhis = zhis
         self.me = me
         self.shens = shens
+        self.shen_hist = shen_hist
         
         # 分数结果
         self.scores = {"金": 0, "木": 0, "水": 0, "火": 0, "土": 0}
@@ -109,28 +111,30 @@ class BaziScoreCalculator:
         me_status = []
         
         # 检查日主在各地支的状态
+        me_seq = ganzhi_index.get(self.me)
         for item in self.zhis:
-            if self.me in ten_deities and item in ten_deities[self.me]:
-                me_status.append(ten_deities[self.me][item])
-                if ten_deities[self.me][item] in ('长', '帝', '建'):
+            if me_seq is not None and item in ganzhi_index:
+                status = ten_deities_names[ten_deities_matrix[me_seq][ganzhi_index[item]]]
+                me_status.append(status)
+                if status in ('长', '帝', '建'):
                     self.weak = False
         
         # 如果还是身弱，再检查比劫和库的数量
         if self.weak:
-            if (self.shens.count('比') + me_status.count('库')) > 2:
+            bi_count = self.shen_hist['total'][ten_deities_ids['比']] if self.shen_hist else self.shens.count('比')
+            if (bi_count + me_status.count('库')) > 2:
                 self.weak = False
         
         # 计算强弱分数（原版逻辑：网上的计算）
         # strong = gan_scores[me_attrs_['比']] + gan_scores[me_attrs_['劫']] + gan_scores[me_attrs_['枭']] + gan_scores[me_attrs_['印']]
-        if self.me in ten_deities:
-            me_attrs_inverse = getattr(ten_deities[self.me], 'inverse', {})
+        if me_seq is not None:
+            me_inverse = ten_deities_inverse[me_seq]
             
             # 帮身分数：比劫印枭
             helper_score = 0
             for shen_type in ['比', '劫', '枭', '印']:
-                if shen_type in me_attrs_inverse:
-                    gan = me_attrs_inverse[shen_type]
-                    helper_score += self.gan_scores.get(gan, 0)
+                gan = Gan[me_inverse[ten_deities_ids[shen_type]]]
+                helper_score += self.gan_scores.get(gan, 0)
             
             self.strong_score = helper_score
         else:
@@ -4,13 +4,18 @@
 
 import collections
 import datetime
+import os
 from typing import Dict, Any, Optional, Tuple
 
 try:
-    from lunar_python import Lunar, Solar
+    from lunar_python import Lunar, Solar, LunarYear
 except ImportError:
     Solar = None
     Lunar = None
+    LunarYear = None
+
+# numpy 只在批量换算时才需要，首次调用时导入
+np = None
 
 try:
     from ..datas import *
@@ -24,11 +29,51 @@ except ImportError:
         Gan = ['甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '壬', '癸']
         Zhi = ['子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥']
 
+try:
+    from ..jieqi import TABLE_START_YEAR, TABLE_END_YEAR, jieqi_table
+except ImportError:
+    try:
+        from jieqi import TABLE_START_YEAR, TABLE_END_YEAR, jieqi_table
+    except ImportError:
+        TABLE_START_YEAR = TABLE_END_YEAR = 0
+        jieqi_table = None
+
+try:
+    from ..bazi_log import get_logger, record_fallback  # type: ignore
+except ImportError:
+    from bazi_log import get_logger, record_fallback  # type: ignore
+
+logger = get_logger(__name__)
+
+# 直接输入八字时反查出生时刻的公历年份范围（与 bazi.py -b 默认一致）
+BAZI_INPUT_YEARS = (1850, 2030)
+
 # Named tuples
 Gans = collections.namedtuple("Gans", "year month day time")
 Zhis = collections.namedtuple("Zhis", "year month day time")
 
 
+def reference_now() -> datetime.datetime:
+    """当前时刻；设置了环境变量 BAZI_REFERENCE_YEAR 时固定为该年最后一刻，便于回归比对"""
+    reference = os.environ.get('BAZI_REFERENCE_YEAR')
+    return datetime.datetime(int(reference), 12, 31, 23, 59, 59) if reference else datetime.datetime.now()
+
+
+def current_year() -> int:
+    """当前年份，同样受 BAZI_REFERENCE_YEAR 控制"""
+    return reference_now().year
+
+# 批量换算用常量：1970-01-01 为辛巳日（六十甲子第17位），
+# 节气表的第一个节（1800年小寒）起丁丑月（六十甲子第13位），儒略日2440588为1970-01-01
+_EPOCH_DAY_JIAZI = 17
+_FIRST_JIE_MONTH_JIAZI = 13
+_JULIAN_DAY_1970 = 2440588
+
+# 批量换算用表，首次使用时生成
+_day_tables = None
+_lunar_months = None
+
+
 class CoreBaseModule:
     """核心基础模块"""
     
@@ -52,6 +97,8 @@ class CoreBaseModule:
         self.month = month
         self.day = day
         self.hour = hour
+        self.minute = 0  # 直接输入八字时反查到的出生时刻可能落在节气交接的分秒上
+        self.second = 0
         self.gender = gender
         self.use_gregorian = use_gregorian
         self.is_leap = is_leap
@@ -71,6 +118,10 @@ class CoreBaseModule:
         self.zhus = None  # 四柱
         self.alls = None  # 所有干支
         
+        # 直接输入八字时的原始四柱与反查到的候选出生时刻
+        self.bazi_input = None
+        self.birth_candidates = []
+        
         # 执行计算
         self._calculate()
 
@@ -101,20 +152,49 @@ class CoreBaseModule:
                             raise Exception("lunar对象创建失败")
                             
                     except Exception as e:
-                        print(f"lunar-python计算失败: {e}")
+                        record_fallback(logger, 'lunar_python_failed', "lunar-python计算失败", e)
                         self._simple_time_conversion()
                 else:
                     # lunar-python库不可用，使用简化处理
-                    print("lunar-python库不可用，使用简化计算")
+                    record_fallback(logger, 'lunar_python_missing', "lunar-python库不可用，使用简化计算")
                     self._simple_time_conversion()
         except Exception as e:
-            print(f"时间转换错误: {e}")
+            if self.use_bazi_input:
+                raise
+            record_fallback(logger, 'convert_time', "时间转换错误", e)
             self._simple_time_conversion()
 
     def _handle_bazi_input(self):
-        """处理直接输入八字的情况"""
-        # 这里需要特殊处理，目前简化为普通计算
-        self._simple_time_conversion()
+        """
+        处理直接输入八字的情况：year/month/day/hour 为年月日时四柱（如 '甲子'）
+        
+        用四柱索引反查出生时刻，优先在 BAZI_INPUT_YEARS 内取不晚于当前时刻（reference_now）的最近一个，之后按公历时刻正常排盘
+        """
+        pillars = [str(value) for value in (self.year, self.month, self.day, self.hour)]
+        gans = [pillar[:1] for pillar in pillars]
+        zhis = [pillar[1:] for pillar in pillars]
+        self.bazi_input = ' '.join(pillars)
+        
+        try:
+            from ..pillar_index import find_birth_datetimes
+        except ImportError:
+            from pillar_index import find_birth_datetimes
+        self.birth_candidates = (find_birth_datetimes(gans, zhis, *BAZI_INPUT_YEARS)
+                                 or find_birth_datetimes(gans, zhis))
+        if not self.birth_candidates:
+            raise ValueError(f"八字 {self.bazi_input} 无对应的出生时刻")
+        if Solar is None:
+            raise RuntimeError("直接输入八字需要lunar_python")
+        
+        now = reference_now()
+        past = [moment for moment in self.birth_candidates if moment <= now]
+        birth = past[-1] if past else self.birth_candidates[0]
+        self.year, self.month, self.day, self.hour = birth.year, birth.month, birth.day, birth.hour
+        self.minute, self.second = birth.minute, birth.second
+        self.use_gregorian = True
+        self.is_leap = False
+        self.solar = Solar.fromYmdHms(birth.year, birth.month, birth.day, birth.hour, self.minute, self.second)
+        self.lunar = self.solar.getLunar()
 
     def _simple_time_conversion(self):
         """简化的时间转换"""
@@ -213,7 +293,7 @@ class CoreBaseModule:
 
     def get_result(self) -> Dict[str, Any]:
         """获取核心基础数据"""
-        return {
+        result = {
             "input_params": {
                 "year": self.year,
                 "month": self.month,
@@ -228,7 +308,10 @@ class CoreBaseModule:
                 "solar": {
                     "year": self.solar.getYear() if self.solar else self.year,
                     "month": self.solar.getMonth() if self.solar else self.month,
-                    "day": self.solar.getDay() if self.solar else self.day
+                    "day": self.solar.getDay() if self.solar else self.day,
+                    "hour": self.hour,
+                    "minute": self.minute,
+                    "second": self.second
                 },
                 "lunar": {
                     "year": self.lunar.getYear() if self.lunar else self.year,
@@ -255,6 +338,224 @@ class CoreBaseModule:
                 "alls": self.alls
             }
         }
+        if self.use_bazi_input:
+            result["time_info"]["bazi_input"] = self.bazi_input
+            result["time_info"]["birth_candidates"] = [
+                moment.strftime('%Y-%m-%d %H:%M:%S') for moment in self.birth_candidates]
+        return result
+
+
+def _require_numpy():
+    """导入 numpy（批量换算专用）"""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise RuntimeError("批量换算需要numpy")
+        np = numpy
+    return np
+
+
+def _pillar_day_tables():
+    """
+    批量换算用的逐日表（节气表覆盖范围内每天一项）
+    
+    每个四柱编码为8个int8（年干、年支、月干、月支、日干、日支、时干、时支）拼成的一个uint64：
+    day_codes[2*i]、day_codes[2*i+1] 为第i天交节前、交节后的年月日柱，jie_second[i] 为当天交节的秒数（无则为86400），
+    hour_codes[hour_keys[i] + 小时] 为时柱
+    """
+    global _day_tables
+    if _day_tables is None:
+        if jieqi_table is None:
+            raise RuntimeError("批量换算需要节气表")
+        _require_numpy()
+        # 十二节的交节时刻
+        jie = np.frombuffer(jieqi_table(), dtype=np.int64)[::2].copy()
+        first_day = int(jie[0] // 86400)
+        day_count = int(jie[-1] // 86400) + 1 - first_day
+        day_starts = (first_day + np.arange(day_count, dtype=np.int64)) * 86400
+        
+        # 每天零点时已过的节：第p个节为 TABLE_START_YEAR 起第 p // 12 年的第 p % 12 个节（0为小寒，1为立春）
+        passed = np.searchsorted(jie, day_starts, side='right') - 1
+        next_jie = jie[np.minimum(passed + 1, len(jie) - 1)]
+        jie_second = np.where(next_jie < day_starts + 86400, next_jie - day_starts, 86400).astype(np.int32)
+        
+        day_jiazi = (first_day + np.arange(day_count) + _EPOCH_DAY_JIAZI) % 60
+        codes = np.zeros((day_count, 2, 8), dtype=np.int8)
+        for after in (0, 1):
+            year_jiazi = ((passed + after - 1) // 12 + TABLE_START_YEAR - 4) % 60
+            month_jiazi = (passed + after + _FIRST_JIE_MONTH_JIAZI) % 60
+            codes[:, after, 0] = year_jiazi % 10
+            codes[:, after, 1] = year_jiazi % 12
+            codes[:, after, 2] = month_jiazi % 10
+            codes[:, after, 3] = month_jiazi % 12
+            codes[:, after, 4] = day_jiazi % 10
+            codes[:, after, 5] = day_jiazi % 12
+        
+        # 时柱按日干与小时查表：日柱按当天，晚子时（23点）的时干按次日日干起
+        hour_table = np.zeros((10, 24, 8), dtype=np.int8)
+        for day_gan in range(10):
+            for hour in range(24):
+                time_zhi = (hour + 1) // 2 % 12
+                hour_table[day_gan, hour, 6] = ((day_gan + (hour == 23)) % 5 * 2 + time_zhi) % 10
+                hour_table[day_gan, hour, 7] = time_zhi
+        
+        _day_tables = {
+            'first_second': int(jie[0]),
+            'last_second': int(jie[-1]),
+            'first_day': first_day,
+            'jie_second': jie_second,
+            'day_codes': codes.view(np.uint64).reshape(day_count * 2),
+            'hour_keys': (day_jiazi % 10 * 24).astype(np.int32),
+            'hour_codes': hour_table.view(np.uint64).reshape(240),
+        }
+    return _day_tables
+
+
+def _lunar_month_table(first_year: int = TABLE_START_YEAR, last_year: int = TABLE_END_YEAR - 1):
+    """
+    农历各月初一（距1970年的天数）与月长，第0～11列为正月至十二月，第12列为闰月
+    
+    逐年用 lunar_python 生成较慢，只补齐 first_year～last_year 中尚未生成的年份，未生成的行月长为0
+    """
+    global _lunar_months
+    if _lunar_months is None:
+        if LunarYear is None:
+            raise RuntimeError("批量农历换算需要lunar_python")
+        _require_numpy()
+        count = TABLE_END_YEAR - TABLE_START_YEAR
+        _lunar_months = (np.zeros((count, 13), dtype=np.int64), np.zeros((count, 13), dtype=np.int64),
+                         np.zeros(count, dtype=np.int64), np.zeros(count, dtype=bool))
+    starts, lengths, leap_months, filled = _lunar_months
+    first_year = max(first_year, TABLE_START_YEAR)
+    last_year = min(last_year, TABLE_END_YEAR - 1)
+    for year in range(first_year, last_year + 1):
+        row = year - TABLE_START_YEAR
+        if filled[row]:
+            continue
+        for lunar_month in LunarYear.fromYear(year).getMonths():
+            if lunar_month.getYear() != year:
+                continue
+            month = lunar_month.getMonth()
+            col = month - 1 if month > 0 else 12
+            if month < 0:
+                leap_months[row] = -month
+            starts[row, col] = lunar_month.getFirstJulianDay() - _JULIAN_DAY_1970
+            lengths[row, col] = lunar_month.getDayCount()
+        filled[row] = True
+    return starts, lengths, leap_months
+
+
+def _pillars_from_seconds(seconds) -> "np.ndarray":
+    """按公历时刻（距1970年的秒数）批量排四柱，每个时刻只做三次查表"""
+    tables = _pillar_day_tables()
+    if seconds.size and (seconds.min() < tables['first_second'] or seconds.max() >= tables['last_second']):
+        raise ValueError(f"超出节气表范围（{TABLE_START_YEAR}年小寒～{TABLE_END_YEAR}年大雪）")
+    
+    days = seconds // 86400
+    second_of_day = (seconds - days * 86400).astype(np.int32)
+    day_index = (days - tables['first_day']).astype(np.int32)
+    
+    codes = tables['day_codes'][day_index * 2 + (second_of_day >= tables['jie_second'][day_index])]
+    codes |= tables['hour_codes'][tables['hour_keys'][day_index] + second_of_day // 3600]
+    return codes.view(np.int8).reshape(seconds.size, 8)
+
+
+def to_pillars_batch(datetimes) -> "np.ndarray":
+    """
+    批量把公历时刻换算为四柱（与单条计算的 EightChar 一致：年柱以立春、月柱以节为界，晚子时不换日）
+    
+    Args:
+        datetimes: numpy datetime64 数组（北京时间）
+        
+    Returns:
+        (N, 8) 的 int8 数组，各列依次为年干、年支、月干、月支、日干、日支、时干、时支在 Gan/Zhi 中的序号
+    """
+    _require_numpy()
+    seconds = np.asarray(datetimes, dtype='datetime64[s]').astype(np.int64).ravel()
+    return _pillars_from_seconds(seconds)
+
+
+def lunar_to_solar_batch(years, months, days, is_leap=None) -> "np.ndarray":
+    """
+    批量把农历日期换算为公历日期（首次用到某年时生成该年的农历月表）
+    
+    Args:
+        years: 农历年
+        months: 农历月（1～12）
+        days: 农历日
+        is_leap: 是否闰月，缺省为全部非闰月
+        
+    Returns:
+        datetime64[D] 数组
+    """
+    _require_numpy()
+    years = np.asarray(years, dtype=np.int64).ravel()
+    starts, lengths, leap_months = _lunar_month_table(int(years.min()), int(years.max())) if years.size \
+        else _lunar_month_table(0, -1)
+    months = np.asarray(months, dtype=np.int64).ravel()
+    days = np.asarray(days, dtype=np.int64).ravel()
+    leap = np.zeros(years.shape, dtype=bool) if is_leap is None else np.asarray(is_leap, dtype=bool).ravel()
+    
+    rows = years - TABLE_START_YEAR
+    if np.any((rows < 0) | (rows >= len(leap_months)) | (months < 1) | (months > 12)):
+        raise ValueError(f"农历年月超出范围（{TABLE_START_YEAR}～{TABLE_END_YEAR - 1}年）")
+    if np.any(leap & (leap_months[rows] != months)):
+        raise ValueError("闰月不存在")
+    cols = np.where(leap, 12, months - 1)
+    if np.any((days < 1) | (days > lengths[rows, cols])):
+        raise ValueError("农历日期不存在")
+    
+    return (starts[rows, cols] + days - 1).astype('datetime64[D]')
+
+
+def solar_to_lunar_batch(dates) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    批量把公历日期换算为农历日期（lunar_to_solar_batch 的逆运算）
+
+    Args:
+        dates: numpy datetime64 数组
+
+    Returns:
+        (农历年, 农历月, 农历日, 是否闰月)，月份为 1～12
+    """
+    _require_numpy()
+    days = np.asarray(dates, dtype='datetime64[D]').astype(np.int64).ravel()
+    # 公历某年的日子落在农历上一年或当年
+    solar_years = days.astype('datetime64[D]').astype('datetime64[Y]').astype(np.int64) + 1970
+    starts, lengths, leap_months = _lunar_month_table(int(solar_years.min()) - 1, int(solar_years.max())) \
+        if days.size else _lunar_month_table(0, -1)
+
+    valid = lengths.ravel() > 0
+    month_starts = starts.ravel()[valid]
+    order = np.argsort(month_starts, kind='stable')
+    month_starts = month_starts[order]
+    years = (np.arange(starts.size) // 13 + TABLE_START_YEAR)[valid][order]
+    cols = (np.arange(starts.size) % 13)[valid][order]
+    months = np.where(cols == 12, leap_months[years - TABLE_START_YEAR], cols + 1)
+
+    pos = np.searchsorted(month_starts, days, side='right') - 1
+    if np.any(pos < 0) or np.any(days >= month_starts[-1] + lengths.ravel()[valid][order][-1]):
+        raise ValueError(f"公历日期超出农历月表范围（{TABLE_START_YEAR}～{TABLE_END_YEAR - 1}年）")
+    return years[pos], months[pos], days - month_starts[pos] + 1, cols[pos] == 12
+
+
+def lunar_to_pillars_batch(years, months, days, hours, is_leap=None) -> "np.ndarray":
+    """
+    批量把农历时刻换算为四柱
+    
+    Args:
+        years, months, days: 农历年、月、日
+        hours: 小时
+        is_leap: 是否闰月，缺省为全部非闰月
+        
+    Returns:
+        同 to_pillars_batch
+    """
+    solar_days = lunar_to_solar_batch(years, months, days, is_leap).astype(np.int64)
+    seconds = solar_days * 86400 + np.asarray(hours, dtype=np.int64).ravel() * 3600
+    return _pillars_from_seconds(seconds)
 
 
 def test_core_base():
@@ -3,6 +3,8 @@
 包含大运计算、大运与命局关系分析、大运吉凶评估等功能
 """
 
+import collections
+import datetime
 from typing import Dict, Any, List, Tuple, Optional
 
 try:
@@ -16,14 +18,12 @@ try:
     from ..bazi_core import *  # type: ignore
     from ..common import *  # type: ignore
     from ..ganzhi import *  # type: ignore
-    from ..data.zhi5 import zhi5  # type: ignore
 except ImportError:
     try:
         from datas import *  # type: ignore
         from bazi_core import *  # type: ignore
         from common import *  # type: ignore
         from ganzhi import *  # type: ignore
-        from data.zhi5 import zhi5  # type: ignore
     except ImportError:
         # 设置默认的大运相关数据
         Gan = ['甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '壬', '癸']
@@ -74,6 +74,52 @@ except ImportError:
             return '+' if x in ['甲', '丙', '戊', '庚', '壬', '子', '寅', '辰', '午', '申', '戌'] else '-'
 
 
+try:
+    from .deities import ganzhi_index, ten_deities_matrix, ten_deities_names  # type: ignore
+except ImportError:
+    from deities import ganzhi_index, ten_deities_matrix, ten_deities_names  # type: ignore
+
+try:
+    from ..jieqi import get_start_age  # type: ignore
+except ImportError:
+    try:
+        from jieqi import get_start_age  # type: ignore
+    except ImportError:
+        get_start_age = None
+
+try:
+    from ..bazi_log import get_logger, record_fallback  # type: ignore
+except ImportError:
+    from bazi_log import get_logger, record_fallback  # type: ignore
+
+try:
+    from ..bazi_cache import LRUCache  # type: ignore
+except ImportError:
+    from bazi_cache import LRUCache  # type: ignore
+
+logger = get_logger(__name__)
+
+# 四柱具名元组（神煞查询按 year/month/day/time 取柱）
+Pillars = collections.namedtuple("Pillars", "year month day time")
+
+# 六十甲子，第k位为 Gan[k % 10] + Zhi[k % 12]
+_jiazi = [Gan[k % 10] + Zhi[k % 12] for k in range(60)]
+
+# 大运单步分析缓存：每步大运的分析只与命局八字和大运干支有关，与起运年龄、性别无关，
+# 以命局八字与大运干支为键跨用户共享，满了淘汰最久未用的条目
+_DAYUN_STEP_CACHE_SIZE = 4096
+_dayun_step_cache = LRUCache('dayun_step', _DAYUN_STEP_CACHE_SIZE)
+
+
+def _copy_tree(value):
+    """复制缓存中的嵌套字典和列表，避免调用方修改结果时污染缓存"""
+    if isinstance(value, dict):
+        return {key: _copy_tree(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_tree(item) for item in value]
+    return value
+
+
 class DayunAnalysisModule:
     """大运分析模块"""
     
@@ -131,6 +177,7 @@ class DayunAnalysisModule:
         self.dayun_details = []     # 大运详细分析
         self.dayun_relationships = [] # 大运与命局关系
         self.dayun_evaluations = [] # 大运吉凶评估
+        self._step_analyses = {}    # 本命盘各步大运的单步分析，详情与关系两处共用，每步只查一次缓存
         
         # 执行计算
         self._calculate()
@@ -141,6 +188,8 @@ class DayunAnalysisModule:
         self._calculate_dayun_list()
         self._analyze_dayun_details()
         self._analyze_dayun_relationships()
+        # 单步分析引用的是缓存本体，用完即释放，不随命盘一起保留
+        self._step_analyses = {}
         self._evaluate_dayun_fortune()
 
     def _calculate_dayun_direction(self):
@@ -160,25 +209,30 @@ class DayunAnalysisModule:
             else:
                 self.direction = -1 if is_yang_year else 1
             
-            # 使用lunar_python精确计算起运年龄
-            if self.ba_object and not self.use_bazi_input:
-                try:
-                    yun = self.ba_object.getYun(not self.is_female)
-                    if yun:
-                        self.start_age = yun.getStartAge()
-                    else:
-                        self.start_age = 8  # 默认起运年龄
-                except:
-                    self.start_age = 8
-            else:
-                # 简化的起运年龄计算
-                self.start_age = 8 if not self.is_female else 7
+            # 按节气表推算起运年龄
+            self.start_age = self._calculate_start_age()
                 
         except Exception as e:
-            print(f"计算大运方向错误: {e}")
+            record_fallback(logger, 'calculate_dayun_direction', "计算大运方向错误", e)
             self.direction = 1
             self.start_age = 8
 
+    def _calculate_start_age(self) -> int:
+        """根据出生时刻到前后节的距离推算起运虚岁，无法推算时使用默认值"""
+        default_age = 8 if not self.is_female else 7
+        if get_start_age is None or not isinstance(self.solar, dict):
+            return default_age
+        
+        try:
+            birth = datetime.datetime(self.solar['year'], self.solar['month'], self.solar['day'],
+                                      self.solar.get('hour', self.hour), self.solar.get('minute', 0),
+                                      self.solar.get('second', 0))
+        except (KeyError, TypeError, ValueError):
+            return default_age
+        
+        start_age = get_start_age(birth, self.direction == 1)
+        return start_age if start_age is not None else default_age
+
     def _calculate_dayun_list(self):
         """计算大运列表"""
         if not self.gans or not self.zhis or len(self.gans) < 2 or len(self.zhis) < 2:
@@ -189,17 +243,14 @@ class DayunAnalysisModule:
             month_gan = self.gans[1] if isinstance(self.gans, list) else self.gans.month
             month_zhi = self.zhis[1] if isinstance(self.zhis, list) else self.zhis.month
             
-            gan_seq = Gan.index(month_gan)
-            zhi_seq = Zhi.index(month_zhi)
+            # 月柱在六十甲子中的序号，第i步大运即按方向偏移i位
+            base = (6 * Gan.index(month_gan) - 5 * Zhi.index(month_zhi)) % 60
             
             # 计算12步大运
             for i in range(12):
-                gan_seq += self.direction
-                zhi_seq += self.direction
-                
-                dayun_gan = Gan[gan_seq % 10]
-                dayun_zhi = Zhi[zhi_seq % 12]
-                dayun_ganzhi = dayun_gan + dayun_zhi
+                dayun_ganzhi = _jiazi[(base + (i + 1) * self.direction) % 60]
+                dayun_gan = dayun_ganzhi[0]
+                dayun_zhi = dayun_ganzhi[1]
                 
                 age = self.start_age + i * 10
                 
@@ -212,87 +263,103 @@ class DayunAnalysisModule:
                 })
                 
         except Exception as e:
-            print(f"计算大运列表错误: {e}")
+            record_fallback(logger, 'calculate_dayun_list', "计算大运列表错误", e)
 
     def _analyze_dayun_details(self):
         """分析大运详细信息"""
         for dayun in self.dayun_list:
             try:
-                gan = dayun['gan']
-                zhi = dayun['zhi']
-                ganzhi = dayun['ganzhi']
-                
-                # 十神分析
-                gan_shen = ten_deities.get(self.me, {}).get(gan, '--') if self.me in ten_deities else '--'
-                zhi_shen = ten_deities.get(self.me, {}).get(zhi, '--') if self.me in ten_deities else '--'
-                
-                # 纳音分析
-                nayin = nayins.get((gan, zhi), f"{ganzhi}纳音")
-                
-                # 阴阳性质
-                gan_yinyang = yinyang(gan)
-                zhi_yinyang = yinyang(zhi)
-                
-                # 与命局的重复关系
-                is_repeat = (gan, zhi) in self.zhus if self.zhus else False
-                repeat_mark = '*' if is_repeat else ' '
-                
-                # 地支藏干分析
-                zhi_canggan = self._analyze_zhi_canggan(zhi)
-                
-                # 地支关系分析
-                zhi_relations = self._analyze_zhi_relations_with_mingju(zhi)
-                
-                # 空亡分析
-                empty_info = self._check_empty(zhi)
-                
-                # 夹拱分析
-                jia_gong_info = self._analyze_jia_gong(gan, zhi)
-                
-                # 神煞分析
-                shens_info = self._get_dayun_shens(gan, zhi)
-                
-                # 天干特殊检查
-                gan_check = self._check_gan_special(gan)
+                step = self._get_step_analysis(dayun['gan'], dayun['zhi'])
+                ten_gods = _copy_tree(step['ten_gods'])
+                properties = _copy_tree(step['properties'])
+                zhi_analysis = _copy_tree(step['zhi_analysis'])
+                special_analysis = _copy_tree(step['special_analysis'])
                 
                 detail = {
                     'dayun_info': dayun,
-                    'ten_gods': {
-                        'gan_shen': gan_shen,
-                        'zhi_shen': zhi_shen
-                    },
-                    'properties': {
-                        'nayin': nayin,
-                        'gan_yinyang': gan_yinyang,
-                        'zhi_yinyang': zhi_yinyang,
-                        'is_repeat': is_repeat,
-                        'repeat_mark': repeat_mark
-                    },
-                    'zhi_analysis': {
-                        'canggan': zhi_canggan,
-                        'relations': zhi_relations,
-                        'empty_info': empty_info
-                    },
-                    'special_analysis': {
-                        'jia_gong': jia_gong_info,
-                        'shens': shens_info,
-                        'gan_check': gan_check
-                    },
-                    'formatted_line': self._format_dayun_line(dayun, gan_shen, zhi_shen, nayin, 
-                                                            zhi_canggan, zhi_relations, empty_info, 
-                                                            repeat_mark, jia_gong_info, shens_info, gan_check)
+                    'ten_gods': ten_gods,
+                    'properties': properties,
+                    'zhi_analysis': zhi_analysis,
+                    'special_analysis': special_analysis,
+                    'formatted_line': self._format_dayun_line(dayun, ten_gods['gan_shen'], ten_gods['zhi_shen'],
+                                                            properties['nayin'], zhi_analysis['canggan'],
+                                                            zhi_analysis['relations'], zhi_analysis['empty_info'],
+                                                            properties['repeat_mark'], special_analysis['jia_gong'],
+                                                            special_analysis['shens'], special_analysis['gan_check'])
                 }
                 
                 self.dayun_details.append(detail)
                 
             except Exception as e:
-                print(f"分析大运详情错误: {e}")
+                record_fallback(logger, 'analyze_dayun_details', "分析大运详情错误", e)
                 # 添加简化的大运信息
                 self.dayun_details.append({
                     'dayun_info': dayun,
                     'formatted_line': f"{dayun['age']:>2d}       {dayun['ganzhi']}"
                 })
 
+    def _get_step_analysis(self, gan: str, zhi: str) -> Dict[str, Any]:
+        """获取单步大运的分析结果（按命局四柱与大运干支缓存，返回值为缓存本体，使用时需复制）"""
+        step = self._step_analyses.get((gan, zhi))
+        if step is None:
+            cache_key = (*self.gans, *self.zhis, gan, zhi)
+            step = _dayun_step_cache.get(cache_key)
+            if step is None:
+                step = _dayun_step_cache.put(cache_key, self._analyze_dayun_step(gan, zhi))
+            self._step_analyses[(gan, zhi)] = step
+        return step
+
+    def _analyze_dayun_step(self, gan: str, zhi: str) -> Dict[str, Any]:
+        """分析单步大运：十神、纳音、藏干、地支关系、空亡、夹拱、神煞及与命局的关系"""
+        ganzhi = gan + zhi
+        
+        # 十神分析
+        gan_shen = self._ten_deity(gan, '--')
+        zhi_shen = self._ten_deity(zhi, '--')
+        
+        # 纳音分析
+        nayin = nayins.get((gan, zhi), f"{ganzhi}纳音")
+        
+        # 与命局的重复关系
+        is_repeat = ganzhi in self.zhus if self.zhus else False
+        
+        # 天干、地支与命局的关系
+        gan_relationships = self._analyze_gan_relationships(gan)
+        zhi_relationships = self._analyze_zhi_relationships(zhi)
+        
+        return {
+            'ten_gods': {
+                'gan_shen': gan_shen,
+                'zhi_shen': zhi_shen
+            },
+            'properties': {
+                'nayin': nayin,
+                'gan_yinyang': yinyang(gan),
+                'zhi_yinyang': yinyang(zhi),
+                'is_repeat': is_repeat,
+                'repeat_mark': '*' if is_repeat else ' '
+            },
+            'zhi_analysis': {
+                'canggan': self._analyze_zhi_canggan(zhi),
+                'relations': self._analyze_zhi_relations_with_mingju(zhi),
+                'empty_info': self._check_empty(zhi)
+            },
+            'special_analysis': {
+                'jia_gong': self._analyze_jia_gong(gan, zhi),
+                'shens': self._get_dayun_shens(gan, zhi),
+                'gan_check': self._check_gan_special(gan)
+            },
+            'gan_relationships': gan_relationships,
+            'zhi_relationships': zhi_relationships,
+            'overall_impact': self._evaluate_dayun_impact(gan, zhi, gan_relationships, zhi_relationships)
+        }
+
+    def _ten_deity(self, item: str, default: str) -> str:
+        """查十神矩阵：日主对天干的十神，或对地支的十二长生"""
+        if self.me not in ganzhi_index or item not in ganzhi_index:
+            return default
+        return ten_deities_names[ten_deities_matrix[ganzhi_index[self.me]][ganzhi_index[item]]]
+
     def _analyze_zhi_canggan(self, zhi: str) -> str:
         """分析地支藏干"""
         if zhi not in zhi5:
@@ -300,7 +367,7 @@ class DayunAnalysisModule:
         
         canggan_parts = []
         for gan, score in zhi5[zhi].items():
-            shen = ten_deities.get(self.me, {}).get(gan, '') if self.me in ten_deities else ''
+            shen = self._ten_deity(gan, '')
             canggan_parts.append(f"{gan}{shen}")
         
         return '　'.join(canggan_parts)
@@ -354,7 +421,7 @@ class DayunAnalysisModule:
         
         try:
             # 以日柱为基准检查空亡
-            day_zhu = self.zhus[2] if len(self.zhus) > 2 else None
+            day_zhu = (self.gans[2], self.zhis[2]) if len(self.gans) > 2 and len(self.zhis) > 2 else None
             if day_zhu and day_zhu in empties and zhi in empties[day_zhu]:
                 return '空'
             else:
@@ -390,14 +457,14 @@ class DayunAnalysisModule:
             return '  '.join(jia_gong_parts)
             
         except Exception as e:
-            print(f"夹拱分析错误: {e}")
+            record_fallback(logger, 'analyze_jia_gong', "夹拱分析错误", e)
             return ""
 
     def _get_dayun_shens(self, gan: str, zhi: str) -> str:
         """获取大运神煞"""
         try:
             if 'get_shens' in globals():
-                return get_shens(self.gans, self.zhis, gan, zhi)
+                return get_shens(Pillars(*self.gans), Pillars(*self.zhis), gan, zhi)
             else:
                 return ""
         except:
@@ -457,7 +524,7 @@ class DayunAnalysisModule:
             return line
             
         except Exception as e:
-            print(f"格式化大运行错误: {e}")
+            record_fallback(logger, 'format_dayun_line', "格式化大运行错误", e)
             return f"{dayun['age']:>2d}       {dayun['ganzhi']}"
 
     def _analyze_dayun_relationships(self):
@@ -465,30 +532,20 @@ class DayunAnalysisModule:
         for i, detail in enumerate(self.dayun_details):
             try:
                 dayun_info = detail['dayun_info']
-                gan = dayun_info['gan']
-                zhi = dayun_info['zhi']
-                
-                # 分析天干关系
-                gan_relationships = self._analyze_gan_relationships(gan)
-                
-                # 分析地支关系
-                zhi_relationships = self._analyze_zhi_relationships(zhi)
-                
-                # 分析整体影响
-                overall_impact = self._evaluate_dayun_impact(gan, zhi, gan_relationships, zhi_relationships)
+                step = self._get_step_analysis(dayun_info['gan'], dayun_info['zhi'])
                 
                 relationship = {
                     'dayun_step': i + 1,
                     'age_range': f"{dayun_info['age']}-{dayun_info['age'] + 9}",
-                    'gan_relationships': gan_relationships,
-                    'zhi_relationships': zhi_relationships,
-                    'overall_impact': overall_impact
+                    'gan_relationships': _copy_tree(step['gan_relationships']),
+                    'zhi_relationships': _copy_tree(step['zhi_relationships']),
+                    'overall_impact': _copy_tree(step['overall_impact'])
                 }
                 
                 self.dayun_relationships.append(relationship)
                 
             except Exception as e:
-                print(f"分析大运关系错误: {e}")
+                record_fallback(logger, 'analyze_dayun_relationships', "分析大运关系错误", e)
 
     def _analyze_gan_relationships(self, dayun_gan: str) -> Dict[str, Any]:
         """分析大运天干与命局天干的关系"""
@@ -533,7 +590,7 @@ class DayunAnalysisModule:
             return relationships
             
         except Exception as e:
-            print(f"分析天干关系错误: {e}")
+            record_fallback(logger, 'analyze_gan_relationships', "分析天干关系错误", e)
             return relationships
 
     def _analyze_zhi_relationships(self, dayun_zhi: str) -> Dict[str, Any]:
@@ -586,7 +643,7 @@ class DayunAnalysisModule:
             return relationships
             
         except Exception as e:
-            print(f"分析地支关系错误: {e}")
+            record_fallback(logger, 'analyze_zhi_relationships', "分析地支关系错误", e)
             return relationships
 
     def _evaluate_dayun_impact(self, gan: str, zhi: str, gan_rel: Dict, zhi_rel: Dict) -> Dict[str, Any]:
@@ -646,7 +703,7 @@ class DayunAnalysisModule:
             return impact
             
         except Exception as e:
-            print(f"评估大运影响错误: {e}")
+            record_fallback(logger, 'evaluate_dayun_impact', "评估大运影响错误", e)
             return impact
 
     def _evaluate_dayun_fortune(self):
@@ -698,7 +755,7 @@ class DayunAnalysisModule:
                 self.dayun_evaluations.append(evaluation)
                 
             except Exception as e:
-                print(f"评估大运吉凶错误: {e}")
+                record_fallback(logger, 'evaluate_dayun_fortune', "评估大运吉凶错误", e)
 
     def _calculate_shen_score(self, shen: str) -> int:
         """计算十神分数"""
@@ -0,0 +1,26 @@
+"""
+十神查表 - 各分析模块共用的十神矩阵与十神计数表
+
+分析模块统一从这里导入，不必各自处理 ganzhi 的导入方式；ganzhi 不可用时给出按缺省值处理的替身：
+查不到任何干支的十神，十神计数一律为 0。
+"""
+
+try:
+    from ..ganzhi import (ganzhi_index, ten_deities_matrix, ten_deities_names, ten_deities_ids,  # type: ignore
+                          ten_deities_inverse, shen_histogram, shen_total)
+except ImportError:
+    try:
+        from ganzhi import (ganzhi_index, ten_deities_matrix, ten_deities_names, ten_deities_ids,  # type: ignore
+                            ten_deities_inverse, shen_histogram, shen_total)
+    except ImportError:
+        ganzhi_index = {}
+        ten_deities_matrix = ()
+        ten_deities_names = ()
+        ten_deities_ids = {}
+        ten_deities_inverse = ()
+
+        def shen_histogram(me, gans, zhis):
+            return {kind: [0] * 10 for kind in ('gan', 'zhi', 'total', 'hidden', 'weighted')}
+
+        def shen_total(hist, *names, kind='total'):
+            return 0
@@ -48,6 +48,123 @@ except ImportError:
         }
 
 
+try:
+    from .deities import ganzhi_index, ten_deities_matrix, ten_deities_names  # type: ignore
+except ImportError:
+    from deities import ganzhi_index, ten_deities_matrix, ten_deities_names  # type: ignore
+
+
+# 各柱的静态明细（温度、建禄、空亡、藏干、纳音等）只取决于日主、柱位与干支，
+# 最多 10 日主 × 4 柱位 × 60 甲子种，首次用到时生成；返回的是表中记录的副本，调用方修改不会影响其他命盘
+PILLAR_LABELS = ['年', '月', '日', '时']
+_pillar_detail_table = {}
+_canggan_detail_table = {}
+_nayin_detail_table = {}
+
+
+def _empty_info(position: int) -> str:
+    """获取空亡信息（简化的空亡判断）"""
+    if position == 0:  # 年柱
+        return "建空"
+    elif position == 1:  # 月柱
+        return "冠空"
+    else:
+        return ""
+
+
+def pillar_detail(me: str, position: int, gan: str, zhi: str, he_info: str) -> Dict[str, Any]:
+    """某柱的年月日时明细记录，he_info 为该柱在本命盘中的合冲标记"""
+    key = (me, position, gan, zhi, he_info)
+    detail = _pillar_detail_table.get(key)
+    if detail is None:
+        gan_temp = temps.get(gan, 0)
+        zhi_temp = temps.get(zhi, 0)
+        
+        # 建禄信息：非日柱且能查到十神关系时
+        jian_info = ""
+        if position != 2 and me in ganzhi_index and gan in ganzhi_index:
+            jian_info = "建" if ten_deities_names[ten_deities_matrix[ganzhi_index[me]][ganzhi_index[gan]]] == '比' else ""
+        
+        empty_info = _empty_info(position)
+        label = PILLAR_LABELS[position]
+        detail = {
+            'position': label,
+            'gan': gan,
+            'zhi': zhi,
+            'gan_temp': gan_temp,
+            'zhi_temp': zhi_temp,
+            'jian_info': jian_info,
+            'he_info': he_info,
+            'empty_info': empty_info,
+            'formatted': f"【{label}】{gan_temp}:{zhi_temp}{jian_info}{he_info}{empty_info}"
+        }
+        _pillar_detail_table[key] = detail
+    return dict(detail)
+
+
+def canggan_detail(me: str, position: int, zhi: str) -> Dict[str, Any]:
+    """某柱地支的藏干明细记录"""
+    key = (me, position, zhi)
+    detail = _canggan_detail_table.get(key)
+    if detail is None:
+        canggan_list = []
+        for gan, score in zhi5[zhi].items():
+            element = gan5.get(gan, '未知')
+            shen = (ten_deities_names[ten_deities_matrix[ganzhi_index[me]][ganzhi_index[gan]]]
+                    if me in ganzhi_index and gan in ganzhi_index else '--')
+            canggan_list.append({
+                'gan': gan,
+                'score': score,
+                'element': element,
+                'shen': shen,
+                'formatted': f"{gan}{element}{shen}"
+            })
+        
+        detail = {
+            'position': position,
+            'zhi': zhi,
+            'canggan_list': canggan_list,
+            'formatted': '　'.join([item['formatted'] for item in canggan_list])
+        }
+        _canggan_detail_table[key] = detail
+    return {**detail, 'canggan_list': [dict(item) for item in detail['canggan_list']]}
+
+
+def _zhi_main_element(zhi: str) -> str:
+    """获取地支主要五行（分数最高的藏干）"""
+    if zhi in zhi5:
+        main_gan = max(zhi5[zhi].keys(), key=lambda x: zhi5[zhi][x])
+        return gan5.get(main_gan, '未知')
+    return '未知'
+
+
+def nayin_detail(position: int, gan: str, zhi: str) -> Dict[str, Any]:
+    """某柱的纳音明细记录"""
+    key = (position, gan, zhi)
+    detail = _nayin_detail_table.get(key)
+    if detail is None:
+        nayin = nayins.get((gan, zhi), f"{gan}{zhi}纳音")
+        
+        # 天干地支关系
+        gan_element = gan5.get(gan, '未知')
+        relation_symbol = relations.get((gan_element, _zhi_main_element(zhi)), '○')
+        
+        # 特殊标记：劫杀标记（简化，时柱）；元辰标记待补充
+        special_marks = ['劫杀'] if position == 3 else []
+        
+        detail = {
+            'position': position,
+            'gan': gan,
+            'zhi': zhi,
+            'nayin': nayin,
+            'relation_symbol': relation_symbol,
+            'special_marks': special_marks,
+            'formatted': f"{relation_symbol}{nayin}" + ('－' + '－'.join(special_marks) if special_marks else '')
+        }
+        _nayin_detail_table[key] = detail
+    return {**detail, 'special_marks': list(detail['special_marks'])}
+
+
 class DetailInfoModule:
     """详细信息模块"""
     
@@ -114,41 +231,13 @@ class DetailInfoModule:
 
     def _analyze_pillar_details(self):
         """分析年月日时柱详细信息"""
-        labels = ['年', '月', '日', '时']
-        
         for i, (gan, zhi) in enumerate(zip(self.gans, self.zhis)):
             if not gan or not zhi:
                 continue
-                
-            # 获取温度信息
-            gan_temp = temps.get(gan, 0)
-            zhi_temp = temps.get(zhi, 0)
             
-            # 获取建禄信息
-            jian_info = ""
-            if i != 2 and self.me in ten_deities and gan in ten_deities[self.me]:
-                # 非日柱且能查到十神关系时
-                jian_info = "建" if ten_deities[self.me][gan] == '比' else ""
-            
-            # 获取合冲关系
+            # 合冲关系与其他柱有关，其余部分查静态明细表
             he_info = self._get_gan_zhi_he(gan, zhi)
-            
-            # 空亡信息
-            empty_info = self._get_empty_info(i, zhi)
-            
-            pillar_detail = {
-                'position': labels[i],
-                'gan': gan,
-                'zhi': zhi,
-                'gan_temp': gan_temp,
-                'zhi_temp': zhi_temp,
-                'jian_info': jian_info,
-                'he_info': he_info,
-                'empty_info': empty_info,
-                'formatted': f"【{labels[i]}】{gan_temp}:{zhi_temp}{jian_info}{he_info}{empty_info}"
-            }
-            
-            self.pillar_details.append(pillar_detail)
+            self.pillar_details.append(pillar_detail(self.me, i, gan, zhi, he_info))
 
     def _analyze_gan_details(self):
         """分析天干详细信息"""
@@ -191,10 +280,10 @@ class DetailInfoModule:
             
             # 主要十神（对各天干的关系）
             zhi_shens_to_gans = []
-            if self.me in ten_deities:
+            if self.me in ganzhi_index:
                 for gan in self.gans:
-                    if gan and gan in ten_deities and zhi in ten_deities[gan]:
-                        zhi_shens_to_gans.append(ten_deities[gan][zhi])
+                    if gan and gan in ganzhi_index and zhi in ganzhi_index:
+                        zhi_shens_to_gans.append(ten_deities_names[ten_deities_matrix[ganzhi_index[gan]][ganzhi_index[zhi]]])
                     else:
                         zhi_shens_to_gans.append('--')
             
@@ -221,32 +310,7 @@ class DetailInfoModule:
         for i, zhi in enumerate(self.zhis):
             if not zhi or zhi not in zhi5:
                 continue
-            
-            canggan_list = []
-            for gan, score in zhi5[zhi].items():
-                # 五行属性
-                element = gan5.get(gan, '未知')
-                
-                # 十神
-                shen = ten_deities[self.me][gan] if self.me in ten_deities and gan in ten_deities[self.me] else '--'
-                
-                canggan_item = {
-                    'gan': gan,
-                    'score': score,
-                    'element': element,
-                    'shen': shen,
-                    'formatted': f"{gan}{element}{shen}"
-                }
-                canggan_list.append(canggan_item)
-            
-            canggan_detail = {
-                'position': i,
-                'zhi': zhi,
-                'canggan_list': canggan_list,
-                'formatted': '　'.join([item['formatted'] for item in canggan_list])
-            }
-            
-            self.canggan_details.append(canggan_detail)
+            self.canggan_details.append(canggan_detail(self.me, i, zhi))
 
     def _analyze_relations(self):
         """分析各种关系"""
@@ -284,36 +348,7 @@ class DetailInfoModule:
         for i, (gan, zhi) in enumerate(zip(self.gans, self.zhis)):
             if not gan or not zhi:
                 continue
-            
-            # 纳音
-            nayin = nayins.get((gan, zhi), f"{gan}{zhi}纳音")
-            
-            # 天干地支关系
-            gan_element = gan5.get(gan, '未知')
-            zhi_element = self._get_zhi_main_element(zhi)
-            relation_symbol = relations.get((gan_element, zhi_element), '○')
-            
-            # 特殊标记
-            special_marks = []
-            
-            # 劫杀标记（简化）
-            if i == 3:  # 时柱
-                special_marks.append('劫杀')
-            
-            # 元辰标记（简化）
-            # 这里可以添加更复杂的元辰判断逻辑
-            
-            nayin_info = {
-                'position': i,
-                'gan': gan,
-                'zhi': zhi,
-                'nayin': nayin,
-                'relation_symbol': relation_symbol,
-                'special_marks': special_marks,
-                'formatted': f"{relation_symbol}{nayin}" + ('－' + '－'.join(special_marks) if special_marks else '')
-            }
-            
-            self.nayin_info.append(nayin_info)
+            self.nayin_info.append(nayin_detail(i, gan, zhi))
 
     def _get_gan_zhi_he(self, gan: str, zhi: str) -> str:
         """获取干支合冲关系"""
@@ -343,13 +378,7 @@ class DetailInfoModule:
 
     def _get_empty_info(self, position: int, zhi: str) -> str:
         """获取空亡信息"""
-        # 简化的空亡判断
-        if position == 0:  # 年柱
-            return "建空"
-        elif position == 1:  # 月柱
-            return "冠空"
-        else:
-            return ""
+        return _empty_info(position)
 
     def _check_gan_special(self, gan: str, position: int) -> str:
         """检查天干特殊情况"""
@@ -363,11 +392,7 @@ class DetailInfoModule:
 
     def _get_zhi_main_element(self, zhi: str) -> str:
         """获取地支主要五行"""
-        if zhi in zhi5:
-            # 找到地支中分数最高的藏干
-            main_gan = max(zhi5[zhi].keys(), key=lambda x: zhi5[zhi][x])
-            return gan5.get(main_gan, '未知')
-        return '未知'
+        return _zhi_main_element(zhi)
 
     def _is_liu_he(self, zhi1: str, zhi2: str) -> bool:
         """判断是否为六合关系"""
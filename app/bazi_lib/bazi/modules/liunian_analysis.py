@@ -13,18 +13,14 @@ except ImportError:
     Lunar = None
 
 try:
-    from ..datas import Gan, Zhi, ten_deities, zhi_atts, nayins, empties
-    from ..bazi_core import check_gan  # type: ignore
-    from ..common import yinyang  # type: ignore
-    from ..ganzhi import get_shens  # type: ignore
-    from ..data.zhi5 import zhi5  # type: ignore
+    from ..datas import Gan, Zhi, ten_deities, zhi_atts, nayins, empties, zhi5  # type: ignore
+    from ..bazi_core import get_shens  # type: ignore
+    from ..common import check_gan, yinyang  # type: ignore
 except ImportError:
     try:
-        from .datas import Gan, Zhi, ten_deities, zhi_atts, nayins, empties  # type: ignore
-        from .bazi_core import check_gan  # type: ignore
-        from .common import yinyang  # type: ignore
-        from .ganzhi import get_shens  # type: ignore
-        from .data.zhi5 import zhi5  # type: ignore
+        from datas import Gan, Zhi, ten_deities, zhi_atts, nayins, empties, zhi5  # type: ignore
+        from bazi_core import get_shens  # type: ignore
+        from common import check_gan, yinyang  # type: ignore
     except ImportError:
         # 设置默认的流年相关数据
         Gan = ['甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '壬', '癸']
@@ -75,6 +71,37 @@ except ImportError:
             return '+' if x in ['甲', '丙', '戊', '庚', '壬', '子', '寅', '辰', '午', '申', '戌'] else '-'
 
 
+try:
+    from .deities import ganzhi_index, ten_deities_matrix, ten_deities_names  # type: ignore
+except ImportError:
+    from deities import ganzhi_index, ten_deities_matrix, ten_deities_names  # type: ignore
+
+
+def _load_scan_transits():
+    """transit 依赖 numpy，首次扫描时才导入，不拖慢分析器的导入；numpy 不可用时返回 None"""
+    try:
+        from ..transit import scan_transits  # type: ignore
+    except ImportError:
+        try:
+            from transit import scan_transits  # type: ignore
+        except ImportError:
+            return None
+    return scan_transits
+
+
+try:
+    from ..bazi_log import get_logger, record_fallback  # type: ignore
+except ImportError:
+    from bazi_log import get_logger, record_fallback  # type: ignore
+
+try:
+    from .core_base import current_year  # type: ignore
+except ImportError:
+    from core_base import current_year  # type: ignore
+
+logger = get_logger(__name__)
+
+
 class LiunianAnalysisModule:
     """流年分析模块"""
     
@@ -125,6 +152,7 @@ class LiunianAnalysisModule:
         # 大运信息
         self.dayun_list = dayun_analysis_data.get('dayun_list', [])
         self.start_age = dayun_analysis_data.get('basic_info', {}).get('start_age', 8)
+        self.direction = dayun_analysis_data.get('basic_info', {}).get('direction', 1)
         
         # 八字对象（用于精确计算）
         self.ba_object = self.time_info.get('ba_object')
@@ -136,7 +164,8 @@ class LiunianAnalysisModule:
         self.liunian_details = []       # 流年详细分析
         self.liunian_relationships = [] # 流年与大运命局关系
         self.liunian_evaluations = []   # 流年吉凶评估
-        self.current_year = datetime.datetime.now().year  # 当前年份
+        self.transit_events = []        # 一生流年事件 [(年份, 事件, 说明)]
+        self.current_year = current_year()  # 当前年份
         
         # 执行计算
         self._calculate()
@@ -147,6 +176,7 @@ class LiunianAnalysisModule:
         self._calculate_liunian_details()
         self._analyze_liunian_relationships()
         self._evaluate_liunian_fortune()
+        self._scan_transit_events()
 
     def _calculate_liunian_range(self):
         """计算流年范围"""
@@ -189,6 +219,21 @@ class LiunianAnalysisModule:
                 'dayun_info': dayun_info
             }
 
+    def _scan_transit_events(self):
+        """扫描流年范围内的伏吟、反吟、冲日支、三合三会、夹拱、天罗地网等事件"""
+        scan_transits = _load_scan_transits()
+        if scan_transits is None or not self.liunian_data:
+            return
+        
+        try:
+            natal = []
+            for gan, zhi in zip(self.gans, self.zhis):
+                natal.extend((Gan.index(gan), Zhi.index(zhi)))
+            self.transit_events = scan_transits(natal, self.year, self.start_age, self.direction == 1,
+                                                years=len(self.liunian_data))
+        except Exception as e:
+            record_fallback(logger, 'scan_transit_events', "扫描流年事件错误", e)
+
     def _year_to_ganzhi(self, year: int) -> str:
         """将公历年份转换为干支"""
         # 简化的年份转干支算法
@@ -229,8 +274,8 @@ class LiunianAnalysisModule:
                 dayun_info = liunian_info['dayun_info']
                 
                 # 十神分析
-                gan_shen = ten_deities.get(self.me, {}).get(gan, '--') if self.me in ten_deities else '--'
-                zhi_shen = ten_deities.get(self.me, {}).get(zhi, '--') if self.me in ten_deities else '--'
+                gan_shen = self._ten_deity(gan, '--')
+                zhi_shen = self._ten_deity(zhi, '--')
                 
                 # 纳音分析
                 nayin = nayins.get((gan, zhi), f"{gan}{zhi}纳音")
@@ -276,16 +321,16 @@ class LiunianAnalysisModule:
                 self.liunian_details.append(detail)
                 
             except Exception as e:
-                print(f"计算流年详情错误: {e}")
+                record_fallback(logger, 'calculate_liunian_details', "计算流年详情错误", e)
 
     def _get_key_years(self) -> List[int]:
         """获取关键年份（当前年及前后几年）"""
-        current_year = datetime.datetime.now().year
+        this_year = current_year()
         key_years = []
         
         # 当前年前后10年
         for i in range(-10, 11):
-            year = current_year + i
+            year = this_year + i
             if year in self.liunian_data:
                 key_years.append(year)
         
@@ -298,6 +343,12 @@ class LiunianAnalysisModule:
         
         return sorted(key_years)
 
+    def _ten_deity(self, item: str, default: str) -> str:
+        """查十神矩阵：日主对天干的十神，或对地支的十二长生"""
+        if self.me not in ganzhi_index or item not in ganzhi_index:
+            return default
+        return ten_deities_names[ten_deities_matrix[ganzhi_index[self.me]][ganzhi_index[item]]]
+
     def _analyze_zhi_canggan(self, zhi: str) -> str:
         """分析地支藏干"""
         if zhi not in zhi5:
@@ -305,7 +356,7 @@ class LiunianAnalysisModule:
         
         canggan_parts = []
         for gan, score in zhi5[zhi].items():
-            shen = ten_deities.get(self.me, {}).get(gan, '') if self.me in ten_deities else ''
+            shen = self._ten_deity(gan, '')
             canggan_parts.append(f"{gan}{shen}")
         
         return '　'.join(canggan_parts)
@@ -359,7 +410,7 @@ class LiunianAnalysisModule:
             relationships['special_combinations'] = special_combos
             
         except Exception as e:
-            print(f"分析流年关系错误: {e}")
+            record_fallback(logger, 'analyze_liunian_relationships_detailed', "分析流年关系错误", e)
         
         return relationships
 
@@ -425,7 +476,7 @@ class LiunianAnalysisModule:
                     combinations.append(f"三会{element}局")
             
         except Exception as e:
-            print(f"检查特殊组合错误: {e}")
+            record_fallback(logger, 'check_special_combinations', "检查特殊组合错误", e)
         
         return combinations
 
@@ -501,7 +552,7 @@ class LiunianAnalysisModule:
             return line
             
         except Exception as e:
-            print(f"格式化流年行错误: {e}")
+            record_fallback(logger, 'format_liunian_line', "格式化流年行错误", e)
             return f"{liunian_info['age']:>3d} {liunian_info['year']:<5d}{liunian_info['ganzhi']}"
 
     def _analyze_liunian_relationships(self):
@@ -539,7 +590,7 @@ class LiunianAnalysisModule:
                 self.liunian_relationships.append(relationship)
                 
             except Exception as e:
-                print(f"分析流年关系错误: {e}")
+                record_fallback(logger, 'analyze_liunian_relationships', "分析流年关系错误", e)
 
     def _analyze_relationships_with_mingju(self, liunian_gan: str, liunian_zhi: str) -> Dict[str, int]:
         """分析与命局的关系"""
@@ -570,7 +621,7 @@ class LiunianAnalysisModule:
                     relationships['neutral_score'] += 1
             
         except Exception as e:
-            print(f"分析与命局关系错误: {e}")
+            record_fallback(logger, 'analyze_relationships_with_mingju', "分析与命局关系错误", e)
         
         return relationships
 
@@ -604,7 +655,7 @@ class LiunianAnalysisModule:
                 relationships['neutral_score'] += 1
             
         except Exception as e:
-            print(f"分析与大运关系错误: {e}")
+            record_fallback(logger, 'analyze_relationships_with_dayun', "分析与大运关系错误", e)
         
         return relationships
 
@@ -625,7 +676,7 @@ class LiunianAnalysisModule:
                 sancai['strength'] = 1
             
         except Exception as e:
-            print(f"分析三才关系错误: {e}")
+            record_fallback(logger, 'analyze_sancai_relationships', "分析三才关系错误", e)
         
         return sancai
 
@@ -650,8 +701,8 @@ class LiunianAnalysisModule:
                 zhi = liunian_info['zhi']
                 
                 # 基于十神评估
-                gan_shen = ten_deities.get(self.me, {}).get(gan, '--') if self.me in ten_deities else '--'
-                zhi_shen = ten_deities.get(self.me, {}).get(zhi, '--') if self.me in ten_deities else '--'
+                gan_shen = self._ten_deity(gan, '--')
+                zhi_shen = self._ten_deity(zhi, '--')
                 
                 fortune_score = self._calculate_shen_score(gan_shen) + self._calculate_shen_score(zhi_shen)
                 
@@ -688,7 +739,7 @@ class LiunianAnalysisModule:
                 self.liunian_evaluations.append(evaluation)
                 
             except Exception as e:
-                print(f"评估流年吉凶错误: {e}")
+                record_fallback(logger, 'evaluate_liunian_fortune', "评估流年吉凶错误", e)
 
     def _calculate_shen_score(self, shen: str) -> int:
         """计算十神分数"""
@@ -766,6 +817,7 @@ class LiunianAnalysisModule:
             "liunian_details": self.liunian_details,
             "liunian_relationships": self.liunian_relationships,
             "liunian_evaluations": self.liunian_evaluations,
+            "transit_events": self.transit_events,
             "table_lines": self.get_liunian_table_lines(),
             "summary_stats": {
                 "favorable_years": len([e for e in self.liunian_evaluations if e['fortune_level'] in ['大吉', '吉', '小吉']]),
@@ -907,7 +959,7 @@ class LiunianAnalysisModule:
             return ''.join(relations) if relations else ""
             
         except Exception as e:
-            print(f"分析天干关系错误: {e}")
+            record_fallback(logger, 'analyze_gan_relations', "分析天干关系错误", e)
             return ""
     
     def _analyze_zhi_relations_detailed(self, liunian_zhi: str, dayun_info: Optional[Dict]) -> str:
@@ -983,7 +1035,7 @@ class LiunianAnalysisModule:
             return '  '.join(relations)
             
         except Exception as e:
-            print(f"分析地支关系错误: {e}")
+            record_fallback(logger, 'analyze_zhi_relations_detailed', "分析地支关系错误", e)
             return ""
 
 
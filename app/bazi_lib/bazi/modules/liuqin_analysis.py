@@ -47,6 +47,12 @@ except ImportError:
                 }
 
 
+try:
+    from .deities import ganzhi_index, ten_deities_matrix, ten_deities_names, shen_histogram, shen_total  # type: ignore
+except ImportError:
+    from deities import ganzhi_index, ten_deities_matrix, ten_deities_names, shen_histogram, shen_total  # type: ignore
+
+
 class LiuqinAnalysisModule:
     """六亲分析模块"""
     
@@ -103,6 +109,9 @@ class LiuqinAnalysisModule:
             self.gan_shens = bazi_main_data.get('gan_shens', [])
             self.zhi_shens = bazi_main_data.get('zhi_shens', [])
         
+        # 十神计数表由 BaziMainModule 统一计算，缺失时按四柱补算
+        self.shen_hist = bazi_main_data.get('ten_gods', {}).get('histogram') or shen_histogram(self.me, self.gans, self.zhis)
+        
         # 五行分数
         self.scores = bazi_main_data.get('scores', {})
         self.gan_scores = bazi_main_data.get('gan_scores', {})
@@ -121,6 +130,10 @@ class LiuqinAnalysisModule:
         # 执行计算
         self._calculate()
 
+    def _shen_count(self, *names: str) -> int:
+        """天干十神与地支主气十神中若干十神的个数，查共享的十神计数表"""
+        return shen_total(self.shen_hist, *names)
+
     def _calculate(self):
         """执行六亲分析计算"""
         self._setup_liuqin_mapping()
@@ -546,8 +559,8 @@ class LiuqinAnalysisModule:
         
         if self.is_female:
             # 女命看官杀为夫星
-            official_count = self.gan_shens.count('官') + self.zhi_shens.count('官')
-            kill_count = self.gan_shens.count('杀') + self.zhi_shens.count('杀')
+            official_count = self._shen_count('官')
+            kill_count = self._shen_count('杀')
             
             if official_count > 0:
                 self.marriage_analysis['marriage_star'] = f"正官{official_count}个"
@@ -564,8 +577,8 @@ class LiuqinAnalysisModule:
         
         else:
             # 男命看财星为妻星
-            wealth_count = self.gan_shens.count('财') + self.zhi_shens.count('财')
-            partial_wealth_count = self.gan_shens.count('才') + self.zhi_shens.count('才')
+            wealth_count = self._shen_count('财')
+            partial_wealth_count = self._shen_count('才')
             
             if wealth_count > 0:
                 self.marriage_analysis['marriage_star'] = f"正财{wealth_count}个"
@@ -607,8 +620,8 @@ class LiuqinAnalysisModule:
         }
         
         # 分析食伤为子女星
-        food_count = self.gan_shens.count('食') + self.zhi_shens.count('食')
-        hurt_count = self.gan_shens.count('伤') + self.zhi_shens.count('伤')
+        food_count = self._shen_count('食')
+        hurt_count = self._shen_count('伤')
         
         if food_count > 0:
             self.children_analysis['children_star'] = f"食神{food_count}个"
@@ -652,8 +665,8 @@ class LiuqinAnalysisModule:
         }
         
         # 分析印星为母亲
-        seal_count = self.gan_shens.count('印') + self.zhi_shens.count('印')
-        offset_count = self.gan_shens.count('枭') + self.zhi_shens.count('枭')
+        seal_count = self._shen_count('印')
+        offset_count = self._shen_count('枭')
         
         if seal_count > 0:
             self.parents_analysis['mother_star'] = f"正印{seal_count}个"
@@ -666,8 +679,8 @@ class LiuqinAnalysisModule:
             self.parents_analysis['mother_relationship'] = '与母亲缘分较薄'
         
         # 分析财星为父亲
-        wealth_count = self.gan_shens.count('财') + self.zhi_shens.count('财')
-        partial_wealth_count = self.gan_shens.count('才') + self.zhi_shens.count('才')
+        wealth_count = self._shen_count('财')
+        partial_wealth_count = self._shen_count('才')
         
         if wealth_count > 0:
             self.parents_analysis['father_star'] = f"正财{wealth_count}个"
@@ -697,8 +710,8 @@ class LiuqinAnalysisModule:
         }
         
         # 分析比劫为兄弟姐妹
-        rob_count = self.gan_shens.count('比') + self.zhi_shens.count('比')
-        compete_count = self.gan_shens.count('劫') + self.zhi_shens.count('劫')
+        rob_count = self._shen_count('比')
+        compete_count = self._shen_count('劫')
         
         total_siblings = rob_count + compete_count
         
@@ -810,11 +823,11 @@ class LiuqinAnalysisModule:
         }
         
         if self.is_female:
-            official_count = self.gan_shens.count('官') + self.zhi_shens.count('官')
+            official_count = self._shen_count('官')
             if official_count > 0:
                 predictions['overall_trend'] = '婚姻稳定，感情和睦'
         else:
-            wealth_count = self.gan_shens.count('财') + self.zhi_shens.count('财')
+            wealth_count = self._shen_count('财')
             if wealth_count > 0:
                 predictions['overall_trend'] = '婚姻幸福，妻子贤惠'
         
@@ -829,7 +842,7 @@ class LiuqinAnalysisModule:
             'overall_trend': '平稳'
         }
         
-        food_count = self.gan_shens.count('食') + self.zhi_shens.count('食')
+        food_count = self._shen_count('食')
         if food_count > 0:
             predictions['overall_trend'] = '子女孝顺，晚年幸福'
         
@@ -844,7 +857,7 @@ class LiuqinAnalysisModule:
             'overall_trend': '平稳'
         }
         
-        seal_count = self.gan_shens.count('印') + self.zhi_shens.count('印')
+        seal_count = self._shen_count('印')
         if seal_count > 0:
             predictions['mother_relationship'] = '良好'
             predictions['overall_trend'] = '与母亲关系深厚'
@@ -860,7 +873,7 @@ class LiuqinAnalysisModule:
             'overall_trend': '平稳'
         }
         
-        rob_count = self.gan_shens.count('比') + self.zhi_shens.count('比')
+        rob_count = self._shen_count('比')
         if rob_count > 0:
             predictions['overall_trend'] = '兄弟姐妹关系和睦，互相支持'
         
@@ -891,8 +904,8 @@ class LiuqinAnalysisModule:
         # 表头
         lines.append("天干六亲分析：")
         for i, gan in enumerate(['甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '壬', '癸']):
-            if gan in ten_deities.get(self.me, {}):
-                shen = ten_deities[self.me][gan]
+            if self.me in ganzhi_index:
+                shen = ten_deities_names[ten_deities_matrix[ganzhi_index[self.me]][ganzhi_index[gan]]]
                 liuqin = self.liuqin_mapping.get(shen, '未知')
                 
                 # 计算该天干在四柱中的分布
@@ -47,6 +47,20 @@ except ImportError:
         # 默认的十神逆向映射
         ten_deities = {}
 
+def match_rules(gans, zhis, names=None):
+    """按规则表匹配；geju 依赖 numpy，首次匹配时才导入，不拖慢分析器的导入"""
+    try:
+        from ..geju import match_rules as match
+    except ImportError:
+        from geju import match_rules as match
+    return match(gans, zhis, names=names)
+
+
+try:
+    from .deities import shen_histogram, shen_total  # type: ignore
+except ImportError:
+    from deities import shen_histogram, shen_total  # type: ignore
+
 
 class PersonalityAnalysisModule:
     """性格分析模块 - 严格按照原版bazi.py逻辑"""
@@ -91,6 +105,9 @@ class PersonalityAnalysisModule:
             self.zhi_shens = bazi_main_data.get('zhi_shens', [])
             self.all_shens = bazi_main_data.get('shens', [])
         
+        # 十神计数表由 BaziMainModule 统一计算，缺失时按四柱补算
+        self.shen_hist = bazi_main_data.get('ten_gods', {}).get('histogram') or shen_histogram(self.me, self.gans, self.zhis)
+        
         # 五行信息
         if 'wuxing_analysis' in bazi_main_data:
             wuxing_data = bazi_main_data['wuxing_analysis']
@@ -118,6 +135,10 @@ class PersonalityAnalysisModule:
         # 执行计算
         self._calculate()
 
+    def _shen_count(self, *names: str) -> int:
+        """天干十神与地支主气十神中若干十神的个数，查共享的十神计数表"""
+        return shen_total(self.shen_hist, *names)
+
     def _calculate(self):
         """执行性格分析计算"""
         self._analyze_minggong()
@@ -194,45 +215,18 @@ class PersonalityAnalysisModule:
 
     def _analyze_special_combinations(self):
         """分析特殊组合"""
-        # 地网
-        if '辰' in self.zhis and '巳' in self.zhis:
-            self.personality_lines.append("地网：地支辰巳。天罗：戌亥。天罗地网全凶。")
-        
-        # 天罗
-        if '戌' in self.zhis and '亥' in self.zhis:
-            self.personality_lines.append("天罗：戌亥。地网：地支辰巳。天罗地网全凶。")
+        self._append_rules(('地网', '天罗'))
 
     def _analyze_special_formats(self):
         """分析特殊格局"""
-        if len(self.zhus) >= 3:
-            day_pillar = (self.gans[2], self.zhis[2])
-            
-            # 魁罡格
-            kuigang_pillars = [('庚','辰'), ('庚','戌'), ('壬','辰'), ('戊','戌')]
-            if day_pillar in kuigang_pillars:
-                self.personality_lines.append("魁罡格：基础96，日主庚辰,庚戌,壬辰, 戊戌，重叠方有力。日主强，无刑冲佳。")
-                self.personality_lines.append("魁罡四柱曰多同，贵气朝来在此中，日主独逢冲克重，财官显露祸无穷。魁罡重叠是贵人，天元健旺喜临身，财官一见生灾祸，刑煞俱全定苦辛。")
-        
-        if len(self.zhus) >= 4:
-            hour_pillar = (self.gans[3], self.zhis[3])
-            
-            # 金神格
-            jinshen_pillars = [('乙','丑'), ('己','巳'), ('癸','酉')]
-            if hour_pillar in jinshen_pillars:
-                self.personality_lines.append("金神格：基础97，时柱乙丑、己巳、癸酉。只有甲和己日，甲日为主，甲子、甲辰最突出。月支通金火2局为佳命。不通可以选其他格")
-            
-            # 六阴朝阳
-            if self.me == '辛' and self.zhis[3] == '子':
-                self.personality_lines.append("六阴朝阳格：基础98，辛日时辰为子。")
-            
-            # 六乙鼠贵
-            if self.me == '乙' and self.zhis[3] == '子':
-                self.personality_lines.append("六阴朝阳格：基础99，乙日时辰为子。忌讳午冲，丑合，不适合有2个子。月支最好通木局，水也可以，不适合金火。申酉大运有凶，午也不行。夏季为伤官。入其他格以格局论。")
-        
-        # 从格判断
-        if self.scores and max(self.scores.values()) > 25:
-            self.personality_lines.append("有五行大于25分，需要考虑专格或者从格。")
-            self.personality_lines.append("从旺格：安居远害、退身避位、淡泊名利,基础94;从势格：日主无根。")
+        self._append_rules(('魁罡格', '金神格', '六阴朝阳', '六乙鼠贵', '从格'))
+
+    def _append_rules(self, names):
+        """按规则表（geju.py）匹配指定的格局规则"""
+        if len(self.gans) < 4 or len(self.zhis) < 4:
+            return
+        for rule in match_rules(self.gans, self.zhis, names=names):
+            self.personality_lines.extend(rule.lines)
 
     def _analyze_bijian(self):
         """分析比肩"""
@@ -253,8 +247,7 @@ class PersonalityAnalysisModule:
                 self.personality_lines.append("年干比：上面有哥或姐，出身一般。")
             
             # 比肩过多的分析
-            all_shens = self.gan_shens + self.zhi_shens
-            bi_count = all_shens.count('比')
+            bi_count = self._shen_count('比')
             if bi_count > 2:
                 self.personality_lines.append("----基51:天干2比")
                 self.personality_lines.append("自我排斥，易后悔、举棋不定、匆促决定而有失；男倾向于群力，自己决策容易孤注一掷，小事谨慎，大事决定后不再重复考虑。")
@@ -262,7 +255,7 @@ class PersonalityAnalysisModule:
                 self.personality_lines.append("男不得女欢心.")
                 self.personality_lines.append("难以保守秘密，不适合多言；")
                 
-                if '官' not in all_shens and '杀' not in all_shens:
+                if not self._shen_count('官', '杀'):
                     self.personality_lines.append("基51: 比肩多，四柱无正官七杀，性情急躁。")
         
         # 时支比
@@ -275,8 +268,7 @@ class PersonalityAnalysisModule:
                 self.personality_lines.append("时柱比：与亲人意见不合。")
         
         # 比劫大于2
-        all_shens = self.gan_shens + self.zhi_shens
-        bijie_count = all_shens.count('比') + all_shens.count('劫')
+        bijie_count = self._shen_count('比', '劫')
         if bijie_count > 2:
             if self.gender == '男':
                 self.personality_lines.append("比劫大于2，男：感情阻碍、事业起伏不定。")
@@ -298,8 +290,7 @@ class PersonalityAnalysisModule:
                     self.personality_lines.append("月柱干支劫：与父亲无缘，30岁以前任性，早婚防分手，自我精神压力极其重。")
             
             # 劫财过多
-            all_shens = self.gan_shens + self.zhi_shens
-            jie_count = all_shens.count('劫')
+            jie_count = self._shen_count('劫')
             if jie_count > 2:
                 self.personality_lines.append('----劫财过多, 婚姻不好')
             
@@ -335,8 +326,8 @@ class PersonalityAnalysisModule:
     def _analyze_other_shens(self):
         """分析其他十神"""
         # 官格分析
-        all_shens = self.gan_shens + self.zhi_shens
-        if '官' in all_shens:
+        guan_count = self._shen_count('官')
+        if guan_count:
             self.personality_lines.append("局 [] 格 ['官']")
             
             # 官格透比或劫
@@ -344,8 +335,7 @@ class PersonalityAnalysisModule:
                 self.personality_lines.append("官格透比或劫：故做清高或有洁癖的文人。")
             
             # 官独透成格
-            guan_count = all_shens.count('官')
-            if guan_count == 1 and '财' not in all_shens and '印' not in all_shens:
+            if guan_count == 1 and not self._shen_count('财', '印'):
                 self.personality_lines.append("官独透天干成格，四柱无财或印，为老实人。")
             
             # 正官多者
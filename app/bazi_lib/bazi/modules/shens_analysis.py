@@ -82,6 +82,18 @@ except ImportError:
         Gan = ['甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '壬', '癸']
         Zhi = ['子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥']
 
+# 神煞倒排索引只在 datas 里构建一份，上面的默认数据不再另建
+try:
+    from ..datas import (year_shens_index, month_shens_index, day_shens_index, g_shens_index,  # type: ignore
+                         shens_bits, shens_mask_names)
+except ImportError:
+    try:
+        from datas import (year_shens_index, month_shens_index, day_shens_index, g_shens_index,  # type: ignore
+                           shens_bits, shens_mask_names)
+    except ImportError:
+        from app.bazi_lib.bazi.datas import (year_shens_index, month_shens_index, day_shens_index,  # type: ignore
+                                             g_shens_index, shens_bits, shens_mask_names)
+
 
 class ShensAnalysisModule:
     """神煞分析模块"""
@@ -146,27 +158,25 @@ class ShensAnalysisModule:
         
         year_zhi = self.zhis[0]
         
-        for shen_name, shen_data in year_shens.items():
-            if year_zhi in shen_data:
-                target_zhis = shen_data[year_zhi]
-                found_positions = []
-                
-                # 检查月、日、时支
-                for i in range(1, 4):
-                    if i < len(self.zhis) and self.zhis[i] in target_zhis:
-                        found_positions.append(i)
-                        self.shens_by_pillar[i].append(shen_name)
-                        self.all_shens.add(shen_name)
-                
-                if found_positions:
-                    self.year_shens_result[shen_name] = {
-                        'base_zhi': year_zhi,
-                        'target_zhis': target_zhis,
-                        'found_positions': found_positions,
-                        'found_zhis': [self.zhis[pos] for pos in found_positions],
-                        'description': shens_infos.get(shen_name, ''),
-                        'is_active': True
-                    }
+        # 检查月、日、时支
+        positions = [i for i in range(1, 4) if i < len(self.zhis)]
+        masks = [year_shens_index.get((year_zhi, self.zhis[i]), 0) for i in positions]
+        
+        for shen_name in shens_mask_names(self._merge_masks(masks)):
+            bit = shens_bits[shen_name]
+            found_positions = [i for i, mask in zip(positions, masks) if mask & bit]
+            for i in found_positions:
+                self.shens_by_pillar[i].append(shen_name)
+            self.all_shens.add(shen_name)
+            
+            self.year_shens_result[shen_name] = {
+                'base_zhi': year_zhi,
+                'target_zhis': year_shens[shen_name][year_zhi],
+                'found_positions': found_positions,
+                'found_zhis': [self.zhis[pos] for pos in found_positions],
+                'description': shens_infos.get(shen_name, ''),
+                'is_active': True
+            }
 
     def _analyze_month_shens(self):
         """分析月神煞"""
@@ -175,36 +185,38 @@ class ShensAnalysisModule:
         
         month_zhi = self.zhis[1]
         
-        for shen_name, shen_data in month_shens.items():
-            if month_zhi in shen_data:
-                targets = shen_data[month_zhi]
-                found_positions = []
-                
-                # 检查所有位置的干支
-                for i in range(4):
-                    # 检查天干
-                    if i < len(self.gans) and self.gans[i] in targets:
-                        found_positions.append(('gan', i))
-                        self.shens_by_pillar[i].append(shen_name)
-                        self.all_shens.add(shen_name)
-                        # 日主有月德天德加强标记
-                        if i == 2:  # 日主位置
-                            self.shens_by_pillar[i].append(shen_name + "●")
-                    
-                    # 检查地支
-                    if i < len(self.zhis) and self.zhis[i] in targets:
-                        found_positions.append(('zhi', i))
-                        self.shens_by_pillar[i].append(shen_name)
-                        self.all_shens.add(shen_name)
+        # 检查所有位置的干支
+        gan_masks = [month_shens_index.get((month_zhi, self.gans[i]), 0) if i < len(self.gans) else 0
+                     for i in range(4)]
+        zhi_masks = [month_shens_index.get((month_zhi, self.zhis[i]), 0) if i < len(self.zhis) else 0
+                     for i in range(4)]
+        
+        for shen_name in shens_mask_names(self._merge_masks(gan_masks + zhi_masks)):
+            bit = shens_bits[shen_name]
+            found_positions = []
+            
+            for i in range(4):
+                # 检查天干
+                if gan_masks[i] & bit:
+                    found_positions.append(('gan', i))
+                    self.shens_by_pillar[i].append(shen_name)
+                    # 日主有月德天德加强标记
+                    if i == 2:  # 日主位置
+                        self.shens_by_pillar[i].append(shen_name + "●")
                 
-                if found_positions:
-                    self.month_shens_result[shen_name] = {
-                        'base_zhi': month_zhi,
-                        'targets': targets,
-                        'found_positions': found_positions,
-                        'description': shens_infos.get(shen_name, ''),
-                        'is_active': True
-                    }
+                # 检查地支
+                if zhi_masks[i] & bit:
+                    found_positions.append(('zhi', i))
+                    self.shens_by_pillar[i].append(shen_name)
+            
+            self.all_shens.add(shen_name)
+            self.month_shens_result[shen_name] = {
+                'base_zhi': month_zhi,
+                'targets': month_shens[shen_name][month_zhi],
+                'found_positions': found_positions,
+                'description': shens_infos.get(shen_name, ''),
+                'is_active': True
+            }
 
     def _analyze_day_shens(self):
         """分析日神煞"""
@@ -213,57 +225,57 @@ class ShensAnalysisModule:
         
         day_zhi = self.zhis[2]
         
-        for shen_name, shen_data in day_shens.items():
-            if day_zhi in shen_data:
-                target_zhis = shen_data[day_zhi]
-                found_positions = []
-                
-                # 检查年、月、时支（不包括日支自身）
-                for i in [0, 1, 3]:
-                    if i < len(self.zhis) and self.zhis[i] in target_zhis:
-                        found_positions.append(i)
-                        self.shens_by_pillar[i].append(shen_name)
-                        self.all_shens.add(shen_name)
-                
-                if found_positions:
-                    self.day_shens_result[shen_name] = {
-                        'base_zhi': day_zhi,
-                        'target_zhis': target_zhis,
-                        'found_positions': found_positions,
-                        'found_zhis': [self.zhis[pos] for pos in found_positions],
-                        'description': shens_infos.get(shen_name, ''),
-                        'is_active': True
-                    }
+        # 检查年、月、时支（不包括日支自身）
+        positions = [i for i in [0, 1, 3] if i < len(self.zhis)]
+        masks = [day_shens_index.get((day_zhi, self.zhis[i]), 0) for i in positions]
+        
+        for shen_name in shens_mask_names(self._merge_masks(masks)):
+            bit = shens_bits[shen_name]
+            found_positions = [i for i, mask in zip(positions, masks) if mask & bit]
+            for i in found_positions:
+                self.shens_by_pillar[i].append(shen_name)
+            self.all_shens.add(shen_name)
+            
+            self.day_shens_result[shen_name] = {
+                'base_zhi': day_zhi,
+                'target_zhis': day_shens[shen_name][day_zhi],
+                'found_positions': found_positions,
+                'found_zhis': [self.zhis[pos] for pos in found_positions],
+                'description': shens_infos.get(shen_name, ''),
+                'is_active': True
+            }
 
     def _analyze_self_shens(self):
         """分析自身神煞（以日主为基准）"""
         if not self.me or not self.zhis:
             return
         
-        for shen_name, shen_data in g_shens.items():
-            if self.me in shen_data:
-                target_zhis = shen_data[self.me]
-                if not target_zhis:  # 某些神煞对特定日主为空
-                    continue
-                    
-                found_positions = []
-                
-                # 检查所有地支
-                for i in range(len(self.zhis)):
-                    if self.zhis[i] in target_zhis:
-                        found_positions.append(i)
-                        self.shens_by_pillar[i].append(shen_name)
-                        self.all_shens.add(shen_name)
-                
-                if found_positions:
-                    self.self_shens_result[shen_name] = {
-                        'day_master': self.me,
-                        'target_zhis': target_zhis,
-                        'found_positions': found_positions,
-                        'found_zhis': [self.zhis[pos] for pos in found_positions],
-                        'description': shens_infos.get(shen_name, ''),
-                        'is_active': True
-                    }
+        # 检查所有地支，某些神煞对特定日主为空，索引中自然不会命中
+        masks = [g_shens_index.get((self.me, zhi), 0) for zhi in self.zhis]
+        
+        for shen_name in shens_mask_names(self._merge_masks(masks)):
+            bit = shens_bits[shen_name]
+            found_positions = [i for i, mask in enumerate(masks) if mask & bit]
+            for i in found_positions:
+                self.shens_by_pillar[i].append(shen_name)
+            self.all_shens.add(shen_name)
+            
+            self.self_shens_result[shen_name] = {
+                'day_master': self.me,
+                'target_zhis': g_shens[shen_name][self.me],
+                'found_positions': found_positions,
+                'found_zhis': [self.zhis[pos] for pos in found_positions],
+                'description': shens_infos.get(shen_name, ''),
+                'is_active': True
+            }
+
+    @staticmethod
+    def _merge_masks(masks: List[int]) -> int:
+        """合并各柱的神煞位掩码"""
+        merged = 0
+        for mask in masks:
+            merged |= mask
+        return merged
 
     def _analyze_special_combinations(self):
         """分析特殊神煞组合"""
@@ -0,0 +1,180 @@
+"""
+四柱反查模块 - 由年月日时四柱反查1800～2200年间所有对应的出生时刻
+
+倒排索引以（年柱、月支、日柱）为键，值为该键出现过的日子（节气表逐日表中的序号）；
+同一天若在当天交节，交节前后分属两个键。索引预先生成到 pillar_index.bin，运行时以内存映射方式载入：
+
+    小端 uint32 offsets[60*12*60 + 1]，随后为 uint32 日序号，键k的日子为 days[offsets[k]:offsets[k+1]]
+
+查询时取出候选日，再按时支对应的时段（交节落在时段内时另加交节时刻）用 to_pillars_batch 逐一核对八个干支，
+得到每个吻合时段的起始时刻：
+
+    from app.bazi_lib.bazi.pillar_index import find_birth_datetimes
+    find_birth_datetimes('甲丙戊庚', '子寅辰申', 1850, 2030)
+
+重新生成索引：python pillar_index.py
+"""
+
+import datetime
+import mmap
+import os
+import sys
+from typing import List, Optional, Sequence
+
+try:
+    from .ganzhi import Gan, Zhi
+    from .jieqi import TABLE_START_YEAR, TABLE_END_YEAR
+    from .modules.core_base import _pillar_day_tables, _pillars_from_seconds, _require_numpy
+except ImportError:
+    from ganzhi import Gan, Zhi
+    from jieqi import TABLE_START_YEAR, TABLE_END_YEAR
+    from modules.core_base import _pillar_day_tables, _pillars_from_seconds, _require_numpy
+
+INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pillar_index.bin")
+
+# 键的个数：年柱60 × 月支12 × 日柱60
+KEY_COUNT = 60 * 12 * 60
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+# (offsets, days)，首次查询时载入
+_index = None
+
+
+def _jiazi(gan: int, zhi: int) -> int:
+    """干支序号换算为六十甲子序号（干支阴阳不合时无意义）"""
+    return (6 * gan - 5 * zhi) % 60
+
+
+def _key(year_jiazi, month_zhi, day_jiazi):
+    return (year_jiazi * 12 + month_zhi) * 60 + day_jiazi
+
+
+def _build_arrays():
+    """由逐日表生成索引：每天交节前一个键，当天交节的再加交节后一个键"""
+    np = _require_numpy()
+    tables = _pillar_day_tables()
+    codes = tables['day_codes'].view(np.int8).reshape(-1, 2, 8).astype(np.int64)
+    day_count = len(codes)
+    keys = _key(_jiazi(codes[:, :, 0], codes[:, :, 1]), codes[:, :, 3], _jiazi(codes[:, :, 4], codes[:, :, 5]))
+
+    # 首日交节前、末日交节后超出节气表范围
+    day_index = np.arange(day_count, dtype=np.uint32)
+    has_jie = tables['jie_second'] < 86400
+    has_jie[-1] = False
+    before = day_index[1:]
+    after = day_index[has_jie]
+    all_keys = np.concatenate([keys[1:, 0], keys[has_jie, 1]])
+    all_days = np.concatenate([before, after])
+
+    order = np.lexsort((all_days, all_keys))
+    offsets = np.zeros(KEY_COUNT + 1, dtype='<u4')
+    np.cumsum(np.bincount(all_keys, minlength=KEY_COUNT), out=offsets[1:])
+    return offsets, all_days[order].astype('<u4')
+
+
+def build_pillar_index(path: str = INDEX_PATH) -> int:
+    """生成索引文件，返回写入的日子条目数"""
+    offsets, days = _build_arrays()
+    with open(path, 'wb') as f:
+        f.write(offsets.tobytes())
+        f.write(days.tobytes())
+    return len(days)
+
+
+def _load_index():
+    """内存映射方式载入索引，文件缺失或与节气表不符时退回到现场生成"""
+    global _index
+    if _index is not None:
+        return _index
+
+    np = _require_numpy()
+    try:
+        with open(INDEX_PATH, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        values = np.frombuffer(mapped, dtype='<u4')
+        offsets, days = values[:KEY_COUNT + 1], values[KEY_COUNT + 1:]
+        if (len(offsets) != KEY_COUNT + 1 or offsets[0] != 0 or offsets[-1] != len(days)
+                or (len(days) and days.max() >= len(_pillar_day_tables()['jie_second']))):
+            raise ValueError("四柱索引文件与节气表不符")
+        _index = (offsets, days)
+    except (OSError, ValueError):
+        _index = _build_arrays()
+    return _index
+
+
+def _parse_pillars(gans: Sequence[str], zhis: Sequence[str]) -> Optional[List[int]]:
+    """四个天干、四个地支换算为8个序号，干支有误或阴阳不合时返回None"""
+    if len(gans) != 4 or len(zhis) != 4:
+        return None
+    codes = []
+    for gan, zhi in zip(gans, zhis):
+        if gan not in Gan or zhi not in Zhi:
+            return None
+        gan_index, zhi_index = Gan.index(gan), Zhi.index(zhi)
+        if gan_index % 2 != zhi_index % 2:
+            return None
+        codes.extend((gan_index, zhi_index))
+    return codes
+
+
+def find_birth_datetimes(gans: Sequence[str], zhis: Sequence[str],
+                         start_year: int = TABLE_START_YEAR,
+                         end_year: int = TABLE_END_YEAR) -> List[datetime.datetime]:
+    """
+    四柱反查出生时刻（北京时间）
+
+    Args:
+        gans: 年月日时四个天干，如 '甲丙戊庚' 或 ['甲', '丙', '戊', '庚']
+        zhis: 年月日时四个地支
+        start_year: 起始公历年（含）
+        end_year: 结束公历年（含）
+
+    Returns:
+        按时间排序的时刻列表，取各时辰的起点（子时分早子、晚子两段），交节落在时辰内且只有交节后吻合时取交节时刻；
+        四柱有误或不可能出现（如月干与年干不配）时为空列表
+    """
+    codes = _parse_pillars(gans, zhis)
+    if codes is None:
+        return []
+
+    np = _require_numpy()
+    offsets, days = _load_index()
+    key = _key(_jiazi(codes[0], codes[1]), codes[3], _jiazi(codes[4], codes[5]))
+    candidates = np.asarray(days[offsets[key]:offsets[key + 1]], dtype=np.int64)
+    if not len(candidates):
+        return []
+
+    tables = _pillar_day_tables()
+    time_zhi = codes[7]
+    slots = [(0, 3600), (82800, 86400)] if time_zhi == 0 else [((2 * time_zhi - 1) * 3600, (2 * time_zhi + 1) * 3600)]
+    day_starts = (candidates + tables['first_day']) * 86400
+    jie_second = tables['jie_second'][candidates].astype(np.int64)
+
+    moments = []
+    for slot_start, slot_end in slots:
+        moments.append(day_starts + slot_start)
+        inside = (jie_second > slot_start) & (jie_second < slot_end)
+        moments.append(np.where(inside, day_starts + jie_second, -1))
+    moments = np.stack(moments, axis=1).ravel()
+    moments = moments[(moments >= tables['first_second']) & (moments < tables['last_second'])]
+
+    target = np.array(codes, dtype=np.int8)
+    # 交节前后月柱不同，同一时辰内时辰起点与交节时刻至多一个吻合
+    matched = moments[(_pillars_from_seconds(moments) == target).all(axis=1)]
+
+    result = []
+    for seconds in matched.tolist():
+        moment = _EPOCH + datetime.timedelta(seconds=seconds)
+        if start_year <= moment.year <= end_year:
+            result.append(moment)
+    return result
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        for moment in find_birth_datetimes(sys.argv[1], sys.argv[2]):
+            print(moment.strftime('%Y-%m-%d %H:%M:%S'))
+    else:
+        count = build_pillar_index()
+        print(f"已生成四柱索引 {INDEX_PATH}：{TABLE_START_YEAR}～{TABLE_END_YEAR}年，共{count}个日子条目")
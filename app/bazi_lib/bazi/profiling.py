@@ -0,0 +1,197 @@
+"""
+性能剖析模块 - 记录分析流程中各模块构造与 get_result() 的耗时和内存分配，生成计时树
+
+用法：
+    analyzer = BaziAnalyzer(1985, 1, 17, 14, profile=True)
+    analyzer.get_result()['profile']      # 计时树
+
+    with profiling() as profiler:         # 或者在一段代码内对新建的分析器统一开启
+        BaziAnalyzer(1985, 1, 17, 14)
+    profiler.to_spans()                   # OpenTelemetry 风格的 span 列表
+
+内存分配取 sys.getallocatedblocks() 的净增量；开启 tracemalloc 时另记净增字节数
+"""
+
+import contextlib
+import contextvars
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+# profiling() 上下文内的剖析器
+_current = contextvars.ContextVar('bazi_profiler', default=None)
+
+
+class Span:
+    """计时树上的一个节点"""
+
+    __slots__ = ('name', 'start_ns', 'end_ns', 'alloc_blocks', 'alloc_bytes', 'children')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start_ns = 0
+        self.end_ns = 0
+        self.alloc_blocks = 0
+        self.alloc_bytes = None
+        self.children = []
+
+    @property
+    def wall_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        node = {
+            'name': self.name,
+            'wall_ms': round(self.wall_ms, 3),
+            'alloc_blocks': self.alloc_blocks,
+        }
+        if self.alloc_bytes is not None:
+            node['alloc_bytes'] = self.alloc_bytes
+        if self.children:
+            node['children'] = [child.to_dict() for child in self.children]
+        return node
+
+
+class Profiler:
+    """剖析器：span() 嵌套调用形成计时树
+
+    每个线程各有一条 span 栈，线程内的 span 按嵌套关系挂接，各线程的顶层 span 都挂在根节点下
+    """
+
+    enabled = True
+
+    def __init__(self, name: str = 'BaziAnalyzer'):
+        self.root = Span(name)
+        self._local = threading.local()
+        # time_ns 与 perf_counter_ns 的差，用于把单调时钟换算为 span 的绝对时间
+        self._epoch_offset_ns = time.time_ns() - time.perf_counter_ns()
+        self._start(self.root)
+
+    def _start(self, node: Span):
+        node.alloc_blocks = sys.getallocatedblocks()
+        if tracemalloc.is_tracing():
+            node.alloc_bytes = tracemalloc.get_traced_memory()[0]
+        node.start_ns = time.perf_counter_ns()
+
+    def _finish(self, node: Span):
+        node.end_ns = time.perf_counter_ns()
+        node.alloc_blocks = sys.getallocatedblocks() - node.alloc_blocks
+        if node.alloc_bytes is not None and tracemalloc.is_tracing():
+            node.alloc_bytes = tracemalloc.get_traced_memory()[0] - node.alloc_bytes
+        else:
+            node.alloc_bytes = None
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = [self.root]
+        return stack
+
+    @contextlib.contextmanager
+    def span(self, name: str):
+        node = Span(name)
+        stack = self._stack()
+        stack[-1].children.append(node)
+        stack.append(node)
+        self._start(node)
+        try:
+            yield node
+        finally:
+            self._finish(node)
+            stack.pop()
+
+    def finish(self):
+        """结束根节点，重复调用无效"""
+        if not self.root.end_ns:
+            self._finish(self.root)
+        return self
+
+    def tree(self) -> Dict[str, Any]:
+        """计时树：{name, wall_ms, alloc_blocks[, alloc_bytes], children}"""
+        return self.root.to_dict()
+
+    def to_spans(self, trace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """按 OpenTelemetry 的 span 字段导出为字典列表（父节点在前）"""
+        trace_id = trace_id or os.urandom(16).hex()
+        spans = []
+
+        def walk(node: Span, parent_id: Optional[str]):
+            span_id = os.urandom(8).hex()
+            attributes = {'bazi.alloc_blocks': node.alloc_blocks}
+            if node.alloc_bytes is not None:
+                attributes['bazi.alloc_bytes'] = node.alloc_bytes
+            spans.append({
+                'trace_id': trace_id,
+                'span_id': span_id,
+                'parent_span_id': parent_id,
+                'name': node.name,
+                'start_time_unix_nano': node.start_ns + self._epoch_offset_ns,
+                'end_time_unix_nano': node.end_ns + self._epoch_offset_ns,
+                'attributes': attributes,
+            })
+            for child in node.children:
+                walk(child, span_id)
+
+        walk(self.root, None)
+        return spans
+
+    def emit_otel(self, tracer=None) -> bool:
+        """通过 opentelemetry 把计时树补记为 span；未安装 opentelemetry 时返回False"""
+        if otel_trace is None:
+            return False
+        tracer = tracer or otel_trace.get_tracer('bazi')
+
+        def walk(node: Span, context):
+            span = tracer.start_span(node.name, context=context,
+                                     start_time=node.start_ns + self._epoch_offset_ns)
+            span.set_attribute('bazi.alloc_blocks', node.alloc_blocks)
+            if node.alloc_bytes is not None:
+                span.set_attribute('bazi.alloc_bytes', node.alloc_bytes)
+            child_context = otel_trace.set_span_in_context(span)
+            for child in node.children:
+                walk(child, child_context)
+            span.end(end_time=node.end_ns + self._epoch_offset_ns)
+
+        walk(self.root, None)
+        return True
+
+
+class _NullProfiler:
+    """未开启剖析时使用，span() 不做任何记录"""
+
+    enabled = False
+    _null_span = contextlib.nullcontext()
+
+    def span(self, name: str):
+        return self._null_span
+
+    def finish(self):
+        return self
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+def current_profiler():
+    """profiling() 上下文内返回其剖析器，否则返回None"""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def profiling(name: str = 'profile'):
+    """在上下文内新建的分析器都计入同一个剖析器，各分析器的计时树挂在其根节点下"""
+    profiler = Profiler(name)
+    token = _current.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _current.reset(token)
+        profiler.finish()
@@ -3,6 +3,7 @@
 专为现代化架构设计，无需文本解析
 """
 
+import logging
 from typing import Dict, Any, Optional
 
 # 多层导入逻辑 - 修复绝对导入问题
@@ -17,15 +18,7 @@ except ImportError:
         from modules.bazi_main import BaziMainModule
     except ImportError:
         try:
-            # 尝试绝对导入 - 修复版本
-            import sys
-            import os
-            
-            # 临时添加bazi目录到sys.path，确保内部模块能找到彼此
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            if current_dir not in sys.path:
-                sys.path.insert(0, current_dir)
-            
+            # 尝试绝对导入
             from app.bazi_lib.bazi.modules.core_base import CoreBaseModule
             from app.bazi_lib.bazi.modules.basic_info import BasicInfoModule
             from app.bazi_lib.bazi.modules.bazi_main import BaziMainModule
@@ -35,6 +28,13 @@ except ImportError:
             BasicInfoModule = None
             BaziMainModule = None
 
+try:
+    from .bazi_log import get_logger, record_fallback
+except ImportError:
+    from bazi_log import get_logger, record_fallback
+
+logger = get_logger(__name__)
+
 
 class SimpleBaziAnalyzer:
     """简化版八字分析器 - 直接使用模块JSON输出"""
@@ -94,12 +94,12 @@ class SimpleBaziAnalyzer:
             self.analysis_complete = True
             
         except Exception as e:
-            print(f"SimpleBaziAnalyzer分析失败: {e}")
+            record_fallback(logger, 'perform_analysis', "SimpleBaziAnalyzer分析失败", e)
             self._fallback_analysis()
     
     def _fallback_analysis(self):
         """备用分析方法 - 使用已修复的BaziAnalyzer"""
-        print("SimpleBaziAnalyzer进入备用分析，使用BaziAnalyzer")
+        logger.debug("SimpleBaziAnalyzer进入备用分析，使用BaziAnalyzer")
         
         try:
             # 使用已修复的BaziAnalyzer
@@ -126,21 +126,21 @@ class SimpleBaziAnalyzer:
             
             if hasattr(fallback_analyzer, 'bazi_main_module') and fallback_analyzer.bazi_main_module:
                 self.bazi_main_data = fallback_analyzer.bazi_main_module.get_result()
-                print("✓ 成功从BaziAnalyzer提取bazi_main_data")
-                # 调试：检查提取的数据是否包含正确的统计信息
-                wuxing_analysis = self.bazi_main_data.get('wuxing_analysis', {})
-                scores = wuxing_analysis.get('scores', {})
-                gan_scores = wuxing_analysis.get('gan_scores', {})
-                print(f"  提取的scores: {scores}")
-                print(f"  提取的gan_scores (非零): {dict([(k,v) for k,v in gan_scores.items() if v > 0])}")
+                # 调试：检查提取的数据是否包含正确的统计信息（只在开启DEBUG时整理输出）
+                if logger.isEnabledFor(logging.DEBUG):
+                    wuxing_analysis = self.bazi_main_data.get('wuxing_analysis', {})
+                    scores = wuxing_analysis.get('scores', {})
+                    gan_scores = wuxing_analysis.get('gan_scores', {})
+                    logger.debug("成功从BaziAnalyzer提取bazi_main_data，scores: %s，gan_scores (非零): %s",
+                                 scores, {k: v for k, v in gan_scores.items() if v > 0})
             else:
                 self.bazi_main_data = self._get_default_bazi_main()
-                print("❌ 无法从BaziAnalyzer提取bazi_main_data，使用默认数据")
+                record_fallback(logger, 'default_bazi_main', "无法从BaziAnalyzer提取bazi_main_data，使用默认数据")
             
             self.analysis_complete = True
             
         except Exception as e:
-            print(f"备用分析也失败: {e}")
+            record_fallback(logger, 'fallback_analysis', "备用分析也失败", e)
             # 使用默认数据确保不会崩溃
             self.core_data = self._get_default_core_data()
             self.basic_info_data = self._get_default_basic_info()
@@ -0,0 +1,138 @@
+"""
+古籍文本库 - 时柱断语（sizi.summarys）与月令论述（yue.months）
+文本预先编译到 texts.bin：文件头为源文件摘要和偏移表（键 -> 正文的字节偏移和长度），其后为UTF-8正文，
+运行时以内存映射方式打开，查询时才解码对应条目，接口与原来的字典一致
+
+sizi.py、yue.py 仍是文本的源文件，修改后重新生成：python textstore.py
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+
+MAGIC = b'BZTEXT02'
+TEXTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "texts.bin")
+
+# 文本库分区及其源文件
+SOURCES = {
+    'summarys': 'sizi.py',
+    'months': 'yue.py',
+}
+
+# 已打开的文本库：(内存映射, {分区: {键: (偏移, 长度, 是否元组)}})；源文件与文本库不一致时为 (None, 源字典)
+_opened = None
+
+
+def _source_tables():
+    """直接导入源文件中的字典"""
+    try:
+        from .sizi import summarys
+        from .yue import months
+    except ImportError:
+        from sizi import summarys
+        from yue import months
+    return {'summarys': summarys, 'months': months}
+
+
+def _source_digests():
+    """源文件内容的 SHA-256；有源文件不存在（只随包发布 texts.bin）时返回 None"""
+    base = os.path.dirname(TEXTS_PATH)
+    digests = {}
+    for section, filename in SOURCES.items():
+        try:
+            with open(os.path.join(base, filename), 'rb') as f:
+                digests[section] = hashlib.sha256(f.read()).hexdigest()
+        except FileNotFoundError:
+            return None
+    return digests
+
+
+def build_text_store(path: str = TEXTS_PATH) -> int:
+    """把源文件中的文本编译为文本库，返回条目数"""
+    tables = _source_tables()
+    index = {}
+    chunks = []
+    offset = 0
+    for section, table in tables.items():
+        index[section] = {}
+        for key, text in table.items():
+            # 个别条目在源文件中是只含一段文本的元组，原样保留
+            is_tuple = isinstance(text, tuple)
+            data = (json.dumps(text, ensure_ascii=False) if is_tuple else text).encode('utf-8')
+            index[section][key] = (offset, len(data), is_tuple)
+            chunks.append(data)
+            offset += len(data)
+
+    header = json.dumps({'sources': _source_digests(), 'index': index}, ensure_ascii=False).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        f.writelines(chunks)
+    return sum(len(table) for table in index.values())
+
+
+def _open():
+    """打开文本库；文件缺失、损坏或源文件内容已修改时退回到导入源文件，源文件不存在时直接用文本库"""
+    global _opened
+    if _opened is not None:
+        return _opened
+
+    try:
+        with open(TEXTS_PATH, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[:len(MAGIC)] != MAGIC:
+            raise ValueError("文本库格式不符")
+        header_len = struct.unpack_from('<I', mapped, len(MAGIC))[0]
+        body = len(MAGIC) + 4 + header_len
+        header = json.loads(mapped[len(MAGIC) + 4:body].decode('utf-8'))
+        sources = _source_digests()
+        if sources is not None and header['sources'] != sources:
+            raise ValueError("源文件已修改，文本库需要重新生成")
+        index = {section: {key: (body + offset, length, is_tuple)
+                           for key, (offset, length, is_tuple) in table.items()}
+                 for section, table in header['index'].items()}
+        _opened = (mapped, index)
+    except (OSError, ValueError, KeyError):
+        _opened = (None, _source_tables())
+    return _opened
+
+
+class TextStore(Mapping):
+    """文本库中一个分区的只读字典视图，首次访问时才打开文本库"""
+
+    def __init__(self, section: str):
+        self.section = section
+
+    def _table(self):
+        mapped, tables = _open()
+        return mapped, tables[self.section]
+
+    def __getitem__(self, key):
+        mapped, table = self._table()
+        if mapped is None:
+            return table[key]
+        offset, length, is_tuple = table[key]
+        text = mapped[offset:offset + length].decode('utf-8')
+        return tuple(json.loads(text)) if is_tuple else text
+
+    def __contains__(self, key):
+        return key in self._table()[1]
+
+    def __iter__(self):
+        return iter(self._table()[1])
+
+    def __len__(self):
+        return len(self._table()[1])
+
+
+summarys = TextStore('summarys')
+months = TextStore('months')
+
+
+if __name__ == "__main__":
+    count = build_text_store()
+    print(f"已生成文本库 {TEXTS_PATH}，共{count}条")
@@ -0,0 +1,162 @@
+"""
+流年事件模块 - 一生各流年与命局、大运之间的应期事件批量扫描
+
+bazi.py 在大运、流年循环中逐年用字符串和集合判断伏吟、夹拱、天罗地网、四生四败等标记，
+这里把一生的流年排成整数数组，地支集合用12位掩码表示，各事件一次向量运算得出：
+
+    from app.bazi_lib.bazi.transit import scan_transits
+    natal = to_pillars_batch(np.array(['1990-05-17T08:00'], dtype='datetime64[s]'))[0]
+    scan_transits(natal, birth_year=1990, start_age=3, forward=True)
+    # [(1990, '伏吟', '年柱'), (1991, '三会', '巳午未'), (1991, '夹', '午'), ...]
+
+natal 为本人命盘（8个干支序号，与 to_pillars_batch 的输出一致）；流年按年份推干支、按虚岁归入大运，
+与 LiunianAnalysisModule 一致。事件表见 TRANSIT_EVENTS。
+"""
+
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from .ganzhi import Gan, Zhi, gong_he, zhi_hes, zhi_huis
+except ImportError:
+    from ganzhi import Gan, Zhi, gong_he, zhi_hes, zhi_huis
+
+# 事件名，同一年内按此顺序排列
+TRANSIT_EVENTS = ('伏吟', '反吟', '冲日支', '三合', '三会', '夹', '拱', '天罗地网', '四生', '四败', '四库')
+
+PILLAR_NAMES = ('年柱', '月柱', '日柱', '时柱')
+
+
+def _mask(zhis: Iterable[str]) -> int:
+    """地支集合 -> 12位掩码"""
+    mask = 0
+    for zhi in zhis:
+        mask |= 1 << Zhi.index(zhi)
+    return mask
+
+
+SANHE = [(name, _mask(name)) for name in zhi_hes]
+SANHUI = [(name, _mask(name)) for name in zhi_huis]
+# 天罗地网只要求全部出现，四生、四败、四库还要求原局已有其中两支
+TIANLUO = ('戌亥辰巳', _mask('戌亥辰巳'))
+SIS = [('四生', _mask('寅申巳亥')), ('四败', _mask('子午卯酉')), ('四库', _mask('辰戌丑未'))]
+
+# 拱：两支（同干）拱出的中间字，-1为不拱
+GONG = np.full((12, 12), -1, dtype=np.int64)
+for _pair, _zhi in gong_he.items():
+    GONG[Zhi.index(_pair[0]), Zhi.index(_pair[1])] = Zhi.index(_zhi)
+
+_BITS = 1 << np.arange(12, dtype=np.int64)
+
+
+def _gan_ke(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """两干五行相克（任一方向）"""
+    return np.isin((a // 2 - b // 2) % 5, (2, 3))
+
+
+def year_pillars(years: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """公历年 -> 流年干、支序号"""
+    return (years - 4) % 10, (years - 4) % 12
+
+
+def dayun_pillars(natal: Sequence[int], ages: np.ndarray, start_age: int, forward: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """虚岁 -> 所在大运的干、支序号（月柱顺逆推），起运前为-1"""
+    step = (ages - start_age) // 10
+    month = (6 * int(natal[2]) - 5 * int(natal[3])) % 60
+    jiazi = (month + (step + 1) * (1 if forward else -1)) % 60
+    return np.where(step >= 0, jiazi % 10, -1), np.where(step >= 0, jiazi % 12, -1)
+
+
+def scan_transits(natal: Sequence[int], birth_year: int, start_age: int, forward: bool,
+                  years: int = 100, events: Optional[Iterable[str]] = None) -> List[Tuple[int, str, str]]:
+    """
+    扫描出生起 years 年内的流年事件
+
+    Args:
+        natal: 命盘8个干支序号（年干、年支、月干、月支、日干、日支、时干、时支）
+        birth_year: 出生公历年（虚岁1岁）
+        start_age: 起运虚岁
+        forward: 大运是否顺行
+        years: 扫描的年数
+        events: 只扫描其中的事件（TRANSIT_EVENTS 的子集），默认全部
+
+    Returns:
+        (年份, 事件, 说明) 列表，按年份、TRANSIT_EVENTS 顺序排列；
+        说明为伏吟、反吟所在的柱，冲日支、夹、拱所涉的地支，三合、三会、天罗地网等的地支组
+    """
+    wanted = set(TRANSIT_EVENTS if events is None else events)
+    natal = np.asarray(natal, dtype=np.int64)
+    gans, zhis = natal[0::2], natal[1::2]
+
+    year = birth_year + np.arange(years, dtype=np.int64)
+    year_gan, year_zhi = year_pillars(year)
+    dayun_gan, dayun_zhi = dayun_pillars(natal, year - birth_year + 1, start_age, forward)
+
+    # 地支掩码：原局、原局加大运、再加流年
+    natal_mask = int(np.bitwise_or.reduce(_BITS[zhis]))
+    before = natal_mask | np.where(dayun_zhi >= 0, _BITS[dayun_zhi], 0)
+    full = before | _BITS[year_zhi]
+
+    rows, orders, texts = [], [], []
+
+    def add(name, hit, detail):
+        """记下命中的年份，detail 为说明或逐年的说明数组"""
+        if name in wanted:
+            hit_rows = np.nonzero(hit)[0]
+            rows.append(hit_rows)
+            orders.append(np.full(len(hit_rows), TRANSIT_EVENTS.index(name)))
+            texts.extend([detail] * len(hit_rows) if isinstance(detail, str) else detail[hit_rows].tolist())
+
+    for pos, pillar in enumerate(PILLAR_NAMES):
+        add('伏吟', (year_gan == gans[pos]) & (year_zhi == zhis[pos]), pillar)
+        add('反吟', _gan_ke(year_gan, gans[pos]) & ((year_zhi - zhis[pos]) % 12 == 6), pillar)
+    add('冲日支', (year_zhi - zhis[2]) % 12 == 6, Zhi[zhis[2]])
+    for name, sets in (('三合', SANHE), ('三会', SANHUI)):
+        for members, bits in sets:
+            add(name, ((full & bits) == bits) & ((before & bits) != bits), members)
+
+    # 夹、拱：流年干与原局或大运某柱同干，流年支与该柱地支相隔一位（夹中间一支）或拱合出原局所无的一支
+    if wanted & {'夹', '拱'}:
+        other_gans = np.concatenate([np.broadcast_to(gans, (years, 4)), dayun_gan[:, None]], axis=1)
+        other_zhis = np.concatenate([np.broadcast_to(zhis, (years, 4)), dayun_zhi[:, None]], axis=1)
+        same = (other_gans == year_gan[:, None]) & (other_zhis >= 0)
+        gap = (year_zhi[:, None] - other_zhis) % 12
+        jia = np.where(gap == 2, year_zhi[:, None] - 1, np.where(gap == 10, year_zhi[:, None] + 1, -1)) % 12
+        jia = np.where(same & ((gap == 2) | (gap == 10)), jia, -1)
+        gong = np.where(same, GONG[other_zhis, year_zhi[:, None]], -1)
+        gong = np.where((gong >= 0) & ((natal_mask >> np.maximum(gong, 0)) & 1 == 0), gong, -1)
+        for name, table in (('夹', jia), ('拱', gong)):
+            # 同一年多柱夹（拱）出同一支只记一次
+            table = np.sort(table, axis=1)
+            first = np.concatenate([np.ones((years, 1), dtype=bool), table[:, 1:] != table[:, :-1]], axis=1)
+            for column in range(table.shape[1]):
+                hit = (table[:, column] >= 0) & first[:, column]
+                add(name, hit, np.array(Zhi, dtype=object)[np.maximum(table[:, column], 0)])
+
+    add('天罗地网', (full & TIANLUO[1]) == TIANLUO[1], TIANLUO[0])
+    for name, bits in SIS:
+        if bin(natal_mask & bits).count('1') == 2:
+            add(name, (full & bits) == bits, ''.join(Zhi[i] for i in range(12) if bits >> i & 1))
+
+    if not texts:
+        return []
+    rows, orders = np.concatenate(rows), np.concatenate(orders)
+    return [(int(year[rows[i]]), TRANSIT_EVENTS[orders[i]], texts[i]) for i in np.lexsort((orders, rows))]
+
+
+if __name__ == "__main__":
+    import time
+
+    try:
+        from .modules.core_base import to_pillars_batch
+    except ImportError:
+        from modules.core_base import to_pillars_batch
+
+    natal = to_pillars_batch(np.array(['1990-05-17T08:00'], dtype='datetime64[s]'))[0]
+    print(' '.join(Gan[natal[i]] + Zhi[natal[i + 1]] for i in range(0, 8, 2)))
+    started = time.perf_counter()
+    transits = scan_transits(natal, 1990, 3, True)
+    print(f"一生流年事件{len(transits)}条（耗时{(time.perf_counter() - started) * 1000:.2f}ms）：")
+    for item in transits:
+        print(*item)
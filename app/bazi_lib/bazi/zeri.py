@@ -0,0 +1,293 @@
+"""
+择日模块 - 在一段日期内按条件挑选日子
+
+整段日期一次排出逐日的年月日柱、农历日期、建除、日家九星和神煞（全部为数组运算，不逐日调用历法库），
+再按条件筛选：
+
+    from app.bazi_lib.bazi.zeri import select_days
+    select_days('2025-01-01', '2026-12-31', natal=chart, activity='嫁娶', limit=20)
+
+natal 为本人命盘（8个干支序号，与 to_pillars_batch 的输出一致），给出时才计算与命盘相冲和本人神煞。
+年月柱按整天计：当天交节则当天即算新月（与 luohou.py 原先用 sxtwl 取的年月柱一致）。
+"""
+
+import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    from .ganzhi import Gan, Zhi, zhi_atts, datouxiu, xiaotouxiu
+    from .datas import jianchus, year_shens_index, month_shens_index, day_shens_index, g_shens_index, \
+        shens_bits, shens_mask_names
+    from .jieqi import JIEQI_NAMES, jieqi_table, TABLE_START_YEAR
+    from .modules.core_base import to_pillars_batch, solar_to_lunar_batch
+except ImportError:
+    from ganzhi import Gan, Zhi, zhi_atts, datouxiu, xiaotouxiu
+    from datas import jianchus, year_shens_index, month_shens_index, day_shens_index, g_shens_index, \
+        shens_bits, shens_mask_names
+    from jieqi import JIEQI_NAMES, jieqi_table, TABLE_START_YEAR
+    from modules.core_base import to_pillars_batch, solar_to_lunar_batch
+
+# 日家九星，序号0为一白
+NINE_STARS = ('一白', '二黑', '三碧', '四绿', '五黄', '六白', '七赤', '八白', '九紫')
+LUCKY_STARS = ('一白', '六白', '八白', '九紫')
+
+# 按节气所在季节（冬至起算）
+SEASONS = ('冬', '春', '夏', '秋', '冬')
+
+# 日柱为吉的神煞，评分时各加一分
+LUCKY_SHENS = ('天德', '月德', '天乙', '文昌')
+
+# 罗猴日（原 luohou.py）：年猴按年支取日柱，月罗按农历月取日支，季猴按季节取日柱
+YEAR_HOUS = {'子': '癸酉', '丑': '甲戌', '寅': '丁亥', '卯': '甲子', '辰': '乙丑', '巳': '甲寅',
+             '午': '丁卯', '未': '甲辰', '申': '己巳', '酉': '甲午', '戌': '丁未', '亥': '甲申'}
+MONTH_LUOS = {1: '亥', 2: '子', 3: '丑', 4: '寅', 5: '卯', 6: '辰',
+              7: '巳', 8: '午', 9: '未', 10: '申', 11: '酉', 12: '戌'}
+SEASON_HOUS = {'春': '乙卯', '夏': '丙午', '秋': '庚申', '冬': '辛酉'}
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def _jiazi(gan: int, zhi: int) -> int:
+    """干支序号 -> 六十甲子序号"""
+    return (6 * gan - 5 * zhi) % 60
+
+
+def _jiazi_of(name: str) -> int:
+    return _jiazi(Gan.index(name[0]), Zhi.index(name[1]))
+
+
+def _pair_table(index: Dict, refs: Sequence[str], targets: Sequence[str]) -> np.ndarray:
+    """神煞倒排索引 -> (参照, 目标) 的位掩码数组"""
+    return np.array([[index.get((ref, target), 0) for target in targets] for ref in refs], dtype=np.int64)
+
+
+CHONG = np.array([Zhi.index(zhi_atts[zhi]['冲']) for zhi in Zhi])
+TOUXIU = np.zeros(60, dtype=np.int8)
+TOUXIU[[_jiazi_of(name) for name in datouxiu]] = 2
+TOUXIU[[_jiazi_of(name) for name in xiaotouxiu]] = 1
+YEAR_HOU_TABLE = np.array([_jiazi_of(YEAR_HOUS[zhi]) for zhi in Zhi])
+MONTH_LUO_TABLE = np.array([-1] + [Zhi.index(MONTH_LUOS[month]) for month in range(1, 13)])
+SEASON_HOU_TABLE = np.array([_jiazi_of(SEASON_HOUS[season]) for season in SEASONS])
+
+MONTH_SHENS_GAN = _pair_table(month_shens_index, Zhi, Gan)
+MONTH_SHENS_ZHI = _pair_table(month_shens_index, Zhi, Zhi)
+YEAR_SHENS = _pair_table(year_shens_index, Zhi, Zhi)
+DAY_SHENS = _pair_table(day_shens_index, Zhi, Zhi)
+G_SHENS = _pair_table(g_shens_index, Gan, Zhi)
+
+
+def _as_day(value) -> np.datetime64:
+    return np.datetime64(value, 'D')
+
+
+def _star_anchors():
+    """
+    日家九星的起点：冬至、夏至前后最近的甲子日（与 lunar_python 相同，
+    节气日的六十甲子序号大于29时取其后的甲子，否则取其前的甲子）
+
+    Returns:
+        (起点距1970年的天数, 是否阳遁, 对应冬至夏至所在的公历年)，按时间排序
+    """
+    table = np.frombuffer(jieqi_table(), dtype=np.int64)
+    solstices = np.sort(np.concatenate([table[JIEQI_NAMES.index('夏至')::24], table[JIEQI_NAMES.index('冬至')::24]]))
+    days = solstices // 86400
+    index = (days + 17) % 60
+    anchors = np.where(index > 29, days + 60 - index, days - index)
+    years = np.arange(len(solstices)) // 2 + TABLE_START_YEAR
+    # 排序后偶数位为夏至、奇数位为冬至：冬至起阳遁
+    return anchors, np.arange(len(solstices)) % 2 == 1, years
+
+
+_anchors = None
+
+
+def day_stars(days: np.ndarray) -> np.ndarray:
+    """日家九星（NINE_STARS 的序号）：冬至后甲子日起一白顺行，夏至后甲子日起九紫逆行"""
+    global _anchors
+    if _anchors is None:
+        _anchors = _star_anchors()
+    anchors, ascending, years = _anchors
+    pos = np.searchsorted(anchors, days, side='right') - 1
+    since = days - anchors[pos]
+    stars = np.where(ascending[pos], since % 9, 8 - since % 9)
+    # 上年冬至的起点落在本年一月时，本年一月起点前的日子 lunar_python 按起点倒推：(8 + 距起点天数) % 9
+    day_years = (np.asarray(days).astype('datetime64[D]').astype('datetime64[Y]').astype(np.int64) + 1970)
+    next_pos = np.minimum(pos + 1, len(anchors) - 1)
+    early = ~ascending[pos] & (years[next_pos] < day_years)
+    return np.where(early, (8 + anchors[next_pos] - days) % 9, stars)
+
+
+def day_table(start, end) -> Dict[str, np.ndarray]:
+    """
+    逐日表：start～end（含）每天一行的列数组
+
+    Returns:
+        date（datetime64[D]）、pillars（(N, 8)，时柱为空）、jiazi（日柱六十甲子序号）、
+        lunar_year/lunar_month/lunar_day/lunar_leap、season（SEASONS 序号）、
+        jianchu（建除序号，0为建）、star（日家九星序号）、shens（当日天德月德的位掩码）
+    """
+    start, end = _as_day(start), _as_day(end)
+    if end < start:
+        raise ValueError("结束日期早于开始日期")
+    dates = np.arange(start, end + 1, dtype='datetime64[D]')
+    days = (dates - _EPOCH).astype(np.int64)
+
+    # 取当天最后一秒：当天交节即算新月，日柱不受晚子时影响
+    pillars = to_pillars_batch(dates.astype('datetime64[s]') + np.timedelta64(86399, 's')).astype(np.int64)
+    pillars[:, 6:] = -1
+    month_zhi, day_gan, day_zhi = pillars[:, 3], pillars[:, 4], pillars[:, 5]
+
+    # 当天及之前最近的节气，换算为冬至起算的季节
+    table = np.frombuffer(jieqi_table(), dtype=np.int64)
+    jieqi = (np.searchsorted(table, days * 86400 + 86399, side='right') - 1) % 24
+    lunar_year, lunar_month, lunar_day, lunar_leap = solar_to_lunar_batch(dates)
+
+    return {
+        'date': dates,
+        'pillars': pillars,
+        'jiazi': _jiazi(day_gan, day_zhi),
+        'lunar_year': lunar_year,
+        'lunar_month': lunar_month,
+        'lunar_day': lunar_day,
+        'lunar_leap': lunar_leap,
+        'season': ((jieqi + 1) % 24 + 3) // 6,
+        'jianchu': (day_zhi - month_zhi) % 12,
+        'star': day_stars(days),
+        'shens': MONTH_SHENS_GAN[month_zhi, day_gan] | MONTH_SHENS_ZHI[month_zhi, day_zhi],
+    }
+
+
+def day_markers(table: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """逐日的忌日标记（布尔数组）：岁破、月破、大偷休、小偷休、年猴、月罗、季猴"""
+    pillars = table['pillars']
+    jiazi = table['jiazi']
+    return {
+        '岁破': pillars[:, 5] == CHONG[pillars[:, 1]],
+        '月破': pillars[:, 5] == CHONG[pillars[:, 3]],
+        '大偷休': TOUXIU[jiazi] == 2,
+        '小偷休': TOUXIU[jiazi] == 1,
+        '年猴': jiazi == YEAR_HOU_TABLE[pillars[:, 1]],
+        '月罗': pillars[:, 5] == MONTH_LUO_TABLE[table['lunar_month']],
+        '季猴': jiazi == SEASON_HOU_TABLE[table['season']],
+    }
+
+
+def natal_shens(table: Dict[str, np.ndarray], natal) -> np.ndarray:
+    """以本人年支、日支、日干为参照，日柱所带神煞的位掩码"""
+    natal = np.asarray(natal, dtype=np.int64).ravel()
+    day_zhi = table['pillars'][:, 5]
+    return (YEAR_SHENS[natal[1], day_zhi] | DAY_SHENS[natal[1], day_zhi] | DAY_SHENS[natal[5], day_zhi]
+            | G_SHENS[natal[4], day_zhi])
+
+
+def natal_clash(table: Dict[str, np.ndarray], natal, pillars: Iterable[str] = ('year', 'day')) -> np.ndarray:
+    """日支冲本人指定柱的地支（冲年支即冲生肖）"""
+    natal = np.asarray(natal, dtype=np.int64).ravel()
+    columns = {'year': 1, 'month': 3, 'day': 5, 'time': 7}
+    day_zhi = table['pillars'][:, 5]
+    clash = np.zeros(len(day_zhi), dtype=bool)
+    for pillar in pillars:
+        clash |= day_zhi == CHONG[natal[columns[pillar]]]
+    return clash
+
+
+def activity_jianchus(activity: str) -> List[int]:
+    """建除十二神中宜某事且不忌该事的序号，如 activity_jianchus('嫁娶')"""
+    allowed = []
+    for index, (_, text) in jianchus.items():
+        good, _, bad = text.partition('忌')
+        if activity in good and activity not in bad:
+            allowed.append(index)
+    return allowed
+
+
+def _mask(names: Iterable[str]) -> int:
+    mask = 0
+    for name in names:
+        mask |= shens_bits[name]
+    return mask
+
+
+def select_days(start, end, natal=None, activity: Optional[str] = None,
+                avoid: Iterable[str] = ('岁破', '月破'), avoid_clash: Iterable[str] = ('year', 'day'),
+                stars: Optional[Iterable[str]] = None, require_shens: Iterable[str] = (),
+                avoid_shens: Iterable[str] = (), limit: Optional[int] = None,
+                order: str = 'date') -> List[Dict[str, Any]]:
+    """
+    在 start～end（含）内挑选日子
+
+    Args:
+        start, end: 日期（date、datetime 或 'YYYY-MM-DD'）
+        natal: 本人命盘（8个干支序号），给出时避开日支冲本人 avoid_clash 各柱的日子，并计入本人神煞
+        activity: 事项（如 '嫁娶'），只保留建除宜该事的日子
+        avoid: 要避开的忌日标记，见 day_markers
+        stars: 日家九星须在其中，如 LUCKY_STARS
+        require_shens: 必须带有的神煞（任一即可）
+        avoid_shens: 不能带有的神煞
+        limit: 最多返回几天
+        order: 'date' 按日期，'score' 按吉神、吉星多少从高到低
+
+    Returns:
+        [{'date', 'lunar', 'ganzhi', 'jianchu', 'star', 'shens', 'markers', 'score'}]
+    """
+    table = day_table(start, end)
+    markers = day_markers(table)
+    keep = np.ones(len(table['date']), dtype=bool)
+    for name in avoid:
+        keep &= ~markers[name]
+
+    shens = table['shens']
+    if natal is not None:
+        keep &= ~natal_clash(table, natal, avoid_clash)
+        shens = shens | natal_shens(table, natal)
+    if activity:
+        keep &= np.isin(table['jianchu'], activity_jianchus(activity))
+    if stars is not None:
+        keep &= np.isin(table['star'], [NINE_STARS.index(star) for star in stars])
+    required = _mask(require_shens)
+    if required:
+        keep &= (shens & required) != 0
+    avoided = _mask(avoid_shens)
+    if avoided:
+        keep &= (shens & avoided) == 0
+
+    score = np.isin(table['star'], [NINE_STARS.index(star) for star in LUCKY_STARS]).astype(np.int64)
+    for name in LUCKY_SHENS:
+        score += (shens & shens_bits[name]) != 0
+
+    rows = np.flatnonzero(keep)
+    if order == 'score':
+        rows = rows[np.argsort(-score[rows], kind='stable')]
+    if limit is not None:
+        rows = rows[:limit]
+
+    pillars = table['pillars']
+    results = []
+    for i in rows:
+        results.append({
+            'date': table['date'][i].item(),
+            'lunar': "{}年{}{}月{}日".format(table['lunar_year'][i], "闰" if table['lunar_leap'][i] else "",
+                                          table['lunar_month'][i], table['lunar_day'][i]),
+            'ganzhi': ''.join(Gan[pillars[i, col]] + Zhi[pillars[i, col + 1]] for col in (0, 2, 4)),
+            'jianchu': jianchus[table['jianchu'][i]][0],
+            'star': NINE_STARS[table['star'][i]],
+            'shens': list(shens_mask_names(int(shens[i]))),
+            'markers': [name for name, flags in markers.items() if flags[i]],
+            'score': int(score[i]),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    import time
+
+    natal = to_pillars_batch(np.array(['1990-05-17T08:00'], dtype='datetime64[s]'))[0]
+    today = datetime.date.today()
+    started = time.perf_counter()
+    days = select_days(today, today + datetime.timedelta(days=730), natal=natal, activity='嫁娶',
+                       stars=LUCKY_STARS, order='score', limit=10)
+    print(f"两年内宜嫁娶的日子（耗时{(time.perf_counter() - started) * 1000:.1f}ms）：")
+    for day in days:
+        print(day['date'], day['lunar'], day['ganzhi'], day['jianchu'], day['star'], ' '.join(day['shens']))
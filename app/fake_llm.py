@@ -0,0 +1,116 @@
+# fake_llm.py
+# 压测用的假聊天模型：不联网，按配置的首字延迟和出字速度休眠后返回固定格式的解读
+#
+# 通过 LLM_PROVIDER=fake 启用，参数取自环境变量：
+#   FAKE_LLM_TTFT_MS      首字延迟中位数（毫秒），默认 800，按对数正态分布抽样
+#   FAKE_LLM_TTFT_SIGMA   首字延迟的对数标准差，默认 0.5
+#   FAKE_LLM_TOKENS       平均输出 token 数，默认 600，按正态分布抽样（标准差为均值的四分之一）
+#   FAKE_LLM_TOKEN_RATE   出字速度（token/秒），默认 40
+#   FAKE_LLM_ERROR_RATE   调用失败的概率，默认 0
+#   FAKE_LLM_SEED         随机种子，不设置时每次运行不同
+#
+# create_llm 每个请求都会调用，经 shared_fake_model 复用同一个实例：
+# 所有请求从同一个随机流抽样，设置了 FAKE_LLM_SEED 时整次压测可复现，而不是每个请求都抽到相同的延迟和结果
+
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+FAKE_REPLY = """1. 性格特点：日主得令，为人稳重，做事有条理。
+2. 事业财运：宜稳中求进，中年后财运渐佳。
+3. 感情婚姻：感情专一，宜多沟通。
+4. 健康运势：注意脾胃与作息。
+5. 人生建议：顺势而为，厚积薄发。
+- 黄金
+- 海蓝宝
+- 紫水晶"""
+
+
+class FakeMessage:
+    """与 LangChain 的 AIMessage 同名字段：content、usage_metadata、response_metadata"""
+
+    def __init__(self, content: str, input_tokens: int, output_tokens: int, model: str):
+        self.content = content
+        self.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        self.response_metadata = {"model_name": model, "finish_reason": "stop"}
+
+
+class FakeLLMError(RuntimeError):
+    pass
+
+
+class FakeChatModel:
+    """按延迟分布休眠的假模型，invoke/ainvoke 与 LangChain 聊天模型用法一致"""
+
+    def __init__(self, ttft_ms: float = 800, ttft_sigma: float = 0.5, tokens: int = 600,
+                 token_rate: float = 40, error_rate: float = 0.0, seed: Optional[int] = None,
+                 model: str = "fake-chat"):
+        self.ttft_ms = ttft_ms
+        self.ttft_sigma = ttft_sigma
+        self.tokens = tokens
+        self.token_rate = token_rate
+        self.error_rate = error_rate
+        self.model = model
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, model_config: Optional[Dict[str, Any]] = None) -> "FakeChatModel":
+        seed = os.getenv("FAKE_LLM_SEED")
+        return cls(
+            ttft_ms=float(os.getenv("FAKE_LLM_TTFT_MS", "800")),
+            ttft_sigma=float(os.getenv("FAKE_LLM_TTFT_SIGMA", "0.5")),
+            tokens=int(os.getenv("FAKE_LLM_TOKENS", "600")),
+            token_rate=float(os.getenv("FAKE_LLM_TOKEN_RATE", "40")),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            seed=int(seed) if seed else None,
+            model=(model_config or {}).get("model", "fake-chat"),
+        )
+
+    def _sample(self, prompt: str):
+        """抽样一次调用：(耗时秒数, 输出token数, 是否失败)"""
+        with self._lock:
+            ttft = self._rng.lognormvariate(0, self.ttft_sigma) * self.ttft_ms / 1000
+            output_tokens = max(1, int(self._rng.gauss(self.tokens, self.tokens / 4)))
+            failed = self._rng.random() < self.error_rate
+        return ttft + output_tokens / self.token_rate, output_tokens, failed
+
+    def _reply(self, prompt: str, output_tokens: int, failed: bool) -> FakeMessage:
+        if failed:
+            raise FakeLLMError("fake LLM injected error")
+        # 中文大约每1.5个字符一个 token
+        return FakeMessage(FAKE_REPLY, int(len(str(prompt)) / 1.5), output_tokens, self.model)
+
+    def invoke(self, prompt, **kwargs) -> FakeMessage:
+        seconds, output_tokens, failed = self._sample(prompt)
+        time.sleep(seconds)
+        return self._reply(prompt, output_tokens, failed)
+
+    async def ainvoke(self, prompt, **kwargs) -> FakeMessage:
+        seconds, output_tokens, failed = self._sample(prompt)
+        await asyncio.sleep(seconds)
+        return self._reply(prompt, output_tokens, failed)
+
+
+_shared_models: Dict[tuple, FakeChatModel] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_fake_model(model_config: Optional[Dict[str, Any]] = None) -> FakeChatModel:
+    """按当前环境变量与模型名复用的 FakeChatModel，配置变化时新建"""
+    key = tuple(os.getenv(name) for name in (
+        "FAKE_LLM_TTFT_MS", "FAKE_LLM_TTFT_SIGMA", "FAKE_LLM_TOKENS",
+        "FAKE_LLM_TOKEN_RATE", "FAKE_LLM_ERROR_RATE", "FAKE_LLM_SEED",
+    )) + ((model_config or {}).get("model"),)
+    with _shared_lock:
+        model = _shared_models.get(key)
+        if model is None:
+            model = _shared_models[key] = FakeChatModel.from_env(model_config)
+        return model
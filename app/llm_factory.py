@@ -8,6 +8,11 @@ def create_llm():
     api_key = settings.get_current_api_key()
     model_config = settings.get_current_model_config()
     
+    if provider == "fake":
+        # 压测用的假模型，不联网也不需要API密钥；各请求共用一个实例，从同一个随机流抽样
+        from app.fake_llm import shared_fake_model
+        return shared_fake_model(model_config)
+    
     if not api_key:
         raise ValueError(f"API key for {provider} is not configured. Please set {provider.upper()}_API_KEY environment variable or update config.py")
     
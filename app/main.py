@@ -22,6 +22,13 @@ app.add_middleware(
 from app.bazi_interpret import router as bazi_router
 app.include_router(bazi_router)
 
+from app.metrics import metrics_response
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus 指标"""
+    return metrics_response()
+
 class AskRequest(BaseModel):
     question: str
     k: int = 3
@@ -0,0 +1,104 @@
+# memory_vectorstore.py
+# 进程内向量库：VECTORSTORE_BACKEND=memory 时代替 pgvector，用于压测和离线开发
+#
+# 向量为字的一元、二元组哈希到固定维度后的计数（L2归一化），按余弦相似度检索；
+# 默认集合预先装入八字引擎自带的古籍文本（时柱断语、月令论述），不需要下载模型或连接数据库。
+# MEMORY_VECTORSTORE_LATENCY_MS 可为每次检索加上固定延迟，模拟数据库往返。
+
+import os
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+
+EMBEDDING_DIM = 1024
+
+
+class Document:
+    """与 LangChain 的 Document 同名字段"""
+
+    def __init__(self, page_content: str, metadata: Optional[dict] = None):
+        self.page_content = page_content
+        self.metadata = metadata or {}
+
+    def __repr__(self):
+        return f"Document(page_content={self.page_content[:20]!r}...)"
+
+
+def embed(text: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """字的一元、二元组哈希向量"""
+    vector = np.zeros(dim, dtype=np.float32)
+    for gram in list(text) + [text[i:i + 2] for i in range(len(text) - 1)]:
+        if not gram.isspace():
+            vector[zlib.crc32(gram.encode('utf-8')) % dim] += 1
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class InMemoryVectorStore:
+    """线程安全的内存向量库，接口与 PGVector 用到的部分一致"""
+
+    def __init__(self, dim: int = EMBEDDING_DIM, latency_ms: float = 0):
+        self.dim = dim
+        self.latency_ms = latency_ms
+        self._documents: List[Document] = []
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._lock = threading.Lock()
+
+    def add_documents(self, docs):
+        documents = [doc if hasattr(doc, 'page_content') else Document(str(doc)) for doc in docs]
+        vectors = np.stack([embed(doc.page_content, self.dim) for doc in documents]) if documents else None
+        with self._lock:
+            self._documents.extend(documents)
+            if vectors is not None:
+                self._matrix = np.vstack([self._matrix, vectors])
+
+    def add_texts(self, texts, metadatas=None):
+        metadatas = metadatas or [None] * len(texts)
+        self.add_documents([Document(text, metadata) for text, metadata in zip(texts, metadatas)])
+
+    def similarity_search(self, query: str, k: int = 3) -> List[Document]:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        with self._lock:
+            matrix, documents = self._matrix, self._documents
+        if not documents:
+            return []
+        scores = matrix @ embed(query, self.dim)
+        k = min(k, len(documents))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [documents[i] for i in top[np.argsort(-scores[top])]]
+
+    def __len__(self):
+        return len(self._documents)
+
+
+_stores: Dict[str, InMemoryVectorStore] = {}
+_stores_lock = threading.Lock()
+
+
+def _seed_documents() -> List[Document]:
+    """八字引擎自带的古籍文本"""
+    from app.bazi_lib.bazi.textstore import months, summarys
+
+    documents = []
+    for source, table in (("sizi", summarys), ("yue", months)):
+        for key in table:
+            text = table[key]
+            if isinstance(text, tuple):
+                text = "".join(text)
+            documents.append(Document(text.strip(), {"source": source, "key": key}))
+    return documents
+
+
+def get_memory_vectorstore(collection_name: str = "ziwei_knowledge") -> InMemoryVectorStore:
+    """按集合名取向量库，首次使用时创建并装入默认文本"""
+    with _stores_lock:
+        store = _stores.get(collection_name)
+        if store is None:
+            store = InMemoryVectorStore(latency_ms=float(os.getenv("MEMORY_VECTORSTORE_LATENCY_MS", "0")))
+            store.add_documents(_seed_documents())
+            _stores[collection_name] = store
+    return store
@@ -0,0 +1,108 @@
+# metrics.py
+# Prometheus 指标：/bazi_interpret 各阶段耗时、八字引擎降级与缓存命中、LLM 错误与 token 用量
+
+import os
+import time
+from contextlib import contextmanager
+
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from app.bazi_lib.bazi.bazi_log import add_event_listener
+
+# gunicorn 多进程部署时由 gunicorn.conf.py 设置此目录，各 worker 的指标写入其中，抓取时汇总
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+# 从毫秒级的排盘到分钟级的 LLM 调用
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+STAGE_SECONDS = Histogram(
+    "bazi_interpret_stage_seconds",
+    "/bazi_interpret 各阶段耗时（chart 排盘分析、retrieval 知识库检索、llm 模型调用、total 整个请求）",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+IN_PROGRESS = Gauge(
+    "bazi_interpret_in_progress",
+    "正在处理的 /bazi_interpret 请求数",
+    multiprocess_mode="livesum",
+)
+FALLBACKS = Counter(
+    "bazi_analyzer_fallbacks_total",
+    "八字引擎降级次数（吞掉异常后改用备用分析或默认结果）",
+    ["event"],
+)
+CACHE_LOOKUPS = Counter(
+    "bazi_cache_lookups_total",
+    "八字引擎缓存查询次数",
+    ["cache", "result"],
+)
+LLM_ERRORS = Counter(
+    "llm_errors_total",
+    "LLM 调用失败次数",
+    ["provider"],
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "LLM token 用量",
+    ["provider", "type"],
+)
+
+
+def _on_bazi_event(kind, name):
+    if kind == "fallback":
+        FALLBACKS.labels(name).inc()
+    else:
+        CACHE_LOOKUPS.labels(name, "hit" if kind == "cache_hit" else "miss").inc()
+
+
+add_event_listener(_on_bazi_event)
+
+
+@contextmanager
+def track_stage(stage: str):
+    """统计一个阶段的耗时，阶段内抛出异常时同样计入"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+
+
+def record_llm_usage(provider: str, answer):
+    """从 LangChain 的返回消息中取 token 用量（usage_metadata 或各家的 response_metadata）"""
+    usage = getattr(answer, "usage_metadata", None) or {}
+    if not usage:
+        metadata = getattr(answer, "response_metadata", None) or {}
+        raw = metadata.get("token_usage") or metadata.get("usage") or {}
+        usage = {
+            "input_tokens": raw.get("prompt_tokens", raw.get("input_tokens", 0)),
+            "output_tokens": raw.get("completion_tokens", raw.get("output_tokens", 0)),
+        }
+    for token_type in ("input", "output"):
+        count = usage.get(f"{token_type}_tokens") or 0
+        if count:
+            LLM_TOKENS.labels(provider, token_type).inc(count)
+
+
+def record_llm_error(provider: str):
+    LLM_ERRORS.labels(provider).inc()
+
+
+def metrics_response() -> Response:
+    """/metrics 的响应；多进程模式下汇总所有 worker 的指标"""
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -1,28 +1,42 @@
 # vectorstore.py
 # Integration with Postgres + pgvector for LangChain
+# VECTORSTORE_BACKEND=memory switches to the in-process store in memory_vectorstore.py (load tests, offline dev)
 
-from langchain_community.vectorstores.pgvector import PGVector
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from sqlalchemy import create_engine
+import os
 from app import config
 
+BACKEND = os.getenv("VECTORSTORE_BACKEND", "pgvector")
+
 DB_CONNECTION_STRING = (
     f"postgresql+psycopg2://{config.POSTGRES_USER}:{config.POSTGRES_PASSWORD}"
     f"@{config.POSTGRES_HOST}:{config.POSTGRES_PORT}/{config.POSTGRES_DB}"
 )
 
-# Use a smaller, Chinese-optimized model
-embeddings = HuggingFaceEmbeddings(model_name="shibing624/text2vec-base-chinese")
+# Use a smaller, Chinese-optimized model (loaded on first use)
+_embeddings = None
+
+
+def get_embeddings():
+    global _embeddings
+    if _embeddings is None:
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        _embeddings = HuggingFaceEmbeddings(model_name="shibing624/text2vec-base-chinese")
+    return _embeddings
 
 
 def get_vectorstore(collection_name: str = "ziwei_knowledge"):
     """
     Returns a PGVector vector store instance for the given collection.
     """
+    if BACKEND == "memory":
+        from app.memory_vectorstore import get_memory_vectorstore
+        return get_memory_vectorstore(collection_name)
+
+    from langchain_community.vectorstores.pgvector import PGVector
     return PGVector(
         collection_name=collection_name,
         connection_string=DB_CONNECTION_STRING,
-        embedding_function=embeddings,
+        embedding_function=get_embeddings(),
     )
 
 
@@ -39,4 +53,4 @@ def similarity_search(query, k=3, collection_name: str = "ziwei_knowledge"):
     Performs a similarity search for the query and returns the top k results.
     """
     vectorstore = get_vectorstore(collection_name)
-    return vectorstore.similarity_search(query, k=k)
\ No newline at end of file
+    return vectorstore.similarity_search(query, k=k)
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+八字引擎基准 - 在固定的出生时间语料（1900～2100年，默认2000条）上测各环节的吞吐，结果存为JSON
+
+覆盖：CoreBaseModule 换算（逐条与批量）、BaziScoreCalculator、各分析模块（构造 + get_result）、
+完整的 BaziAnalyzer 与 SimpleBaziAnalyzer、parse_bazi_output，以及替换掉LLM和向量库后的 /bazi_interpret
+
+引擎内的 LRU 缓存（命盘、大运步）会让重复测量越跑越快，因此每个基准分冷热两次：
+冷耗时在停用全部缓存的情况下测量，记在基准名下；热耗时先清空缓存、不计时地跑一遍语料再测量，记在“名称:warm”下。
+
+用法：
+    python bench_engine.py                                  # 全部基准，结果写入 .benchmarks/engine-<提交>.json
+    python bench_engine.py -k module. -n 500                # 只跑名称含 module. 的基准，语料500条
+    python bench_engine.py --cache cold                     # 只测冷耗时
+    python bench_engine.py --compare .benchmarks/engine-abc1234.json   # 与之前的结果对比，变慢超过阈值时返回码为1
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import types
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BAZI_DIR = os.path.join(ROOT, 'app', 'bazi_lib', 'bazi')
+RESULTS_DIR = os.path.join(ROOT, '.benchmarks')
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# 各分析模块按依赖顺序排列：第i个模块的构造参数为前i个模块的结果
+MODULE_CHAIN = [
+    ('core_base', 'core_module'),
+    ('basic_info', 'basic_info_module'),
+    ('bazi_main', 'bazi_main_module'),
+    ('detail_info', 'detail_info_module'),
+    ('shens_analysis', 'shens_analysis_module'),
+    ('zhi_relations', 'zhi_relations_module'),
+    ('dayun_analysis', 'dayun_analysis_module'),
+    ('liunian_analysis', 'liunian_analysis_module'),
+    ('liuqin_analysis', 'liuqin_analysis_module'),
+    ('personality_analysis', 'personality_analysis_module'),
+]
+
+
+def make_corpus(size, seed=20240101):
+    """固定种子生成出生时间语料：(年, 月, 日, 时, 性别)，公历1900～2100年"""
+    rng = random.Random(seed)
+    start = datetime.date(1900, 1, 1).toordinal()
+    end = datetime.date(2100, 12, 31).toordinal()
+    corpus = []
+    for i in range(size):
+        day = datetime.date.fromordinal(rng.randint(start, end))
+        corpus.append((day.year, day.month, day.day, rng.randrange(24), '男' if i % 2 == 0 else '女'))
+    return corpus
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+# ---------------------------------------------------------------- 基准定义
+# 每个基准为 setup(corpus) -> (条目列表, 对单条执行的函数)
+
+def setup_core_base(corpus):
+    from app.bazi_lib.bazi.modules.core_base import CoreBaseModule
+
+    def run(item):
+        year, month, day, hour, gender = item
+        CoreBaseModule(year, month, day, hour, gender, True).get_result()
+    return corpus, run
+
+
+def setup_core_base_batch(corpus):
+    import numpy as np
+    from app.bazi_lib.bazi.modules.core_base import to_pillars_batch
+
+    moments = np.array([f"{y:04d}-{m:02d}-{d:02d}T{h:02d}:00" for y, m, d, h, _ in corpus], dtype='datetime64[m]')
+    # 整批一次换算，按条目数折算单条耗时
+    return [moments], to_pillars_batch
+
+
+# 参考分析器按语料缓存，分数与各模块基准共用
+_analyzer_cache = {}
+
+
+def _reference_analyzers(corpus):
+    from app.bazi_lib.bazi.bazi_analyzer import BaziAnalyzer
+    key = tuple(corpus)
+    if key not in _analyzer_cache:
+        _analyzer_cache.clear()
+        _analyzer_cache[key] = [BaziAnalyzer(year, month, day, hour, gender, True)
+                                for year, month, day, hour, gender in corpus]
+    return _analyzer_cache[key]
+
+
+def setup_score(corpus):
+    from app.bazi_lib.bazi.modules.bazi_score import BaziScoreCalculator
+
+    items = []
+    for analyzer in _reference_analyzers(corpus):
+        main = analyzer.bazi_main_module
+        if main is not None:
+            items.append((list(main.gans), list(main.zhis), main.me, list(main.shens)))
+
+    def run(item):
+        BaziScoreCalculator(*item).get_complete_analysis()
+    return items, run
+
+
+def make_module_setup(position):
+    """第 position 个分析模块：用参考分析器的上游结果作为构造参数"""
+
+    def setup(corpus):
+        items = []
+        module_class = None
+        for analyzer in _reference_analyzers(corpus):
+            upstream = []
+            for _, attr in MODULE_CHAIN[:position]:
+                module = getattr(analyzer, attr)
+                if module is None:
+                    break
+                upstream.append(module.get_result())
+            module = getattr(analyzer, MODULE_CHAIN[position][1])
+            if module is None or len(upstream) != position:
+                continue
+            module_class = type(module)
+            items.append(tuple(upstream))
+
+        def run(args):
+            module_class(*args).get_result()
+        return items, run
+    return setup
+
+
+def setup_bazi_analyzer(corpus):
+    from app.bazi_lib.bazi.bazi_analyzer import BaziAnalyzer
+
+    def run(item):
+        year, month, day, hour, gender = item
+        BaziAnalyzer(year, month, day, hour, gender, True).get_result()
+    return corpus, run
+
+
+def setup_simple_bazi_analyzer(corpus):
+    from app.bazi_lib.bazi.simple_bazi_analyzer import SimpleBaziAnalyzer
+
+    def run(item):
+        year, month, day, hour, gender = item
+        SimpleBaziAnalyzer(year, month, day, hour, gender, True).get_compatible_result()
+    return corpus, run
+
+
+def setup_parse_bazi_output(corpus):
+    from app.bazi_lib.bazi_json import parse_bazi_output
+
+    # bazi.py 命令行输出要开子进程才能拿到，只取语料前20条，解析时循环使用
+    texts = []
+    for year, month, day, hour, gender in corpus[:20]:
+        args = [sys.executable, 'bazi.py', str(year), str(month), str(day), str(hour), '-g']
+        if gender == '女':
+            args.append('-n')
+        proc = subprocess.run(args, cwd=BAZI_DIR, capture_output=True)
+        texts.append(proc.stdout.decode('utf-8', errors='replace'))
+    items = [texts[i % len(texts)] for i in range(len(corpus))]
+    return items, parse_bazi_output
+
+
+class _StubAnswer:
+    content = "性格稳重。\n- 黄金"
+    usage_metadata = {'input_tokens': 0, 'output_tokens': 0}
+
+
+class _StubLLM:
+    def invoke(self, prompt):
+        return _StubAnswer()
+
+
+def setup_api(corpus):
+    """/bazi_interpret：LLM 与向量库换成立即返回的桩，只测服务自身的开销"""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    vectorstore = types.ModuleType('app.vectorstore')
+    vectorstore.similarity_search = lambda query, k=3, collection_name=None: []
+    sys.modules['app.vectorstore'] = vectorstore
+    import app.llm_factory
+    app.llm_factory.create_llm = lambda: _StubLLM()
+
+    from app.bazi_interpret import router
+    api = FastAPI()
+    api.include_router(router)
+    client = TestClient(api)
+
+    def run(item):
+        year, month, day, hour, gender = item
+        response = client.post('/bazi_interpret', json={
+            'year': year, 'month': month, 'day': day, 'hour': hour, 'gender': gender, 'use_gregorian': True})
+        response.raise_for_status()
+    return corpus, run
+
+
+BENCHMARKS = {
+    'core_base.convert': setup_core_base,
+    'core_base.batch': setup_core_base_batch,
+    'score.calculator': setup_score,
+}
+for _position, (_name, _) in enumerate(MODULE_CHAIN):
+    if _position:
+        BENCHMARKS[f'module.{_name}'] = make_module_setup(_position)
+BENCHMARKS.update({
+    'analyzer.bazi': setup_bazi_analyzer,
+    'analyzer.simple': setup_simple_bazi_analyzer,
+    'parse_bazi_output': setup_parse_bazi_output,
+    'api.bazi_interpret': setup_api,
+})
+
+
+# ---------------------------------------------------------------- 运行与对比
+
+def _time_passes(items, func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run_benchmark(name, corpus, repeat, modes=('cold', 'warm')):
+    """
+    按 modes 分别测冷/热耗时，返回 {模式: 结果}
+
+    cold：停用全部缓存后计时；warm：清空缓存、先不计时地跑一遍语料，再计时。
+    准备阶段（如参考分析器）不计时，缓存状态也不影响结果。
+    """
+    from app.bazi_lib.bazi.bazi_cache import caches_disabled, clear_caches
+
+    items, func = BENCHMARKS[name](corpus)
+    count = len(corpus) if name == 'core_base.batch' else len(items)
+    results = {}
+    for mode in modes:
+        if mode == 'cold':
+            with caches_disabled():
+                samples = _time_passes(items, func, repeat)
+        else:
+            clear_caches()
+            _time_passes(items, func, 1)
+            samples = _time_passes(items, func, repeat)
+        best = min(samples)
+        results[mode] = {
+            'items': count,
+            'repeat': repeat,
+            'best_s': round(best, 6),
+            'median_s': round(statistics.median(samples), 6),
+            'per_item_us': round(best / max(count, 1) * 1e6, 3),
+            'ops_per_s': round(count / best, 1) if best else None,
+        }
+    return results
+
+
+def compare(previous, current, threshold):
+    """返回变慢超过阈值的基准"""
+    regressions = []
+    print(f"\n{'基准':<32}{'之前(us)':>12}{'现在(us)':>12}{'比值':>8}")
+    for name, result in current['results'].items():
+        old = previous.get('results', {}).get(name)
+        if not old:
+            continue
+        ratio = result['per_item_us'] / old['per_item_us'] if old['per_item_us'] else 1.0
+        flag = "  变慢" if ratio > 1 + threshold else ""
+        print(f"{name:<32}{old['per_item_us']:>12.1f}{result['per_item_us']:>12.1f}{ratio:>8.2f}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="八字引擎基准")
+    parser.add_argument('-n', '--size', type=int, default=2000, help="语料条数")
+    parser.add_argument('--seed', type=int, default=20240101, help="语料随机种子")
+    parser.add_argument('--repeat', type=int, default=3, help="每个基准的重复次数，取最快一次")
+    parser.add_argument('--api-size', type=int, default=200, help="/bazi_interpret 基准使用的语料条数")
+    parser.add_argument('-k', '--filter', default='', help="只运行名称包含该字符串的基准")
+    parser.add_argument('-o', '--output', help="结果文件，默认 .benchmarks/engine-<提交>.json")
+    parser.add_argument('--compare', help="与之前的结果文件对比")
+    parser.add_argument('--threshold', type=float, default=0.2, help="单条耗时增加超过该比例视为变慢")
+    parser.add_argument('--cache', choices=['cold', 'warm', 'both'], default='both',
+                        help="测冷耗时（停用缓存）、热耗时（缓存预热后）或两者")
+    options = parser.parse_args()
+
+    corpus = make_corpus(options.size, options.seed)
+    modes = ('cold', 'warm') if options.cache == 'both' else (options.cache,)
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'corpus': {'size': options.size, 'seed': options.seed},
+        'cache': options.cache,
+        'results': {},
+    }
+
+    print(f"{'基准':<32}{'条数':>8}{'单条(us)':>12}{'每秒':>12}")
+    print('-' * 64)
+    for name in BENCHMARKS:
+        if options.filter not in name:
+            continue
+        items = corpus[:options.api_size] if name.startswith('api.') else corpus
+        results = run_benchmark(name, items, options.repeat, modes)
+        for mode, result in results.items():
+            label = name if mode == 'cold' else f"{name}:warm"
+            report['results'][label] = result
+            print(f"{label:<32}{result['items']:>8}{result['per_item_us']:>12.1f}{result['ops_per_s'] or 0:>12.0f}")
+
+    output = options.output or os.path.join(RESULTS_DIR, f"engine-{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已写入 {output}")
+
+    if options.compare:
+        with open(options.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+        regressions = compare(previous, report, options.threshold)
+        if regressions:
+            print("变慢:", ", ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
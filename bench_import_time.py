@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+导入耗时基准 - 用 python -X importtime 统计八字引擎各入口的导入耗时，并按预算做回归检查
+
+用法：
+    python bench_import_time.py              # 输出报告，超出预算或载入了不该载入的模块时返回码为1
+    python bench_import_time.py --top 10     # 同时列出每个入口最慢的10个模块
+    python bench_import_time.py --runs 9     # 每个入口重复导入9次取中位数
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# 入口模块 -> (耗时预算（毫秒）, 导入后不应载入的模块)
+# 预算按本机实测值留出约两倍余量；数据表、numpy 等应在首次使用时才载入
+BUDGETS = {
+    'app.bazi_lib.bazi': (10, ['numpy', 'lunar_python', 'app.bazi_lib.bazi.datas']),
+    'app.bazi_lib.bazi.simple_bazi_analyzer': (100, ['numpy', 'app.bazi_lib.bazi.sizi', 'app.bazi_lib.bazi.yue']),
+    'app.bazi_lib.bazi.bazi_analyzer': (200, ['numpy', 'sizi', 'yue', 'app.bazi_lib.bazi.sizi', 'app.bazi_lib.bazi.yue']),
+}
+
+
+def run_importtime(module):
+    """在新进程中导入模块，返回 ({模块名: (自身耗时, 累计耗时)}（微秒）, 已载入的模块列表)"""
+    code = f"import sys, json; import {module}; print(json.dumps(sorted(sys.modules)))"
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"导入{module}失败:\n{proc.stderr[-2000:]}")
+
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings, json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def bench_module(module, runs):
+    samples = []
+    timings = {}
+    loaded = []
+    for _ in range(runs):
+        timings, loaded = run_importtime(module)
+        samples.append(timings[module][1] / 1000)
+    return statistics.median(samples), timings, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="八字引擎导入耗时基准")
+    parser.add_argument('--runs', type=int, default=5, help="每个入口的导入次数")
+    parser.add_argument('--top', type=int, default=0, help="列出最慢的模块数")
+    options = parser.parse_args()
+
+    failures = []
+    print(f"{'入口模块':<44}{'中位耗时':>10}{'预算':>10}")
+    print('-' * 70)
+    for module, (budget_ms, forbidden) in BUDGETS.items():
+        median_ms, timings, loaded = bench_module(module, options.runs)
+        status = "OK" if median_ms <= budget_ms else "超出预算"
+        print(f"{module:<44}{median_ms:>8.1f}ms{budget_ms:>8d}ms  {status}")
+        if median_ms > budget_ms:
+            failures.append(f"{module} 导入耗时 {median_ms:.1f}ms 超出预算 {budget_ms}ms")
+
+        unexpected = [name for name in forbidden if name in loaded]
+        if unexpected:
+            failures.append(f"{module} 导入时载入了 {', '.join(unexpected)}")
+
+        if options.top:
+            slowest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)[:options.top]
+            for name, (self_us, cumulative_us) in slowest:
+                print(f"    {name:<52}{self_us / 1000:>8.1f}ms{cumulative_us / 1000:>10.1f}ms")
+
+    print('-' * 70)
+    if failures:
+        for failure in failures:
+            print("失败:", failure)
+        return 1
+    print("全部入口均在预算内")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+金样本回归库 - 用参考流水线（BaziAnalyzer / SimpleBaziAnalyzer）生成一批固定输入的输出，
+之后任何优化过的实现都可以和它逐字段比对
+
+文件为 gzip 压缩的 NDJSON：第一行是文件头（版本、随机种子、参照年份等），
+其后每行一个命盘 {"key", "input", "bazi", "simple"}，按 key 排序，zcat 后可直接 diff
+
+用法：
+    python golden_corpus.py generate -n 5000                       # 生成 golden/bazi_golden.ndjson.gz
+    python golden_corpus.py compare                                # 用当前代码与金样本比对
+    python golden_corpus.py compare --engine mypkg.fast:analyze    # 比对其他实现，返回 {"bazi": ..., "simple": ...}
+
+流年分析以“当前年份”为中心，生成与比对时都把 BAZI_REFERENCE_YEAR 固定为文件头中的参照年份；
+输出中有集合转成的列表，顺序受哈希种子影响，脚本会以 PYTHONHASHSEED=0 重新启动自身
+"""
+
+import argparse
+import datetime
+import gzip
+import importlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.path.join(ROOT, 'golden', 'bazi_golden.ndjson.gz')
+FORMAT_VERSION = 1
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def make_inputs(size, seed):
+    """固定种子抽样：约八成为公历1900～2100年，其余为农历日期；男女各半。返回按 key 排序的 [(key, 输入)]"""
+    rng = random.Random(seed)
+    start = datetime.date(1900, 1, 1).toordinal()
+    end = datetime.date(2100, 12, 31).toordinal()
+    inputs = {}
+    while len(inputs) < size:
+        gender = rng.choice('男女')
+        hour = rng.randrange(24)
+        if rng.random() < 0.8:
+            day = datetime.date.fromordinal(rng.randint(start, end))
+            year, month, mday, gregorian = day.year, day.month, day.day, True
+        else:
+            year, month, mday, gregorian = rng.randint(1900, 2099), rng.randint(1, 12), rng.randint(1, 29), False
+        key = f"{year:04d}-{month:02d}-{mday:02d}T{hour:02d}|{gender}|{'g' if gregorian else 'l'}"
+        inputs[key] = [year, month, mday, hour, gender, gregorian]
+    return sorted(inputs.items())
+
+
+def sample_births(size, seed=0, gregorian_only=True):
+    """测试语料：make_inputs 抽样中的前 size 个输入（默认只取公历），[年, 月, 日, 时, 性别, 是否公历]"""
+    inputs = [value for _, value in make_inputs(size * 2, seed) if value[5] or not gregorian_only]
+    return inputs[:size]
+
+
+def birth_moments(births):
+    """把公历输入转成 numpy datetime64[s] 出生时刻数组，供批量排盘"""
+    import numpy as np
+    return np.array([f"{y:04d}-{m:02d}-{d:02d}T{h:02d}:00" for y, m, d, h, *_ in births], dtype='datetime64[s]')
+
+
+def random_moments(size, seed=0):
+    """大批量测试用的随机出生时刻（1950年起约63年内，精确到秒），numpy datetime64[s] 数组"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    return np.datetime64('1950-01-01', 's') + rng.integers(0, 2_000_000_000, size).astype('timedelta64[s]')
+
+
+def _normalize(value):
+    """转成JSON能表示的形式（元组变列表、其他对象转字符串），与写入文件后读回的结果一致"""
+    return json.loads(json.dumps(value, ensure_ascii=False, default=str))
+
+
+def reference_engine(year, month, day, hour, gender, use_gregorian):
+    """参考流水线：完整分析器的各模块结果与简化分析器的兼容格式结果"""
+    from app.bazi_lib.bazi.bazi_analyzer import BaziAnalyzer
+    from app.bazi_lib.bazi.simple_bazi_analyzer import SimpleBaziAnalyzer
+
+    return {
+        'bazi': BaziAnalyzer(year, month, day, hour, gender, use_gregorian).get_result()['analysis_results'],
+        'simple': SimpleBaziAnalyzer(year, month, day, hour, gender, use_gregorian).get_compatible_result(),
+    }
+
+
+def load_engine(spec):
+    """按 "模块:函数" 载入被测实现"""
+    module_name, _, func_name = spec.partition(':')
+    return getattr(importlib.import_module(module_name), func_name or 'analyze')
+
+
+def first_divergence(expected, actual, path=''):
+    """按固定顺序遍历，返回第一处不同的 (路径, 期望值, 实际值)，完全一致时返回None"""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in sorted(set(expected) | set(actual)):
+            child = f"{path}.{key}" if path else str(key)
+            if key not in actual:
+                return child, expected[key], '<缺失>'
+            if key not in expected:
+                return child, '<缺失>', actual[key]
+            found = first_divergence(expected[key], actual[key], child)
+            if found:
+                return found
+        return None
+    if isinstance(expected, list) and isinstance(actual, list):
+        for index, (left, right) in enumerate(zip(expected, actual)):
+            found = first_divergence(left, right, f"{path}[{index}]")
+            if found:
+                return found
+        if len(expected) != len(actual):
+            return f"{path}.length", len(expected), len(actual)
+        return None
+    if expected != actual:
+        return path, expected, actual
+    return None
+
+
+def _module_sections(record):
+    """把一条记录按模块拆开：bazi.<模块> 与 simple.<模块>，简化分析器 analysis_results 以外的字段归入 simple"""
+    sections = {}
+    for name, value in (record.get('bazi') or {}).items():
+        sections[f"bazi.{name}"] = value
+    simple = record.get('simple')
+    if isinstance(simple, dict):
+        rest = dict(simple)
+        results = rest.pop('analysis_results', None)
+        if isinstance(results, dict):
+            for name, value in results.items():
+                sections[f"simple.{name}"] = value
+        else:
+            rest['analysis_results'] = results
+        sections['simple'] = rest
+    elif simple is not None:
+        sections['simple'] = simple
+    return sections
+
+
+# ---------------------------------------------------------------- 多进程工作函数
+
+_engine = None
+
+
+def _init_worker(engine_spec):
+    global _engine
+    _engine = reference_engine if engine_spec is None else load_engine(engine_spec)
+
+
+def _generate_one(item):
+    key, args = item
+    record = {'key': key, 'input': args}
+    record.update(_normalize(_engine(*args)))
+    return json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+
+def _compare_one(line):
+    expected = json.loads(line)
+    try:
+        actual = _normalize(_engine(*expected['input']))
+    except Exception as e:
+        return expected['key'], {'<engine>': ('', '', f"{type(e).__name__}: {e}")}
+
+    expected_sections = _module_sections(expected)
+    # 被测实现可以只提供 bazi 或 simple 之一，只比对它提供的部分
+    actual_sections = _module_sections(actual)
+    diffs = {}
+    for module, value in expected_sections.items():
+        if module.split('.', 1)[0] not in actual:
+            continue
+        found = first_divergence(value, actual_sections.get(module, '<缺失>'))
+        if found:
+            diffs[module] = found
+    return expected['key'], diffs
+
+
+# ---------------------------------------------------------------- 命令
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def cmd_generate(options):
+    reference_year = options.reference_year or datetime.date.today().year
+    os.environ['BAZI_REFERENCE_YEAR'] = str(reference_year)
+    inputs = make_inputs(options.size, options.seed)
+    header = {
+        '_header': {
+            'version': FORMAT_VERSION,
+            'size': len(inputs),
+            'seed': options.seed,
+            'reference_year': reference_year,
+            'commit': _git_commit(),
+        }
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(options.path)), exist_ok=True)
+    started = time.perf_counter()
+    with multiprocessing.Pool(options.workers, _init_worker, (options.engine,)) as pool, \
+            open(options.path, 'wb') as raw:
+        # mtime 固定为0，相同内容生成的文件逐字节相同
+        with gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as gz, io.TextIOWrapper(gz, encoding='utf-8') as out:
+            out.write(json.dumps(header, ensure_ascii=False) + '\n')
+            for line in pool.imap(_generate_one, inputs, chunksize=16):
+                out.write(line + '\n')
+    print(f"已生成 {options.path}：{len(inputs)}个命盘，参照年份{reference_year}，"
+          f"耗时{time.perf_counter() - started:.1f}秒")
+    return 0
+
+
+def cmd_compare(options):
+    with gzip.open(options.path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())['_header']
+        lines = f.read().splitlines()
+    if header.get('version') != FORMAT_VERSION:
+        print(f"金样本格式版本 {header.get('version')} 与脚本的 {FORMAT_VERSION} 不一致")
+        return 2
+    os.environ['BAZI_REFERENCE_YEAR'] = str(header['reference_year'])
+
+    started = time.perf_counter()
+    mismatched = 0
+    counts = {}
+    examples = {}
+    with multiprocessing.Pool(options.workers, _init_worker, (options.engine,)) as pool:
+        for key, diffs in pool.imap_unordered(_compare_one, lines, chunksize=16):
+            if not diffs:
+                continue
+            mismatched += 1
+            for module, found in diffs.items():
+                counts[module] = counts.get(module, 0) + 1
+                # 每个模块保留key最小的一例，结果与进程调度无关
+                if module not in examples or key < examples[module][0]:
+                    examples[module] = (key, found)
+
+    elapsed = time.perf_counter() - started
+    print(f"比对 {len(lines)} 个命盘（金样本提交 {header.get('commit')}），耗时{elapsed:.1f}秒，"
+          f"不一致 {mismatched} 个")
+    for module in sorted(counts):
+        key, (path, expected, actual) = examples[module]
+        print(f"  {module}: {counts[module]}个命盘不一致，例如 {key}")
+        print(f"      字段 {path}")
+        print(f"      期望 {json.dumps(expected, ensure_ascii=False)[:options.width]}")
+        print(f"      实际 {json.dumps(actual, ensure_ascii=False)[:options.width]}")
+    return 1 if mismatched else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="八字引擎金样本回归库")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    generate = subparsers.add_parser('generate', help="用参考流水线生成金样本")
+    generate.add_argument('-n', '--size', type=int, default=2000, help="命盘数")
+    generate.add_argument('--seed', type=int, default=20240101, help="抽样随机种子")
+    generate.add_argument('--reference-year', type=int, help="流年分析的参照年份，默认今年")
+
+    compare = subparsers.add_parser('compare', help="比对被测实现与金样本")
+    compare.add_argument('--width', type=int, default=200, help="示例值的最大显示长度")
+
+    for sub in (generate, compare):
+        sub.add_argument('--path', default=DEFAULT_PATH, help="金样本文件")
+        sub.add_argument('--engine', help="被测实现 模块:函数，默认参考流水线")
+        sub.add_argument('-j', '--workers', type=int, default=os.cpu_count(), help="进程数")
+
+    options = parser.parse_args()
+    return cmd_generate(options) if options.command == 'generate' else cmd_compare(options)
+
+
+if __name__ == "__main__":
+    if os.environ.get('PYTHONHASHSEED') != '0':
+        os.environ['PYTHONHASHSEED'] = '0'
+        os.execv(sys.executable, [sys.executable] + sys.argv)
+    sys.exit(main())
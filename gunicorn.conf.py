@@ -0,0 +1,25 @@
+# gunicorn.conf.py
+# 多进程部署：gunicorn -c gunicorn.conf.py app.main:app
+# 各 worker 的 Prometheus 指标写入 PROMETHEUS_MULTIPROC_DIR，由 /metrics 汇总
+
+import os
+import shutil
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# 必须在 worker 导入 prometheus_client 之前设置
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc")
+
+
+def on_starting(server):
+    """启动时清掉上一次运行留下的指标文件"""
+    directory = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+/bazi_interpret 压测 - asyncio 闭环压测，报告吞吐、p50/p95/p99 延迟和各阶段耗时
+
+默认在本进程内启动服务（LLM 换成 app.fake_llm 的假模型，向量库换成 app.memory_vectorstore 的内存库），
+完全离线；也可以用 --url 压一个已启动的服务（该服务需以 LLM_PROVIDER=fake、VECTORSTORE_BACKEND=memory 启动）。
+各阶段耗时取自服务的 /metrics，按压测前后的直方图差值计算
+
+用法：
+    python loadtest.py -c 32 -n 2000                       # 并发32，共2000个请求
+    python loadtest.py -c 64 -d 60 --ttft-ms 1500          # 并发64，持续60秒，假模型首字延迟1.5秒
+    python loadtest.py --url http://127.0.0.1:8000 -c 100 -d 120 --json result.json
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STAGE_METRIC = 'bazi_interpret_stage_seconds'
+
+_LINE = re.compile(r'^([a-zA-Z_:][\w:]*)(?:\{(.*)\})?\s+(\S+)$')
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def make_requests(count, seed):
+    """固定种子的公历出生时间，1900～2100年"""
+    rng = random.Random(seed)
+    start = datetime.date(1900, 1, 1).toordinal()
+    end = datetime.date(2100, 12, 31).toordinal()
+    payloads = []
+    for _ in range(count):
+        day = datetime.date.fromordinal(rng.randint(start, end))
+        payloads.append({'year': day.year, 'month': day.month, 'day': day.day, 'hour': rng.randrange(24),
+                         'gender': rng.choice('男女'), 'use_gregorian': True})
+    return payloads
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def parse_stage_histograms(text):
+    """从 /metrics 文本中取各阶段直方图：{阶段: {'sum', 'count', 'buckets': {le: 累计数}}}"""
+    stages = {}
+    for line in text.splitlines():
+        match = _LINE.match(line)
+        if not match or not match.group(1).startswith(STAGE_METRIC):
+            continue
+        name, labels, value = match.group(1), dict(_LABEL.findall(match.group(2) or '')), float(match.group(3))
+        stage = stages.setdefault(labels.get('stage', ''), {'sum': 0.0, 'count': 0.0, 'buckets': {}})
+        if name.endswith('_sum'):
+            stage['sum'] = value
+        elif name.endswith('_count'):
+            stage['count'] = value
+        elif name.endswith('_bucket'):
+            stage['buckets'][float(labels['le'])] = value
+    return stages
+
+
+def histogram_quantile(q, buckets):
+    """按桶内线性插值估计分位数（与 Prometheus 的 histogram_quantile 相同）"""
+    bounds = sorted(buckets)
+    if not bounds or buckets[bounds[-1]] <= 0:
+        return 0.0
+    rank = q * buckets[bounds[-1]]
+    lower, lower_count = 0.0, 0.0
+    for bound in bounds:
+        count = buckets[bound]
+        if count >= rank:
+            if bound == float('inf'):
+                return lower
+            return lower + (bound - lower) * (rank - lower_count) / ((count - lower_count) or 1)
+        lower, lower_count = bound, count
+    return lower
+
+
+def stage_breakdown(before, after):
+    """两次抓取之间各阶段的平均耗时与估计分位数（毫秒）"""
+    breakdown = {}
+    for stage, end in after.items():
+        start = before.get(stage, {'sum': 0.0, 'count': 0.0, 'buckets': {}})
+        count = end['count'] - start['count']
+        if count <= 0:
+            continue
+        buckets = {le: value - start['buckets'].get(le, 0.0) for le, value in end['buckets'].items()}
+        breakdown[stage] = {
+            'count': int(count),
+            'mean_ms': (end['sum'] - start['sum']) / count * 1000,
+            'p50_ms': histogram_quantile(0.5, buckets) * 1000,
+            'p95_ms': histogram_quantile(0.95, buckets) * 1000,
+        }
+    return breakdown
+
+
+def make_client(options):
+    import httpx
+
+    limits = httpx.Limits(max_connections=options.concurrency, max_keepalive_connections=options.concurrency)
+    if options.url:
+        return httpx.AsyncClient(base_url=options.url, timeout=options.timeout, limits=limits)
+
+    # 本进程内启动服务：在导入 app 之前切换到假模型和内存向量库
+    os.environ['LLM_PROVIDER'] = 'fake'
+    os.environ['VECTORSTORE_BACKEND'] = 'memory'
+    os.environ.setdefault('FAKE_LLM_TTFT_MS', str(options.ttft_ms))
+    os.environ.setdefault('FAKE_LLM_TTFT_SIGMA', str(options.ttft_sigma))
+    os.environ.setdefault('FAKE_LLM_TOKENS', str(options.tokens))
+    os.environ.setdefault('FAKE_LLM_TOKEN_RATE', str(options.token_rate))
+    os.environ.setdefault('FAKE_LLM_ERROR_RATE', str(options.error_rate))
+    os.environ.setdefault('FAKE_LLM_SEED', str(options.seed))
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    from app.main import app
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://loadtest',
+                             timeout=options.timeout, limits=limits)
+
+
+async def run_load(options):
+    payloads = make_requests(max(options.requests, 1000), options.seed)
+    latencies = []
+    errors = {}
+    llm_failures = 0
+    sent = 0
+    deadline = None
+
+    async with make_client(options) as client:
+        # 预热：载入数据表、建立连接，不计入结果
+        for payload in payloads[:options.warmup]:
+            await client.post('/bazi_interpret', json=payload)
+
+        before = parse_stage_histograms((await client.get('/metrics')).text)
+        started = time.perf_counter()
+        if options.duration:
+            deadline = started + options.duration
+
+        async def worker():
+            nonlocal sent, llm_failures
+            while True:
+                if deadline is not None:
+                    if time.perf_counter() >= deadline:
+                        return
+                elif sent >= options.requests:
+                    return
+                payload = payloads[sent % len(payloads)]
+                sent += 1
+                begin = time.perf_counter()
+                try:
+                    response = await client.post('/bazi_interpret', json=payload)
+                    elapsed = time.perf_counter() - begin
+                    if response.status_code != 200:
+                        errors[f"HTTP {response.status_code}"] = errors.get(f"HTTP {response.status_code}", 0) + 1
+                        continue
+                    body = response.json()
+                    if not body.get('success'):
+                        errors['analysis failed'] = errors.get('analysis failed', 0) + 1
+                        continue
+                    if str(body.get('llm_interpretation', '')).startswith('LLM解读失败'):
+                        llm_failures += 1
+                    latencies.append(elapsed)
+                except Exception as e:
+                    errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+
+        await asyncio.gather(*(worker() for _ in range(options.concurrency)))
+        wall = time.perf_counter() - started
+        after = parse_stage_histograms((await client.get('/metrics')).text)
+
+    latencies.sort()
+    completed = len(latencies)
+    return {
+        'target': options.url or 'in-process',
+        'concurrency': options.concurrency,
+        'wall_s': round(wall, 3),
+        'completed': completed,
+        'errors': errors,
+        'llm_failures': llm_failures,
+        'throughput_rps': round(completed / wall, 2) if wall else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 1),
+            'p95': round(percentile(latencies, 95) * 1000, 1),
+            'p99': round(percentile(latencies, 99) * 1000, 1),
+            'max': round(latencies[-1] * 1000, 1) if latencies else 0.0,
+            'mean': round(sum(latencies) / completed * 1000, 1) if completed else 0.0,
+        },
+        'stages': {stage: {key: round(value, 1) if isinstance(value, float) else value
+                           for key, value in stats.items()}
+                   for stage, stats in stage_breakdown(before, after).items()},
+    }
+
+
+def print_report(report):
+    latency = report['latency_ms']
+    print(f"目标: {report['target']}    并发: {report['concurrency']}    用时: {report['wall_s']}秒")
+    print(f"完成: {report['completed']}    错误: {sum(report['errors'].values())} {report['errors'] or ''}"
+          f"    LLM失败: {report['llm_failures']}")
+    print(f"吞吐: {report['throughput_rps']} 请求/秒")
+    print(f"延迟: p50 {latency['p50']}ms  p95 {latency['p95']}ms  p99 {latency['p99']}ms  "
+          f"max {latency['max']}ms  平均 {latency['mean']}ms")
+    if report['stages']:
+        print(f"\n{'阶段':<12}{'次数':>8}{'平均(ms)':>12}{'p50(ms)':>12}{'p95(ms)':>12}")
+        for stage in ('chart', 'retrieval', 'llm', 'total'):
+            stats = report['stages'].get(stage)
+            if stats:
+                print(f"{stage:<12}{stats['count']:>8}{stats['mean_ms']:>12.1f}{stats['p50_ms']:>12.1f}{stats['p95_ms']:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/bazi_interpret 压测")
+    parser.add_argument('--url', help="已启动服务的地址，不指定时在本进程内启动")
+    parser.add_argument('-c', '--concurrency', type=int, default=16, help="并发数")
+    parser.add_argument('-n', '--requests', type=int, default=500, help="请求总数（未指定 --duration 时）")
+    parser.add_argument('-d', '--duration', type=float, default=0, help="持续秒数，优先于 --requests")
+    parser.add_argument('--warmup', type=int, default=5, help="预热请求数")
+    parser.add_argument('--timeout', type=float, default=120, help="单个请求超时秒数")
+    parser.add_argument('--seed', type=int, default=20240101, help="请求与假模型的随机种子")
+    parser.add_argument('--ttft-ms', type=float, default=800, help="假模型首字延迟中位数（毫秒）")
+    parser.add_argument('--ttft-sigma', type=float, default=0.5, help="假模型首字延迟的对数标准差")
+    parser.add_argument('--tokens', type=int, default=600, help="假模型平均输出 token 数")
+    parser.add_argument('--token-rate', type=float, default=40, help="假模型出字速度（token/秒）")
+    parser.add_argument('--error-rate', type=float, default=0, help="假模型失败概率")
+    parser.add_argument('--json', help="把结果写入JSON文件")
+    options = parser.parse_args()
+
+    report = asyncio.run(run_load(options))
+    print_report(report)
+    if options.json:
+        with open(options.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 1 if report['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
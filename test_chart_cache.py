@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+命盘缓存测试：命中缓存与重新计算的结果一致，调用方修改结果不会改动缓存中的条目，
+大运单步缓存每步只查一次
+"""
+
+import copy
+
+from app.bazi_lib.bazi.bazi_analyzer import BaziAnalyzer, CHART_INVARIANT_RESULTS, _chart_cache
+from app.bazi_lib.bazi.bazi_cache import cache_stats, caches_disabled, clear_caches
+
+BIRTH = (1990, 5, 15, 14, '男', True)
+
+
+def _chart_results(analyzer):
+    return {name: analyzer.analysis_results[name] for name in CHART_INVARIANT_RESULTS}
+
+
+def test_cache_hit_matches_fresh_analysis():
+    with caches_disabled():
+        fresh = _chart_results(BaziAnalyzer(*BIRTH))
+    _chart_cache.clear()
+    BaziAnalyzer(*BIRTH)
+    hit = BaziAnalyzer(*BIRTH)
+    assert _chart_cache.hits == 1
+    assert _chart_results(hit) == fresh
+
+
+def test_mutating_result_does_not_touch_cache():
+    _chart_cache.clear()
+    first = BaziAnalyzer(*BIRTH)
+    expected = copy.deepcopy(_chart_results(first))
+
+    for analyzer in (first, BaziAnalyzer(*BIRTH)):
+        results = analyzer.get_result()['analysis_results']
+        results['bazi_main']['ten_gods']['gan_shens'].append('改')
+        results['personality_analysis'].clear()
+        results['detail_info']['injected'] = True
+
+    assert _chart_results(BaziAnalyzer(*BIRTH)) == expected
+    assert _chart_cache.hits == 2
+
+
+def test_dayun_steps_looked_up_once_per_chart():
+    clear_caches()
+    analyzer = BaziAnalyzer(*BIRTH)
+    stats = cache_stats()['dayun_step']
+    assert stats['misses'] == len(analyzer.dayun_analysis_module.dayun_list)
+    assert stats['hits'] == 0 and stats['hit_rate'] == 0.0
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+命盘特征导出测试：导出表逐行与 BaziAnalyzer 的结果一致，多进程与单进程、CSV 与 Parquet 的内容一致
+"""
+
+import csv
+
+import numpy as np
+import pytest
+
+from golden_corpus import sample_births
+from app.bazi_lib.bazi.bazi_analyzer import BaziAnalyzer
+from app.bazi_lib.bazi.chart_export import ELEMENT_COLUMNS, EXPORT_COLUMNS, SHEN_COLUMNS, export_charts
+from app.bazi_lib.bazi.chart_store import ELEMENTS, PILLAR_FEATURES, SHENS
+from app.bazi_lib.bazi.datas import shens_mask_names
+from app.bazi_lib.bazi.ganzhi import Gan, Zhi
+from app.bazi_lib.bazi.geju import RULES, match_rules
+
+
+def _write_births(path):
+    """金样本抽样（公历、农历都有）加一行无法解析的记录"""
+    inputs = sample_births(60, gregorian_only=False)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['customer_id', 'year', 'month', 'day', 'hour', 'gender', 'use_gregorian'])
+        for row, (year, month, day, hour, gender, gregorian) in enumerate(inputs):
+            writer.writerow([row, year, month, day, hour, gender, int(gregorian)])
+        writer.writerow([len(inputs), 'x', 1, 1, 0, '男', 1])
+    return inputs
+
+
+def _read_csv(path):
+    with open(path, encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.fixture(scope='module')
+def exported(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('export')
+    source = str(directory / 'births.csv')
+    inputs = _write_births(source)
+    summary = export_charts(source, str(directory / 'charts.csv'), chunk_size=16, workers=0)
+    return directory, inputs, summary
+
+
+def test_rows_match_bazi_analyzer(exported):
+    directory, inputs, summary = exported
+    assert summary['rows'] == len(inputs) and summary['skipped'] == 1
+    rows = _read_csv(directory / 'charts.csv')
+    assert list(rows[0]) == list(EXPORT_COLUMNS)
+
+    for row, (year, month, day, hour, gender, gregorian) in zip(rows, inputs):
+        analyzer = BaziAnalyzer(year, month, day, hour, gender, gregorian)
+        results = analyzer.get_result()['analysis_results']
+        main, dayun = results['bazi_main'], results['dayun_analysis']['basic_info']
+
+        pillars = [index for gan, zhi in zip(analyzer.gans, analyzer.zhis) for index in (Gan.index(gan), Zhi.index(zhi))]
+        assert [int(row[name]) for name in PILLAR_FEATURES] == pillars, (year, month, day, hour)
+        assert [int(row[f'wuxing_{ELEMENT_COLUMNS[element]}']) for element in ELEMENTS] == \
+            [main['wuxing_analysis']['scores'][element] for element in ELEMENTS]
+        assert int(row['strong_score']) == main['strength_analysis']['strong_score']
+        assert bool(int(row['weak'])) == main['strength_analysis']['is_weak']
+        assert [int(row[f'shen_{SHEN_COLUMNS[shen]}']) for shen in SHENS] == main['ten_gods']['histogram']['total']
+        assert set(shens_mask_names(int(row['shensha']))) == set(results['shens_analysis']['all_shens'])
+        assert int(row['start_age']) == dayun['start_age']
+        assert bool(int(row['dayun_forward'])) == (dayun['direction'] == 1)
+
+        matched = {rule.name for rule in match_rules(list(analyzer.gans), list(analyzer.zhis))}
+        assert {name for name in RULES.names if int(row[f'geju_{name}'])} == matched
+
+
+def test_parallel_export_matches_serial(exported):
+    directory, _, _ = exported
+    summary = export_charts(str(directory / 'births.csv'), str(directory / 'parallel.csv'), chunk_size=7, workers=2)
+    assert summary['skipped'] == 1
+    assert _read_csv(directory / 'parallel.csv') == _read_csv(directory / 'charts.csv')
+
+
+def test_parquet_matches_csv(exported):
+    pyarrow_parquet = pytest.importorskip('pyarrow.parquet')
+    directory, _, _ = exported
+    export_charts(str(directory / 'births.csv'), str(directory / 'charts.parquet'), chunk_size=16, workers=0)
+    table = pyarrow_parquet.read_table(str(directory / 'charts.parquet'))
+    assert table.column_names == list(EXPORT_COLUMNS)
+    for name, values in zip(table.column_names, zip(*[row.values() for row in _read_csv(directory / 'charts.csv')])):
+        column = table.column(name).to_numpy()
+        if column.dtype.kind == 'M':
+            assert column.astype('datetime64[s]').astype(str).tolist() == list(values)
+        else:
+            assert np.array_equal(column.astype(np.int64), np.array(values, dtype=np.int64)), name
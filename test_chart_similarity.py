@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+相似命盘索引测试：批量向量与由 BaziAnalyzer 结果取的向量一致，检索结果与暴力排序一致，
+落盘、扩容、重新打开后数据不变，扩容中断时已有数据不丢，追加与检索并发时不出错
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from golden_corpus import birth_moments, random_moments, sample_births
+from app.bazi_lib.bazi.bazi_analyzer import BaziAnalyzer
+from app.bazi_lib.bazi.chart_similarity import SimilarityIndex, chart_vector, chart_vectors
+from app.bazi_lib.bazi.modules.core_base import to_pillars_batch
+
+
+def _vectors(size, seed=0):
+    return chart_vectors(to_pillars_batch(random_moments(size, seed)))
+
+
+def _brute_force(vectors, ids, query, k):
+    distances = np.linalg.norm(vectors - query, axis=1)
+    order = np.argsort(distances, kind='stable')[:k]
+    return [int(ids[row]) for row in order], distances[order]
+
+
+def test_chart_vector_matches_bazi_analyzer():
+    inputs = sample_births(40)
+    batch = chart_vectors(to_pillars_batch(birth_moments(inputs)))
+    for i, (year, month, day, hour, gender, _) in enumerate(inputs):
+        main = BaziAnalyzer(year, month, day, hour, gender, True).get_result()['analysis_results']['bazi_main']
+        assert np.allclose(chart_vector(main), batch[i])
+
+
+def test_persisted_index_matches_brute_force(tmp_path):
+    vectors = _vectors(3000)
+    ids = np.arange(len(vectors)) * 7 + 1
+    path = str(tmp_path / 'reference.knn')
+    index = SimilarityIndex(path, capacity=16)
+    for start in range(0, len(vectors), 250):
+        index.add(ids[start:start + 250], vectors[start:start + 250])
+    index.close()
+
+    index = SimilarityIndex(path)
+    assert len(index) == len(vectors)
+    assert np.array_equal(index.ids(), ids)
+    for row in range(0, len(vectors), 300):
+        result = index.search(vectors[row], k=5, exclude=[ids[row]])
+        expected_ids, expected_distances = _brute_force(np.delete(vectors, row, axis=0), np.delete(ids, row), vectors[row], 5)
+        assert [chart_id for chart_id, _ in result] == expected_ids
+        assert np.allclose([distance for _, distance in result], expected_distances, atol=1e-5)
+    index.close()
+
+
+def test_interrupted_growth_keeps_data(tmp_path, monkeypatch):
+    vectors = _vectors(40, seed=1)
+    path = str(tmp_path / 'reference.knn')
+    index = SimilarityIndex(path, capacity=32)
+    index.add(np.arange(30), vectors[:30])
+
+    # 扩容时新文件刚换上、还没映射就中断
+    def fail(*args):
+        raise OSError("中断")
+    monkeypatch.setattr(SimilarityIndex, '_map', fail)
+    with pytest.raises(OSError):
+        index.add(np.arange(30, 40), vectors[30:])
+    monkeypatch.undo()
+
+    reopened = SimilarityIndex(path)
+    assert np.array_equal(reopened.ids(), np.arange(30))
+    assert reopened.search(vectors[3], k=1)[0][0] == 3
+    reopened.close()
+
+
+def test_search_while_growing(tmp_path):
+    vectors = _vectors(4000, seed=2)
+    index = SimilarityIndex(str(tmp_path / 'reference.knn'), capacity=8)
+    errors = []
+
+    def search():
+        try:
+            for row in range(0, 4000, 10):
+                index.search(vectors[row], k=3)
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=search)
+    thread.start()
+    for start in range(0, len(vectors), 20):
+        index.add(np.arange(start, start + 20), vectors[start:start + 20])
+    thread.join()
+    assert not errors
+    assert index.search(vectors[123], k=1)[0][1] == 0.0
+    index.close()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+命盘库测试：批量特征与 BaziAnalyzer 一致，分批追加、重新载入与一次写入一致，筛选与逐行判断一致
+"""
+
+import os
+
+import numpy as np
+
+from golden_corpus import birth_moments, random_moments, sample_births
+from app.bazi_lib.bazi.bazi_analyzer import BaziAnalyzer
+from app.bazi_lib.bazi.chart_store import ELEMENTS, FEATURES, ChartStore, chart_features
+from app.bazi_lib.bazi.datas import shens_bits, shens_mask_names
+from app.bazi_lib.bazi.ganzhi import Gan, Zhi, zhi_atts
+from app.bazi_lib.bazi.modules.core_base import to_pillars_batch
+
+
+def test_features_match_bazi_analyzer():
+    inputs = sample_births(60)
+    features = chart_features(to_pillars_batch(birth_moments(inputs)))
+    for i, (year, month, day, hour, gender, _) in enumerate(inputs):
+        results = BaziAnalyzer(year, month, day, hour, gender, True).get_result()['analysis_results']
+        main = results['bazi_main']
+        assert main['strength_analysis']['is_weak'] == bool(features['weak'][i])
+        assert main['strength_analysis']['strong_score'] == int(features['strong_score'][i])
+        assert [main['wuxing_analysis']['scores'][element] for element in ELEMENTS] == features['element_scores'][i].tolist()
+        assert main['ten_gods']['histogram']['total'] == features['shen_counts'][i].tolist()
+        assert set(results['shens_analysis']['all_shens']) == set(shens_mask_names(int(features['shensha'][i])))
+
+
+def test_incremental_and_reloaded_store_match_bulk(tmp_path):
+    births = random_moments(3000)
+    bulk = ChartStore()
+    bulk.add_births(np.arange(len(births)), births)
+
+    path = str(tmp_path / 'charts')
+    incremental = ChartStore(path)
+    rng = np.random.default_rng(1)
+    start = 0
+    while start < len(births):
+        end = min(start + int(rng.integers(1, 200)), len(births))
+        incremental.add_births(np.arange(start, end), births[start:end])
+        start = end
+    # 模拟上次写入中断：某列文件多出半截数据
+    with open(os.path.join(path, 'pillars.bin'), 'ab') as f:
+        f.write(b'\x01\x02\x03')
+    reloaded = ChartStore(path)
+    assert len(reloaded) == len(births)
+
+    for name in ('pillars', 'element_scores', 'shen_counts', 'weak', 'shensha', 'customer_id'):
+        assert np.array_equal(reloaded.column(name), bulk.column(name))
+    for name, values in FEATURES.items():
+        for value in values:
+            expected = bulk.select(**{name: [value]})
+            assert np.array_equal(incremental.select(**{name: [value]}), expected), (name, value)
+            assert np.array_equal(reloaded.select(**{name: [value]}), expected), (name, value)
+
+
+def test_select_matches_row_by_row():
+    births = random_moments(2000, seed=7)
+    store = ChartStore()
+    store.add_births(np.arange(len(births)), births)
+
+    taisui = Zhi[(2026 - 4) % 12]
+    atts = zhi_atts[taisui]
+    fan = {taisui, *atts['冲'], *atts['刑'], *atts['被刑'], *atts['害'], *atts['破']}
+    pillars, weak, shensha = store.column('pillars'), store.column('weak'), store.column('shensha')
+    expected = [row for row in range(len(births))
+                if Gan[pillars[row, 4]] in '甲乙' and weak[row] and Zhi[pillars[row, 1]] in fan
+                and shensha[row] & shens_bits['天乙']]
+
+    conditions = dict(day_gan='甲乙', weak=True, fan_taisui=2026, shensha='天乙')
+    assert store.select(**conditions).tolist() == expected
+    assert store.count(**conditions) == len(expected)
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+详细信息测试：修改某个命盘的柱位明细不影响之后的命盘
+"""
+
+from app.bazi_lib.bazi.modules.detail_info import canggan_detail, nayin_detail, pillar_detail
+
+
+def test_details_are_copies():
+    first = pillar_detail('甲', 0, '庚', '午', '')
+    first['formatted'] = '改'
+    assert pillar_detail('甲', 0, '庚', '午', '')['formatted'] != '改'
+
+    first = canggan_detail('甲', 1, '寅')
+    first['canggan_list'][0]['shen'] = '改'
+    first['canggan_list'].clear()
+    second = canggan_detail('甲', 1, '寅')
+    assert second['canggan_list'] and second['canggan_list'][0]['shen'] != '改'
+
+    nayin_detail(3, '甲', '子')['special_marks'].append('改')
+    assert nayin_detail(3, '甲', '子')['special_marks'] == ['劫杀']
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合婚引擎测试：批量评分、分块筛选与单对 match 的结果一致
+"""
+
+import numpy as np
+
+from golden_corpus import birth_moments, sample_births
+from app.bazi_lib.bazi.ganzhi import Gan, Zhi
+from app.bazi_lib.bazi.hehun import match, score_matrix, top_matches, top_matches_batch
+from app.bazi_lib.bazi.modules.core_base import to_pillars_batch
+
+
+def _corpus():
+    births = sample_births(60)
+    return to_pillars_batch(birth_moments(births)).astype(np.int64), [birth[4] for birth in births]
+
+
+def _pillars(chart):
+    """批量排盘的一行（8个干支序号）转为 match 接受的 (天干列表, 地支列表)"""
+    return [Gan[index] for index in chart[0::2]], [Zhi[index] for index in chart[1::2]]
+
+
+def test_score_matrix_matches_pairwise():
+    charts, genders = _corpus()
+    scores = score_matrix(charts, genders, charts, genders)
+    assert scores.shape == (len(charts), len(charts))
+    for i in range(0, len(charts), 7):
+        for j in range(len(charts)):
+            result = match(_pillars(charts[i]), genders[i], charts[j], genders[j])
+            assert result['score'] == round(float(scores[i, j]), 1)
+            assert abs(sum(result['parts'].values()) - result['score']) < 0.3
+
+
+def test_top_matches_equals_sorted_scores():
+    charts, genders = _corpus()
+    scores = score_matrix(charts, genders, charts, genders)
+    blocked = top_matches_batch(charts, genders, charts, genders, k=5, block_size=7)
+    whole = top_matches_batch(charts, genders, charts, genders, k=5, block_size=None)
+    assert blocked == whole
+    for i, best in enumerate(whole):
+        assert best == top_matches(charts[i], genders[i], charts, genders, k=5)
+        opposite = [j for j in range(len(charts)) if genders[j] != genders[i]]
+        expected = sorted((round(float(scores[i, j]), 1) for j in opposite), reverse=True)[:5]
+        assert [entry['score'] for entry in best] == expected
+        assert all(genders[entry['index']] != genders[i] for entry in best)
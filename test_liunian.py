@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流年分析测试：流年十神、藏干十神、纳音取自真实的干支表
+"""
+
+import pytest
+
+from app.bazi_lib.bazi.bazi_analyzer import BaziAnalyzer
+from app.bazi_lib.bazi.datas import nayins
+from app.bazi_lib.bazi.ganzhi import ten_deity, zhi5
+
+
+@pytest.mark.parametrize('birth', [(1990, 5, 15, 14, '男'), (1985, 2, 4, 5, '女'), (2001, 11, 30, 23, '男')])
+def test_liunian_uses_real_tables(birth):
+    analyzer = BaziAnalyzer(*birth, use_gregorian=True)
+    module = analyzer.liunian_analysis_module
+    me = analyzer.gans[2]
+    assert module.liunian_details
+    for detail in module.liunian_details:
+        gan, zhi = detail['liunian_info']['gan'], detail['liunian_info']['zhi']
+        assert detail['ten_gods'] == {'gan_shen': ten_deity(me, gan), 'zhi_shen': ten_deity(me, zhi)}
+        assert detail['analysis']['zhi_canggan'] == '　'.join(f"{item}{ten_deity(me, item)}" for item in zhi5[zhi])
+        assert detail['properties']['nayin'] == nayins[(gan, zhi)]
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+四柱反查测试：反查结果能找回原出生时辰，直接输入八字按参照时刻取出生时刻，无对应时刻时报错
+"""
+
+import datetime
+
+import pytest
+from lunar_python import Solar
+
+from golden_corpus import sample_births
+from app.bazi_lib.bazi.bazi_analyzer import BaziAnalyzer
+from app.bazi_lib.bazi.pillar_index import find_birth_datetimes
+
+
+def _pillars(moment):
+    ba = Solar.fromYmdHms(moment.year, moment.month, moment.day, moment.hour, moment.minute,
+                          moment.second).getLunar().getEightChar()
+    return ([ba.getYearGan(), ba.getMonthGan(), ba.getDayGan(), ba.getTimeGan()],
+            [ba.getYearZhi(), ba.getMonthZhi(), ba.getDayZhi(), ba.getTimeZhi()])
+
+
+def test_round_trip_matches_lunar_python():
+    for year, month, day, hour, _, _ in sample_births(80):
+        birth = datetime.datetime(year, month, day, hour)
+        gans, zhis = _pillars(birth)
+        moments = find_birth_datetimes(gans, zhis)
+        # 原时刻落在某个反查结果所在的时辰内
+        assert any(moment <= birth < moment + datetime.timedelta(hours=2) for moment in moments), birth
+        for moment in moments:
+            assert _pillars(moment) == (gans, zhis), (birth, moment)
+
+
+def test_impossible_pillars_raise():
+    assert find_birth_datetimes('甲甲甲甲', '子子子子') == []
+    with pytest.raises(ValueError):
+        BaziAnalyzer('甲子', '甲子', '甲子', '甲子', use_bazi_input=True)
+
+
+@pytest.mark.parametrize('reference_year, expected_year', [(2030, 1990), (1950, 1930)])
+def test_bazi_input_uses_reference_year(monkeypatch, reference_year, expected_year):
+    monkeypatch.setenv('BAZI_REFERENCE_YEAR', str(reference_year))
+    analyzer = BaziAnalyzer('庚午', '辛巳', '庚辰', '癸未', use_bazi_input=True)
+    core = analyzer.core_module
+    assert core.year == expected_year
+    assert _pillars(datetime.datetime(core.year, core.month, core.day, core.hour)) == \
+        (list('庚辛庚癸'), list('午巳辰未'))
+
+
+def test_jie_moment_birth_keeps_minutes():
+    """候选时刻落在立春交节的分秒上时，起运按完整时刻推算，不退回到整点"""
+    analyzer = BaziAnalyzer('乙丑', '戊寅', '甲戌', '丁卯', '男', use_bazi_input=True)
+    assert analyzer.core_module.solar.toYmdHms() == '1985-02-04 05:11:47'
+    results = analyzer.get_result()['analysis_results']
+    yun = Solar.fromYmdHms(1985, 2, 4, 5, 11, 47).getLunar().getEightChar().getYun(1)
+    assert results['dayun_analysis']['basic_info']['start_age'] == yun.getDaYun(2)[1].getStartAge()
+    assert results['basic_info']['timing_info']['shang_yun_time'] == yun.getStartSolar().toYmd() == '1985-02-04'
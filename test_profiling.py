@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能剖析测试：多个线程在同一个剖析器下记录时，各自的 span 挂在各自的父节点下
+"""
+
+import threading
+
+from app.bazi_lib.bazi.profiling import Profiler
+
+
+def test_spans_nest_per_thread():
+    profiler = Profiler()
+    barrier = threading.Barrier(2)
+
+    def work(name):
+        with profiler.span(name):
+            barrier.wait()
+            with profiler.span(name + '.inner'):
+                barrier.wait()
+
+    threads = [threading.Thread(target=work, args=(name,)) for name in ('a', 'b')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    tree = profiler.finish().tree()
+    assert sorted(child['name'] for child in tree['children']) == ['a', 'b']
+    for child in tree['children']:
+        assert [inner['name'] for inner in child['children']] == [child['name'] + '.inner']
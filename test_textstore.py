@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+古籍文本库测试：源文件内容改动（即使大小不变）时退回源文件，源文件不存在时直接用文本库
+"""
+
+import os
+import shutil
+
+import pytest
+
+from app.bazi_lib.bazi import textstore
+
+
+@pytest.fixture
+def store_dir(tmp_path, monkeypatch):
+    base = os.path.dirname(textstore.TEXTS_PATH)
+    for filename in textstore.SOURCES.values():
+        shutil.copy(os.path.join(base, filename), tmp_path / filename)
+    monkeypatch.setattr(textstore, 'TEXTS_PATH', str(tmp_path / 'texts.bin'))
+    monkeypatch.setattr(textstore, '_opened', None)
+    textstore.build_text_store(textstore.TEXTS_PATH)
+    return tmp_path
+
+
+def test_store_matches_sources(store_dir):
+    mapped, _ = textstore._open()
+    assert mapped is not None
+    for section, table in textstore._source_tables().items():
+        assert dict(textstore.TextStore(section)) == table
+
+
+def test_same_size_edit_falls_back_to_sources(store_dir):
+    path = store_dir / 'yue.py'
+    data = path.read_bytes()
+    position = data.index('春'.encode('utf-8'))
+    path.write_bytes(data[:position] + '夏'.encode('utf-8') + data[position + 3:])
+    assert os.path.getsize(path) == len(data)
+    assert textstore._open()[0] is None
+
+
+def test_missing_source_uses_store(store_dir):
+    os.remove(store_dir / 'sizi.py')
+    mapped, _ = textstore._open()
+    assert mapped is not None
+    assert len(textstore.TextStore('summarys')) == len(textstore._source_tables()['summarys'])
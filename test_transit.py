@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流年事件扫描测试：流年、大运干支与逐年数据一致，各事件与逐年按集合判断的结果一致
+"""
+
+import numpy as np
+from lunar_python import Lunar, Solar
+
+from golden_corpus import sample_births
+from app.bazi_lib.bazi.bazi_analyzer import BaziAnalyzer
+from app.bazi_lib.bazi.ganzhi import Gan, Zhi, gong_he, zhi_hes, zhi_huis
+from app.bazi_lib.bazi.transit import PILLAR_NAMES, TRANSIT_EVENTS, dayun_pillars, scan_transits, year_pillars
+
+
+def _samples():
+    for year, month, day, hour, gender, _ in sample_births(30):
+        analyzer = BaziAnalyzer(year, month, day, hour, gender, True)
+        natal = [value for gan, zhi in zip(analyzer.gans, analyzer.zhis) for value in (Gan.index(gan), Zhi.index(zhi))]
+        yield (year, month, day, hour, gender), analyzer, natal
+
+
+def test_year_pillars_match_lunar_python():
+    years = np.arange(1900, 2101)
+    gans, zhis = year_pillars(years)
+    for year, gan, zhi in zip(years.tolist(), gans.tolist(), zhis.tolist()):
+        assert Gan[gan] + Zhi[zhi] == Lunar.fromYmd(year, 1, 1).getYearInGanZhi()
+
+
+def test_dayun_pillars_match_reference():
+    for (year, month, day, hour, gender), analyzer, natal in _samples():
+        dayun = analyzer.analysis_results['dayun_analysis']
+        start_age = dayun['basic_info']['start_age']
+        forward = dayun['basic_info']['direction'] == 1
+
+        yun = Solar.fromYmdHms(year, month, day, hour, 0, 0).getLunar().getEightChar().getYun(1 if gender == '男' else 0)
+        assert forward == yun.isForward()
+        steps = dayun['dayun_list']
+        assert [step['ganzhi'] for step in steps[:8]] == [item.getGanZhi() for item in yun.getDaYun(9)[1:]]
+
+        ages = np.array([step['age'] for step in steps])
+        gans, zhis = dayun_pillars(natal, ages, start_age, forward)
+        assert [Gan[g] + Zhi[z] for g, z in zip(gans, zhis)] == [step['ganzhi'] for step in steps]
+
+        # 流年所在大运与 LiunianAnalysisModule 一致
+        liunian = analyzer.liunian_analysis_module.liunian_data
+        rows = sorted(liunian)
+        gans, zhis = dayun_pillars(natal, np.array([liunian[row]['age'] for row in rows]), start_age, forward)
+        for row, gan, zhi in zip(rows, gans.tolist(), zhis.tolist()):
+            info = liunian[row]['dayun_info']
+            assert (Gan[gan] + Zhi[zhi] if gan >= 0 else None) == (info['ganzhi'] if info else None), row
+
+
+def _ke(a, b):
+    return (Gan.index(a) // 2 - Gan.index(b) // 2) % 5 in (2, 3)
+
+
+def _year_events(gans, zhis, year_gan, year_zhi, dayun):
+    """按 bazi.py 的写法逐年判断：地支用集合，夹拱逐柱比较"""
+    events = []
+    for pos, pillar in enumerate(PILLAR_NAMES):
+        if (year_gan, year_zhi) == (gans[pos], zhis[pos]):
+            events.append(('伏吟', pillar))
+        if _ke(year_gan, gans[pos]) and zhis[pos] == Zhi[(Zhi.index(year_zhi) + 6) % 12]:
+            events.append(('反吟', pillar))
+    if zhis[2] == Zhi[(Zhi.index(year_zhi) + 6) % 12]:
+        events.append(('冲日支', zhis[2]))
+
+    # 起运后大运的干支与原局四柱一起参与比较
+    other_gans, other_zhis = list(gans) + list(dayun[:1]), list(zhis) + list(dayun[1:])
+    before, full = set(other_zhis), set(other_zhis) | {year_zhi}
+    for name, table in (('三合', zhi_hes), ('三会', zhi_huis)):
+        events += [(name, members) for members in table if set(members) <= full and not set(members) <= before]
+
+    jia, gong = set(), set()
+    for gan, zhi in zip(other_gans, other_zhis):
+        if gan != year_gan:
+            continue
+        gap = (Zhi.index(year_zhi) - Zhi.index(zhi)) % 12
+        if gap in (2, 10):
+            jia.add(Zhi[(Zhi.index(year_zhi) + (-1 if gap == 2 else 1)) % 12])
+        if zhi + year_zhi in gong_he and gong_he[zhi + year_zhi] not in zhis:
+            gong.add(gong_he[zhi + year_zhi])
+    events += [('夹', zhi) for zhi in sorted(jia, key=Zhi.index)] + [('拱', zhi) for zhi in sorted(gong, key=Zhi.index)]
+
+    if set('戌亥辰巳') <= full:
+        events.append(('天罗地网', '戌亥辰巳'))
+    for name, members in (('四生', '寅申巳亥'), ('四败', '子午卯酉'), ('四库', '辰戌丑未')):
+        if set(members) <= full and len(set(members) & set(zhis)) == 2:
+            events.append((name, ''.join(sorted(members, key=Zhi.index))))
+    return sorted(events, key=lambda event: TRANSIT_EVENTS.index(event[0]))
+
+
+def test_events_match_per_year_rules():
+    for (year, *_), analyzer, natal in _samples():
+        module = analyzer.liunian_analysis_module
+        gans, zhis = list(analyzer.gans), list(analyzer.zhis)
+        expected = []
+        for row in sorted(module.liunian_data):
+            data = module.liunian_data[row]
+            dayun = (data['dayun_info']['gan'], data['dayun_info']['zhi']) if data['dayun_info'] else ()
+            expected += [(row,) + event for event in _year_events(gans, zhis, data['gan'], data['zhi'], dayun)]
+        assert module.transit_events == expected, year
+        assert scan_transits(natal, year, module.start_age, module.direction == 1,
+                             years=len(module.liunian_data)) == expected
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+择日引擎测试：逐日表的干支、农历、建除、九星取自 lunar_python，select_days 与逐日判断一致
+"""
+
+import datetime
+
+import numpy as np
+from lunar_python import Solar
+
+from app.bazi_lib.bazi.datas import jianchus
+from app.bazi_lib.bazi.ganzhi import Gan, Zhi
+from app.bazi_lib.bazi.modules.core_base import to_pillars_batch
+from app.bazi_lib.bazi.zeri import NINE_STARS, activity_jianchus, day_table, select_days
+
+# 各段含立春、冬至夏至换九星、闰月（2033年闰十一月）以及表的两端
+SPANS = [('1901-01-15', '1901-02-28'), ('1984-12-10', '1985-01-20'), ('1985-06-10', '1985-07-10'),
+         ('2033-12-01', '2034-01-31'), ('2099-11-20', '2099-12-31')]
+
+
+def _lunar(day):
+    # 年月柱按整天计，取当天最后一秒
+    return Solar.fromYmdHms(day.year, day.month, day.day, 23, 59, 59).getLunar()
+
+
+def test_day_table_matches_lunar_python():
+    for start, end in SPANS:
+        table = day_table(start, end)
+        for i, date in enumerate(table['date'].tolist()):
+            lunar = _lunar(date)
+            pillars = table['pillars'][i]
+            ganzhi = [Gan[pillars[col]] + Zhi[pillars[col + 1]] for col in (0, 2, 4)]
+            assert ganzhi == [lunar.getYearInGanZhiExact(), lunar.getMonthInGanZhiExact(), lunar.getDayInGanZhi()], date
+            assert (table['lunar_year'][i], table['lunar_month'][i], table['lunar_day'][i]) == \
+                (lunar.getYear(), abs(lunar.getMonth()), lunar.getDay()), date
+            assert bool(table['lunar_leap'][i]) == (lunar.getMonth() < 0), date
+            assert jianchus[table['jianchu'][i]][0] == lunar.getZhiXing(), date
+            assert NINE_STARS[table['star'][i]][0] == lunar.getDayNineStar().getNumber(), date
+
+
+def test_select_days_matches_daily_rules():
+    natal = to_pillars_batch(np.array(['1990-05-17T08:00'], dtype='datetime64[s]'))[0]
+    natal_zhis = {Zhi[natal[1]], Zhi[natal[5]]}
+    allowed = {jianchus[index][0] for index in activity_jianchus('嫁娶')}
+
+    start, end = datetime.date(2025, 1, 1), datetime.date(2025, 6, 30)
+    expected = []
+    day = start
+    while day <= end:
+        lunar = _lunar(day)
+        # 岁破、月破：日支冲年支、月支
+        broken = lunar.getDayChong() in (lunar.getYearZhiExact(), lunar.getMonthZhiExact())
+        if not broken and lunar.getDayChong() not in natal_zhis and lunar.getZhiXing() in allowed:
+            expected.append(day)
+        day += datetime.timedelta(days=1)
+
+    selected = select_days(start, end, natal=natal, activity='嫁娶')
+    assert [result['date'] for result in selected] == expected
+    for result in selected:
+        assert result['ganzhi'][4:] == _lunar(result['date']).getDayInGanZhi()